@@ -0,0 +1,182 @@
+"""
+Microbenchmark: in-memory ELA vs the previous temp-file implementation.
+
+Checks that both paths produce byte-identical output, then reports the
+mean time per image. With --large, also times the difference/rescale
+kernel alone and the serving preprocessing (prepare_input) on a large
+photo, against the previous full-array NumPy implementation.
+
+Usage:
+    python -m benchmarks.bench_ela [--size 1024x768] [--repeat 20] [--large 4000x3000]
+"""
+
+import argparse
+import io
+import os
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image, ImageChops, ImageEnhance
+
+from src.preprocessing.ela import ela_batch, ela_image, ela_kernel, ela_transform, _ela_pair
+from src.serving.batch_predict import prepare_input
+
+
+def legacy_ela_transform(image: Image.Image, quality=90):
+    """The serving implementation before the in-memory rewrite."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        orig_path = os.path.join(tmpdir, "orig.jpg")
+        comp_path = os.path.join(tmpdir, "comp.jpg")
+
+        image.save(orig_path, "JPEG", quality=100)
+        image.save(comp_path, "JPEG", quality=quality)
+
+        original = Image.open(orig_path).convert("RGB")
+        compressed = Image.open(comp_path).convert("RGB")
+
+        ela = ImageChops.difference(original, compressed)
+
+        extrema = ela.getextrema()
+        max_diff = max([e[1] for e in extrema]) or 1
+
+        scale = 255.0 / max_diff
+        return ImageEnhance.Brightness(ela).enhance(scale)
+
+
+def legacy_generate_ela(original: Image.Image, quality=90):
+    """ELAProcessor._generate_ela before the rewrite, minus the final save."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        temp_path = os.path.join(tmpdir, "temp.jpg")
+        original.save(temp_path, "JPEG", quality=quality)
+        compressed = Image.open(temp_path)
+
+        ela = ImageChops.difference(original, compressed)
+
+        extrema = ela.getextrema()
+        max_diff = max([e[1] for e in extrema]) or 1
+
+        scale = 255.0 / max_diff
+        return ImageEnhance.Brightness(ela).enhance(scale)
+
+
+def legacy_ela_kernel(original: np.ndarray, compressed: np.ndarray) -> np.ndarray:
+    """The NumPy difference/rescale before ela_kernel (full-size int16/float32 temporaries)."""
+    diff = np.abs(original.astype(np.int16) - compressed.astype(np.int16)).astype(np.uint8)
+    max_diff = int(diff.max()) or 1
+    if max_diff == 255:
+        return diff
+    scaled = diff.astype(np.float32) * np.float32(255.0 / max_diff)
+    np.minimum(scaled, 255.0, out=scaled)
+    return scaled.astype(np.uint8)
+
+
+def legacy_prepare_input(image_bytes: bytes, quality: int = 90, size=(224, 224)) -> np.ndarray:
+    """prepare_input before ela_kernel."""
+    image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
+    original = np.asarray(_legacy_roundtrip(image, 100))
+    compressed = np.asarray(_legacy_roundtrip(image, quality))
+    ela = Image.fromarray(legacy_ela_kernel(original, compressed), "RGB")
+    return np.array(ela.resize(size)) / 255.0
+
+
+def _legacy_roundtrip(image: Image.Image, quality: int) -> Image.Image:
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=quality)
+    buffer.seek(0)
+    return Image.open(buffer).convert("RGB")
+
+
+def synthetic_image(width: int, height: int, seed: int = 0) -> Image.Image:
+    """Smooth gradients plus noise, so JPEG error levels look photo-like."""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width]
+    base = np.stack([
+        127 + 127 * np.sin(x / 37.0 + seed),
+        127 + 127 * np.cos(y / 23.0 - seed),
+        (x + y) % 256,
+    ], axis=-1)
+    noisy = base + rng.normal(0, 12, size=base.shape)
+    return Image.fromarray(np.clip(noisy, 0, 255).astype(np.uint8), "RGB")
+
+
+def _time(fn, image, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(image)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--size", default="1024x768")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--large", default="4000x3000",
+                        help="large-photo size for the kernel benchmark ('' to skip)")
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.size.split("x"))
+
+    cases = [
+        ("serving", legacy_ela_transform, ela_transform),
+        ("preprocessing", legacy_generate_ela, ela_image),
+    ]
+
+    for seed in range(5):
+        image = synthetic_image(width, height, seed)
+        for name, legacy, current in cases:
+            if legacy(image).tobytes() != current(image).tobytes():
+                raise SystemExit(f"[FAIL] {name} output differs (seed={seed})")
+    print("[OK] Outputs are byte-identical")
+
+    image = synthetic_image(width, height)
+    print(f"Image: {width}x{height}, repeat={args.repeat}")
+    for name, legacy, current in cases:
+        t_legacy = _time(legacy, image, args.repeat)
+        t_current = _time(current, image, args.repeat)
+        print(f"{name:>14}: temp-file {t_legacy * 1000:8.2f} ms | "
+              f"in-memory {t_current * 1000:8.2f} ms | "
+              f"speedup {t_legacy / t_current:.2f}x")
+
+    batch = [synthetic_image(width, height, seed) for seed in range(4)]
+    stacked = ela_batch(batch)
+    if any(stacked[i].tobytes() != ela_image(image).tobytes() for i, image in enumerate(batch)):
+        raise SystemExit("[FAIL] ela_batch output differs from ela_image")
+    t_single = _time(lambda images: [ela_image(image) for image in images], batch, args.repeat)
+    t_batch = _time(ela_batch, batch, args.repeat)
+    print(f"{'batch of 4':>14}: per-image {t_single * 1000:8.2f} ms | "
+          f"ela_batch {t_batch * 1000:8.2f} ms")
+
+    if args.large:
+        _bench_large(*(int(v) for v in args.large.split("x")), max(args.repeat // 4, 1))
+
+
+def _bench_large(width: int, height: int, repeat: int):
+    image = synthetic_image(width, height)
+    original, compressed = _ela_pair(image, 90, 100)
+    if legacy_ela_kernel(original, compressed).tobytes() != ela_kernel(original, compressed).tobytes():
+        raise SystemExit("[FAIL] ela_kernel output differs")
+
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=92)
+    data = buffer.getvalue()
+    if not np.array_equal(legacy_prepare_input(data), prepare_input(data)):
+        raise SystemExit("[FAIL] prepare_input output differs")
+
+    out = np.empty_like(original)
+    print(f"Large image: {width}x{height} ({width * height / 1e6:.1f} MP), repeat={repeat}")
+    cases = [
+        ("kernel", lambda _: legacy_ela_kernel(original, compressed),
+         lambda _: ela_kernel(original, compressed, out=out)),
+        ("prepare_input", legacy_prepare_input, prepare_input),
+    ]
+    for name, legacy, current in cases:
+        t_legacy = _time(legacy, data, repeat)
+        t_current = _time(current, data, repeat)
+        print(f"{name:>14}: previous {t_legacy * 1000:8.2f} ms | "
+              f"current {t_current * 1000:8.2f} ms | "
+              f"saved {(t_legacy - t_current) * 1000:.1f} ms/image")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark: ELAProcessor.process throughput (images/sec) vs worker count.
+
+Builds a synthetic two-class dataset in a temp dir, runs the processor
+once per worker count and checks every run reports the same result.
+
+Usage:
+    python -m benchmarks.bench_ela_processor [--images 200] [--workers 1,2,4]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from src.preprocessing.ela_processor import ELAProcessor
+from benchmarks.bench_ela import synthetic_image
+
+
+def build_dataset(root: Path, images: int, size=(640, 480)):
+    for i in range(images):
+        class_dir = root / ("forged" if i % 2 else "original")
+        class_dir.mkdir(parents=True, exist_ok=True)
+        synthetic_image(*size, seed=i).save(class_dir / f"img_{i:05d}.jpg", "JPEG", quality=95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--images", type=int, default=200)
+    parser.add_argument("--size", default="640x480")
+    parser.add_argument("--workers", default=None,
+                        help="comma-separated worker counts (default: 1,2,4..cpu_count)")
+    parser.add_argument("--chunksize", type=int, default=32)
+    args = parser.parse_args()
+
+    if args.workers:
+        worker_counts = [int(w) for w in args.workers.split(",")]
+    else:
+        cpus = os.cpu_count() or 1
+        worker_counts = sorted({1, *[2 ** i for i in range(1, cpus.bit_length()) if 2 ** i <= cpus], cpus})
+
+    size = tuple(int(v) for v in args.size.split("x"))
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        input_dir = Path(tmpdir) / "clean"
+        build_dataset(input_dir, args.images, size)
+
+        reference = None
+        print(f"Images: {args.images} @ {size[0]}x{size[1]}")
+        for workers in worker_counts:
+            output_dir = Path(tmpdir) / f"ela_{workers}"
+            processor = ELAProcessor(input_dir, output_dir, workers=workers, chunksize=args.chunksize)
+
+            start = time.perf_counter()
+            processor.process()
+            elapsed = time.perf_counter() - start
+
+            outputs = sorted(p.relative_to(output_dir) for p in output_dir.rglob("*.jpg"))
+            result = (outputs, processor.errors)
+            if reference is None:
+                reference = result
+            elif result != reference:
+                raise SystemExit(f"[FAIL] workers={workers} produced a different result")
+
+            print(f"workers={workers:>3}: {args.images / elapsed:8.1f} images/sec ({elapsed:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmark: ImageCleaner + ELAProcessor vs FusedPreprocessor (images/sec).
+
+Builds a synthetic two-class raw dataset in a temp dir, runs both paths
+single-process with incremental manifests off, and checks the ELA and
+cleaned outputs are byte-identical.
+
+Usage:
+    python -m benchmarks.bench_fused_preprocessor [--images 200] [--size 640x480]
+"""
+
+import argparse
+import filecmp
+import tempfile
+import time
+from pathlib import Path
+
+from src.preprocessing.image_cleaner import ImageCleaner
+from src.preprocessing.ela_processor import ELAProcessor
+from src.preprocessing.fused_preprocessor import FusedPreprocessor
+from benchmarks.bench_ela_processor import build_dataset
+
+
+def _same_tree(a: Path, b: Path) -> bool:
+    files_a = sorted(p.relative_to(a) for p in a.rglob("*.jpg"))
+    files_b = sorted(p.relative_to(b) for p in b.rglob("*.jpg"))
+    return files_a == files_b and all(filecmp.cmp(a / f, b / f, shallow=False) for f in files_a)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--images", type=int, default=200)
+    parser.add_argument("--size", default="640x480")
+    args = parser.parse_args()
+
+    size = tuple(int(v) for v in args.size.split("x"))
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        build_dataset(root / "raw", args.images, size)
+        print(f"Images: {args.images} @ {size[0]}x{size[1]}")
+
+        start = time.perf_counter()
+        ImageCleaner(root / "raw", root / "clean_2stage", incremental=False).clean()
+        ELAProcessor(root / "clean_2stage", root / "ela_2stage", incremental=False).process()
+        two_stage = time.perf_counter() - start
+
+        start = time.perf_counter()
+        FusedPreprocessor(root / "raw", root / "ela_fused", root / "clean_fused", incremental=False).process()
+        fused = time.perf_counter() - start
+
+        start = time.perf_counter()
+        FusedPreprocessor(root / "raw", root / "ela_fused_noclean", incremental=False).process()
+        fused_no_clean = time.perf_counter() - start
+
+        if not (_same_tree(root / "ela_2stage", root / "ela_fused")
+                and _same_tree(root / "clean_2stage", root / "clean_fused")
+                and _same_tree(root / "ela_2stage", root / "ela_fused_noclean")):
+            raise SystemExit("[FAIL] fused outputs differ from the two-stage path")
+
+        print(f"two-stage:         {args.images / two_stage:8.1f} images/sec ({two_stage:.2f}s)")
+        print(f"fused:             {args.images / fused:8.1f} images/sec ({fused:.2f}s)")
+        print(f"fused (no clean):  {args.images / fused_no_clean:8.1f} images/sec ({fused_no_clean:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
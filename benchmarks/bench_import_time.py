@@ -0,0 +1,109 @@
+"""
+Import-time regression check for the modules that must stay lightweight.
+
+Each module is imported in a fresh interpreter under `python -X importtime`.
+The check fails (exit code 1) if a module pulls in a heavy framework
+(TensorFlow, Keras, scikit-learn, MLflow, huggingface_hub) at import time,
+or if its cumulative import time exceeds --budget-ms. Heavy frameworks
+belong inside the functions that need them.
+
+Usage:
+    python -m benchmarks.bench_import_time [--budget-ms 1500] [--repeat 3] [module ...]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+HEAVY_PACKAGES = ("tensorflow", "keras", "sklearn", "mlflow", "huggingface_hub")
+
+LIGHT_MODULES = (
+    "src.data_ingestion.data_ingestor",
+    "src.preprocessing.ela",
+    "src.preprocessing.ela_processor",
+    "src.preprocessing.image_cleaner",
+    "src.preprocessing.fused_preprocessor",
+    "src.preprocessing.ela_shards",
+    "src.profiling.profiler",
+    "src.training.feature_cache",
+    "src.training.training_config",
+    "src.inference.predictor",
+    "src.evaluation.evaluator",
+    "src.deployment.quantizer",
+    "src.deployment.registry",
+    "src.deployment.cloud_deployer",
+    "src.serving.batch_predict",
+    "src.serving.preprocess_pool",
+    "src.serving.lifecycle",
+    "src.sweep.leaderboard",
+    "src.sweep.sweep_runner",
+    "steps.ingest_data_step",
+    "steps.clean_images_step",
+    "steps.ela_step",
+    "steps.fused_preprocess_step",
+    "steps.shard_step",
+    "steps.train_step",
+    "steps.evaluate_model_step",
+    "steps.prepare_test_data",
+    "steps.deploy_model_step",
+    "steps.sweep_step",
+    "pipelines.ingestion_pipeline",
+    "pipelines.train_eval_deploy_pipeline",
+    "pipelines.sweep_pipeline",
+)
+
+
+def import_profile(module: str):
+    """(cumulative import time in ms, names of all modules imported) for one fresh import."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr.strip().splitlines()[-1]}")
+
+    cumulative, imported = None, set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative_us, name = (field.strip() for field in line[len("import time:"):].split("|"))
+        imported.add(name.strip())
+        if name.strip() == module:
+            cumulative = int(cumulative_us) / 1000
+    return cumulative, imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("modules", nargs="*", default=LIGHT_MODULES)
+    parser.add_argument("--budget-ms", type=float, default=1500,
+                        help="max cumulative import time per module (median of --repeat)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    failures = []
+    print(f"{'module':<40}{'import ms':>10}  heavy packages")
+    for module in args.modules:
+        try:
+            runs = [import_profile(module) for _ in range(args.repeat)]
+        except RuntimeError as e:
+            failures.append(module)
+            print(f"{module:<40}{'-':>10}  [FAIL] {e}")
+            continue
+
+        ms = statistics.median(cumulative for cumulative, _ in runs)
+        heavy = sorted(p for p in HEAVY_PACKAGES if p in runs[0][1])
+        status = ""
+        if heavy or ms > args.budget_ms:
+            failures.append(module)
+            status = "  [FAIL]" + (" over budget" if ms > args.budget_ms else "")
+        print(f"{module:<40}{ms:>10.1f}  {', '.join(heavy) or '-'}{status}")
+
+    if failures:
+        print(f"\n[FAIL] {len(failures)} module(s) regressed: {', '.join(failures)}")
+        sys.exit(1)
+    print(f"\n[OK] {len(args.modules)} modules import without heavy frameworks, "
+          f"each under {args.budget_ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
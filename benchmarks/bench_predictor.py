@@ -0,0 +1,57 @@
+"""
+Benchmark: per-call latency of Keras model.predict vs calling a compiled
+serving signature directly (traced in-process and loaded from SavedModel).
+
+Usage:
+    python -m benchmarks.bench_predictor [--calls 50] [--batch 1]
+"""
+
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from serving.hf_space.app import build_model
+from src.inference.predictor import Predictor, export_saved_model
+
+
+def _per_call_ms(fn, x, calls):
+    fn(x)  # warm up / trace
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn(x)
+    return (time.perf_counter() - start) / calls * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--calls", type=int, default=50)
+    parser.add_argument("--batch", type=int, default=1)
+    args = parser.parse_args()
+
+    model = build_model()
+    x = np.random.default_rng(0).random((args.batch, 224, 224, 3), dtype=np.float32)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        export_saved_model(model, tmpdir)
+        candidates = [
+            ("model.predict", lambda batch: model.predict(batch, verbose=0)),
+            ("predict_on_batch", model.predict_on_batch),
+            ("traced signature", Predictor.from_keras(model)),
+            ("SavedModel signature", Predictor.from_saved_model(tmpdir)),
+        ]
+
+        reference = model.predict(x, verbose=0)
+        baseline = None
+        print(f"batch={args.batch}, calls={args.calls}")
+        for name, fn in candidates:
+            if not np.allclose(fn(x), reference, atol=1e-5):
+                raise SystemExit(f"[FAIL] {name} output differs from model.predict")
+            ms = _per_call_ms(fn, x, args.calls)
+            baseline = baseline or ms
+            print(f"{name:>22}: {ms:8.2f} ms/call ({baseline / ms:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
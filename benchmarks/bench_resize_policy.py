@@ -0,0 +1,66 @@
+"""
+Benchmark: pre-ELA resize policies for serving (accuracy vs cost).
+
+Runs Evaluator.evaluate_uploads once per ResizePolicy on a folder of raw
+test images (one sub-folder per class) and reports accuracy/F1, the F1
+change against full resolution, preprocessing time per image and the ELA
+working set (four uint8 RGB buffers of the ELA resolution: upload, q=100
+reference, q=90 copy, output).
+
+Without --data a synthetic set of large photos is generated; its labels
+are arbitrary, so only the cost columns are meaningful there. Pick a
+policy with real held-out data.
+
+Usage:
+    python -m benchmarks.bench_resize_policy --model models/production_model.keras \
+        [--data data/test_raw] [--max-sides 0,4096,2048,1024] [--draft]
+"""
+
+import argparse
+import tempfile
+from pathlib import Path
+
+from src.evaluation.evaluator import Evaluator
+from src.serving.batch_predict import ResizePolicy
+from benchmarks.bench_ela_processor import build_dataset
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--model", required=True, help=".keras, SavedModel dir or .tflite")
+    parser.add_argument("--data", default=None, help="raw test images, one sub-folder per class")
+    parser.add_argument("--max-sides", default="0,4096,2048,1024",
+                        help="comma-separated ELA_MAX_SIDE values (0 = full resolution)")
+    parser.add_argument("--draft", action="store_true", help="also run each policy with JPEG draft decoding")
+    parser.add_argument("--images", type=int, default=8, help="synthetic images when --data is not given")
+    parser.add_argument("--size", default="6000x4000", help="synthetic image size")
+    args = parser.parse_args()
+
+    policies = []
+    for max_side in (int(v) for v in args.max_sides.split(",")):
+        policies.append(ResizePolicy(max_side))
+        if args.draft and max_side:
+            policies.append(ResizePolicy(max_side, draft=True))
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        data_dir = Path(args.data) if args.data else Path(tmpdir) / "raw"
+        if args.data is None:
+            build_dataset(data_dir, args.images, tuple(int(v) for v in args.size.split("x")))
+            print("[WARN] synthetic data: accuracy/F1 columns are not meaningful")
+
+        evaluator = Evaluator()
+        baseline_f1 = None
+        print(f"{'policy':>24} | {'acc':>6} | {'f1':>6} | {'d_f1':>7} | {'ms/img':>8} | "
+              f"{'mean MP':>7} | {'peak MB':>7}")
+        for policy in policies:
+            m = evaluator.evaluate_uploads(args.model, data_dir, policy)
+            if baseline_f1 is None:
+                baseline_f1 = m["f1"]
+            peak_mb = m["max_megapixels"] * 1e6 * 3 * 4 / 1024 / 1024
+            print(f"{str(policy):>24} | {m['accuracy']:6.3f} | {m['f1']:6.3f} | "
+                  f"{m['f1'] - baseline_f1:+7.3f} | {m['preprocess_ms']:8.1f} | "
+                  f"{m['mean_megapixels']:7.2f} | {peak_mb:7.1f}")
+
+
+if __name__ == "__main__":
+    main()
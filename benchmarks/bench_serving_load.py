@@ -0,0 +1,73 @@
+"""
+Load-generator benchmark: batch-of-one model.predict vs the micro-batching
+inference engine, under concurrent async clients.
+
+"before" reproduces the old handler (synchronous model.predict on the
+event loop); "after" awaits BatchingInferenceEngine.predict. Reports
+p50/p99 latency and requests/sec for each.
+
+Usage:
+    python -m benchmarks.bench_serving_load [--clients 32] [--requests 256]
+"""
+
+import argparse
+import asyncio
+import time
+
+import numpy as np
+
+from serving.hf_space.app import build_model
+from src.serving.inference_engine import BatchingInferenceEngine
+
+
+async def _load(handler, clients: int, total: int, arr: np.ndarray):
+    latencies = []
+    remaining = iter(range(total))
+
+    async def client():
+        for _ in remaining:
+            start = time.perf_counter()
+            await handler(arr)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+    return np.array(latencies), elapsed
+
+
+def _report(name, latencies, elapsed):
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+    print(f"{name:>7}: p50 {p50:8.1f} ms | p99 {p99:8.1f} ms | {len(latencies) / elapsed:7.1f} req/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=256)
+    parser.add_argument("--max-batch-size", type=int, default=16)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    model = build_model()
+    arr = np.random.default_rng(0).random((224, 224, 3), dtype=np.float32)
+    model.predict_on_batch(arr[None])  # warm up
+
+    async def before(x):
+        return model.predict(np.expand_dims(x, axis=0), verbose=0)[0]
+
+    engine = BatchingInferenceEngine(
+        model.predict_on_batch,
+        max_batch_size=args.max_batch_size,
+        max_wait_ms=args.max_wait_ms
+    ).start()
+
+    print(f"clients={args.clients}, requests={args.requests}")
+    _report("before", *asyncio.run(_load(before, args.clients, args.requests, arr)))
+    _report("after", *asyncio.run(_load(engine.predict, args.clients, args.requests, arr)))
+    print(f"mean batch size: {engine.requests / max(engine.batches, 1):.1f}")
+    engine.stop()
+
+
+if __name__ == "__main__":
+    main()
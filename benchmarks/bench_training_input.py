@@ -0,0 +1,57 @@
+"""
+Benchmark: training input pipeline throughput (steps/sec per epoch), the
+legacy ModelTrainer loader vs the fast mode with and without a cache.
+
+Only the input pipeline is iterated (no model), so the numbers isolate
+decode / normalise / batching cost.
+
+Usage:
+    python -m benchmarks.bench_training_input [--images 256] [--epochs 3]
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from src.training.model_trainer import ModelTrainer
+from benchmarks.bench_ela_processor import build_dataset
+
+
+def _epoch_rates(dataset, epochs):
+    rates = []
+    for _ in range(epochs):
+        start = time.perf_counter()
+        steps = sum(1 for _ in dataset)
+        rates.append(steps / (time.perf_counter() - start))
+    return rates
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--images", type=int, default=256)
+    parser.add_argument("--epochs", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=16)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        data_dir = Path(tmpdir) / "ela"
+        build_dataset(data_dir, args.images, size=(320, 240))
+
+        configs = [
+            ("legacy", dict(input_mode="legacy")),
+            ("fast", dict(input_mode="fast")),
+            ("fast+memory", dict(input_mode="fast", cache="memory")),
+            ("fast+disk", dict(input_mode="fast", cache=str(Path(tmpdir) / "cache"))),
+        ]
+
+        print(f"images={args.images}, batch_size={args.batch_size}")
+        for name, kwargs in configs:
+            trainer = ModelTrainer(Path("unused.keras"), batch_size=args.batch_size, **kwargs)
+            train, _ = trainer.load_datasets(data_dir)
+            rates = _epoch_rates(train, args.epochs)
+            print(f"{name:>12}: " + " | ".join(f"epoch {i + 1}: {r:7.1f} steps/s" for i, r in enumerate(rates)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+"""
+End-to-end benchmark suite: preprocessing, training input, evaluation and
+serving on a seeded synthetic dataset (see benchmarks/synthetic.py).
+
+Reports, as one JSON document:
+    clean / ela / fused      images/sec of ImageCleaner, ELAProcessor and
+                             FusedPreprocessor (median of --repeat runs)
+    training_input           steps/sec of the ModelTrainer input pipeline,
+                             first epoch and steady state, legacy and fast
+    evaluation               Evaluator.evaluate_streaming wall time
+    predict                  /predict latency of the in-process API app,
+                             sequential and with --clients concurrent clients
+
+Evaluation and serving use a tiny Keras model with the production input
+shape, so they time the pipeline around the model, not the network itself.
+Keys ending in _per_sec are better when higher, _ms/_seconds when lower;
+--baseline prints the change per key and flags those that got worse by
+more than --tolerance.
+
+Usage:
+    python -m benchmarks.suite [--images 64] [--output results.json]
+    python -m benchmarks.suite --save-baseline benchmarks/baseline.json
+    python -m benchmarks.suite --baseline benchmarks/baseline.json [--fail-on-regression]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.synthetic import build_labelled_dataset
+
+
+def _median_rate(run, items: int, repeat: int) -> float:
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        seconds.append(time.perf_counter() - start)
+    return items / statistics.median(seconds)
+
+
+def bench_preprocessing(raw_dir: Path, work: Path, images: int, workers: int, repeat: int) -> dict:
+    from src.preprocessing.ela_processor import ELAProcessor
+    from src.preprocessing.fused_preprocessor import FusedPreprocessor
+    from src.preprocessing.image_cleaner import ImageCleaner
+
+    clean_dir, ela_dir = work / "clean", work / "ela"
+
+    def fresh(*dirs):
+        for d in dirs:
+            shutil.rmtree(d, ignore_errors=True)
+
+    def clean():
+        fresh(clean_dir)
+        ImageCleaner(raw_dir, clean_dir, incremental=False).clean()
+
+    def ela():
+        fresh(ela_dir)
+        ELAProcessor(clean_dir, ela_dir, workers=workers, incremental=False).process()
+
+    def fused():
+        fresh(work / "fused_clean", work / "fused_ela")
+        FusedPreprocessor(raw_dir, work / "fused_ela", work / "fused_clean",
+                          workers=workers, incremental=False).process()
+
+    results = {"clean.images_per_sec": _median_rate(clean, images, repeat)}
+    # ELA runs last on each pass so clean_dir/ela_dir are left for the later stages
+    results["fused.images_per_sec"] = _median_rate(fused, images, repeat)
+    results["ela.images_per_sec"] = _median_rate(ela, images, repeat)
+    return results
+
+
+def bench_training_input(ela_dir: Path, batch_size: int, epochs: int) -> dict:
+    from src.training.model_trainer import ModelTrainer
+
+    results = {}
+    for mode, kwargs in (("legacy", dict(input_mode="legacy")),
+                         ("fast", dict(input_mode="fast", cache="memory"))):
+        trainer = ModelTrainer(Path("unused.keras"), batch_size=batch_size, **kwargs)
+        train, _ = trainer.load_datasets(ela_dir)
+        rates = []
+        for _ in range(epochs):
+            start = time.perf_counter()
+            steps = sum(1 for _ in train)
+            rates.append(steps / (time.perf_counter() - start))
+        results[f"training_input.{mode}.first_epoch_steps_per_sec"] = rates[0]
+        results[f"training_input.{mode}.steady_steps_per_sec"] = statistics.median(rates[1:] or rates)
+    return results
+
+
+def build_tiny_model(path: Path) -> Path:
+    """A few-layer stand-in with the production model's input and output shape."""
+    import tensorflow as tf
+
+    model = tf.keras.Sequential([
+        tf.keras.Input((224, 224, 3)),
+        tf.keras.layers.Conv2D(8, 3, strides=4, activation="relu"),
+        tf.keras.layers.GlobalAveragePooling2D(),
+        tf.keras.layers.Dense(1, activation="sigmoid")
+    ])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    model.save(path)
+    return path
+
+
+def bench_evaluation(model_path: Path, ela_dir: Path, repeat: int) -> dict:
+    from src.evaluation.evaluator import Evaluator
+
+    evaluator = Evaluator()
+    evaluator.evaluate_streaming(model_path, ela_dir)  # load + trace once
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        evaluator.evaluate_streaming(model_path, ela_dir)
+        seconds.append(time.perf_counter() - start)
+    return {"evaluation.streaming_seconds": statistics.median(seconds)}
+
+
+async def _predict_latencies(client, uploads, clients: int):
+    latencies, failures = [], 0
+    remaining = iter(uploads)
+
+    async def worker():
+        nonlocal failures
+        for data in remaining:
+            start = time.perf_counter()
+            response = await client.post("/predict", files={"file": ("image.jpg", data, "image/jpeg")})
+            latencies.append(time.perf_counter() - start)
+            failures += response.status_code != 200
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(clients)))
+    return np.array(latencies) * 1000, time.perf_counter() - start, failures
+
+
+async def _bench_predict(main, image_bytes: bytes, requests: int, clients: int) -> dict:
+    import httpx
+
+    # Unique trailing bytes per upload defeat the result cache; decoders ignore them
+    def uploads(tag):
+        return [image_bytes + f"{tag}-{i}".encode() for i in range(requests)]
+
+    async with main.lifespan(main.app):
+        while main.engine is None and main.startup.error is None:
+            await asyncio.sleep(0.05)
+        if main.engine is None:
+            raise RuntimeError(f"Serving app failed to start: {main.startup.error}")
+
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://suite") as client:
+            await _predict_latencies(client, uploads("warmup")[:4], 1)
+            single, _, single_failures = await _predict_latencies(client, uploads("single"), 1)
+            concurrent, elapsed, concurrent_failures = await _predict_latencies(client, uploads("concurrent"), clients)
+
+    return {
+        "predict.single.p50_ms": float(np.percentile(single, 50)),
+        "predict.single.p99_ms": float(np.percentile(single, 99)),
+        "predict.concurrent.p50_ms": float(np.percentile(concurrent, 50)),
+        "predict.concurrent.p99_ms": float(np.percentile(concurrent, 99)),
+        "predict.concurrent.requests_per_sec": requests / elapsed,
+        "predict.failures": single_failures + concurrent_failures
+    }
+
+
+def bench_serving(model_path: Path, image_bytes: bytes, requests: int, clients: int) -> dict:
+    # Configure the app before its module-level setup reads the environment
+    os.environ["MODEL_BACKEND"] = "keras"
+    os.environ.setdefault("PREPROCESS_MAX_PENDING", str(max(clients * 2, 8)))
+    from serving.api import main
+
+    main.MODEL_PATH = model_path
+    return asyncio.run(_bench_predict(main, image_bytes, requests, clients))
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _direction(key: str) -> int:
+    """+1 if higher is better, -1 if lower is better, 0 if not compared."""
+    if key.endswith("_per_sec"):
+        return 1
+    if key.endswith("_ms") or key.endswith("_seconds"):
+        return -1
+    return 0
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Print the change of each key vs the baseline; return keys that regressed."""
+    regressions = []
+    print(f"\n{'metric':<52}{'baseline':>12}{'current':>12}{'change':>10}")
+    for key, value in results.items():
+        direction = _direction(key)
+        previous = baseline.get(key)
+        if not direction or not previous:
+            continue
+        change = (value - previous) / previous
+        worse = -change * direction > tolerance
+        if worse:
+            regressions.append(key)
+        print(f"{key:<52}{previous:>12.2f}{value:>12.2f}{change:>+9.1%}{'  <-- worse' if worse else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--images", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--epochs", type=int, default=3)
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--skip", default="", help="comma-separated: preprocessing,training,evaluation,serving")
+    parser.add_argument("--output", help="write the JSON report here (default: stdout)")
+    parser.add_argument("--baseline", help="JSON report to compare against")
+    parser.add_argument("--save-baseline", help="also write the report here as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="relative change counted as a regression (default 0.10)")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+    skip = set(filter(None, args.skip.split(",")))
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        work = Path(tmpdir)
+        raw_dir = work / "raw"
+        print(f"[SUITE] Generating {args.images} synthetic images (seed={args.seed})", file=sys.stderr)
+        dataset = build_labelled_dataset(raw_dir, args.images, seed=args.seed)
+
+        # Later stages need the clean/ELA output, so preprocessing always runs once
+        stages = bench_preprocessing(raw_dir, work, args.images, args.workers,
+                                     1 if "preprocessing" in skip else args.repeat)
+        if "preprocessing" not in skip:
+            results.update(stages)
+
+        if "training" not in skip:
+            print("[SUITE] Training input pipeline", file=sys.stderr)
+            results.update(bench_training_input(work / "ela", args.batch_size, args.epochs))
+
+        model_path = None
+        if not {"evaluation", "serving"} <= skip:
+            model_path = build_tiny_model(work / "models" / "production_model.keras")
+
+        if "evaluation" not in skip:
+            print("[SUITE] Evaluation", file=sys.stderr)
+            results.update(bench_evaluation(model_path, work / "ela", args.repeat))
+
+        if "serving" not in skip:
+            print(f"[SUITE] /predict: {args.requests} requests, {args.clients} clients", file=sys.stderr)
+            sample = next(p for p in sorted((raw_dir / "original").glob("*.jpg")) if "corrupt" not in p.name)
+            results.update(bench_serving(model_path, sample.read_bytes(), args.requests, args.clients))
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "dataset": dataset,
+            "config": {k: v for k, v in vars(args).items()
+                       if k not in ("output", "baseline", "save_baseline", "fail_on_regression")}
+        },
+        "results": {key: round(value, 3) for key, value in results.items()}
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text)
+        print(f"[SUITE] Report written to {args.output}", file=sys.stderr)
+    else:
+        print(text)
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(text)
+        print(f"[SUITE] Baseline saved to {args.save_baseline}", file=sys.stderr)
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        if baseline["meta"]["config"] != report["meta"]["config"]:
+            print("[WARN] Baseline was recorded with a different configuration", file=sys.stderr)
+        regressions = compare(report["results"], baseline["results"], args.tolerance)
+        print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}")
+        if regressions and args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Seeded synthetic labelled image dataset for the benchmark suite.
+
+Two classes laid out like the real raw dataset:
+    original/  photo-like images (gradients + noise) saved once
+    forged/    the same kind of image with a rectangle spliced in from a
+               donor image that was JPEG-compressed at a different quality,
+               then saved again, so ELA has something to find
+
+Sizes and formats rotate (JPEG at several qualities, PNG, RGBA PNG,
+greyscale JPEG) and a few corrupt files are added for the cleaner to
+reject. The same arguments always produce the same bytes.
+"""
+
+import io
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from benchmarks.bench_ela import synthetic_image
+
+SIZES = ((640, 480), (1024, 768), (480, 640), (1600, 1200))
+FORMATS = ("jpeg95", "jpeg85", "png", "rgba_png", "grey_jpeg")
+
+
+def _splice(image: Image.Image, seed: int) -> Image.Image:
+    rng = np.random.default_rng(seed)
+    width, height = image.size
+    donor = synthetic_image(width, height, seed + 10_000)
+    buffer = io.BytesIO()
+    donor.save(buffer, "JPEG", quality=int(rng.integers(50, 75)))
+    donor = Image.open(buffer).convert("RGB")
+
+    w, h = width // 3, height // 3
+    x, y = int(rng.integers(0, width - w)), int(rng.integers(0, height - h))
+    forged = image.copy()
+    forged.paste(donor.crop((x, y, x + w, y + h)), (int(rng.integers(0, width - w)), int(rng.integers(0, height - h))))
+    return forged
+
+
+def _save(image: Image.Image, path: Path, fmt: str) -> Path:
+    if fmt.startswith("jpeg"):
+        path = path.with_suffix(".jpg")
+        image.save(path, "JPEG", quality=int(fmt[4:]))
+    elif fmt == "png":
+        path = path.with_suffix(".png")
+        image.save(path, "PNG")
+    elif fmt == "rgba_png":
+        path = path.with_suffix(".png")
+        rgba = image.convert("RGBA")
+        rgba.putalpha(200)
+        rgba.save(path, "PNG")
+    else:
+        path = path.with_suffix(".jpg")
+        image.convert("L").save(path, "JPEG", quality=90)
+    return path
+
+
+def build_labelled_dataset(root: Path, images: int = 64, seed: int = 0, sizes=SIZES, corrupt: int = 2) -> dict:
+    """
+    Write `images` images split evenly between original/ and forged/, plus
+    `corrupt` unreadable files, under `root`. Returns counts and bytes.
+    """
+    root = Path(root)
+    total_bytes = 0
+    for i in range(images):
+        label = "forged" if i % 2 else "original"
+        class_dir = root / label
+        class_dir.mkdir(parents=True, exist_ok=True)
+
+        width, height = sizes[(i // 2) % len(sizes)]
+        image = synthetic_image(width, height, seed + i)
+        if label == "forged":
+            image = _splice(image, seed + i)
+        path = _save(image, class_dir / f"img_{i:05d}", FORMATS[(i // 2) % len(FORMATS)])
+        total_bytes += path.stat().st_size
+
+    for i in range(corrupt):
+        path = root / ("forged" if i % 2 else "original") / f"corrupt_{i:03d}.jpg"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"\xff\xd8\xff\xe0 not really a jpeg")
+
+    return {"images": images, "corrupt": corrupt, "bytes": total_bytes}
@@ -2,10 +2,18 @@ from zenml import pipeline
 from steps.ingest_data_step import ingest_data
 from steps.clean_images_step import clean_images
 from steps.ela_step import generate_ela
+from steps.fused_preprocess_step import clean_and_generate_ela
+from steps.shard_step import pack_ela_shards
 
 
 @pipeline
-def ingestion_pipeline(zip_path: str, extract_path: str, dataset_root: str, clean_path: str, ela_path: str):
-    raw_data = ingest_data(zip_path, extract_path)
-    clean_data = clean_images(raw_data, dataset_root, clean_path)
-    generate_ela(clean_data, ela_path)
+def ingestion_pipeline(zip_path: str, extract_path: str, dataset_root: str, clean_path: str, ela_path: str,
+                       ela_workers: int = 1, shard_path: str = None, streaming: bool = False, fused: bool = False):
+    raw_data = ingest_data(zip_path, extract_path, streaming)
+    if fused:
+        ela_data = clean_and_generate_ela(raw_data, dataset_root, ela_path, clean_path, ela_workers)
+    else:
+        clean_data = clean_images(raw_data, dataset_root, clean_path)
+        ela_data = generate_ela(clean_data, ela_path, ela_workers)
+    if shard_path:
+        pack_ela_shards(ela_data, shard_path, workers=ela_workers)
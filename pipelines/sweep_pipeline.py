@@ -0,0 +1,12 @@
+from zenml import pipeline
+from steps.sweep_step import run_sweep
+from steps.deploy_model_step import deploy_best_from_leaderboard
+
+@pipeline
+def sweep_pipeline(clean_data_path, test_clean_path, base_model_path, space: dict = None,
+                   search: str = "grid", n_trials: int = 8, workers: int = 0, epochs: int = 4,
+                   sweep_dir: str = "sweeps/default"):
+    leaderboard_path = run_sweep(clean_data_path, test_clean_path, base_model_path, space=space,
+                                 search=search, n_trials=n_trials, workers=workers, epochs=epochs,
+                                 sweep_dir=sweep_dir)
+    deploy_best_from_leaderboard(leaderboard_path)
@@ -6,5 +6,7 @@ if __name__ == "__main__":
         extract_path="data2_extracted",
         dataset_root="data2",
         clean_path="clean_data",
-        ela_path="ela_data_v1"
+        ela_path="ela_data_v1",
+        ela_workers=0,  # one ELA worker per CPU core
+        streaming=True  # clean straight from the zip, no extraction
     )
@@ -0,0 +1,17 @@
+from pipelines.sweep_pipeline import sweep_pipeline
+
+if __name__ == "__main__":
+    sweep_pipeline(
+        clean_data_path="clean_data",
+        test_clean_path="test_clean",
+        base_model_path="forgery_ela_mobilenet_finetuned.keras",
+        space={
+            "ela_quality": [85, 90, 95],
+            "lr": [5e-6, 1e-5, 3e-5],
+            "trainable_layers": [20, 30, 50],
+        },
+        search="random",
+        n_trials=8,
+        workers=0,  # one trial per core; cores are split between trials
+        sweep_dir="sweeps/ela_lr_layers"
+    )
@@ -1,68 +1,180 @@
-from fastapi import FastAPI, UploadFile, File
+"""
+Forgery detection REST API.
+
+Launch (from serving/api), one model per worker process:
+
+    WEB_CONCURRENCY=4 uvicorn main:app --host 0.0.0.0 --port 8000
+
+uvicorn forks WEB_CONCURRENCY worker processes; each loads and warms up
+its own model and event loop. Per process, decode/ELA runs in a bounded
+PreprocessPool and inference in the BatchingInferenceEngine thread, so
+the event loop only does I/O. CPU cores are split between the workers:
+the pool and TensorFlow each default to cpu_count // WEB_CONCURRENCY
+threads (override with PREPROCESS_WORKERS / TF_NUM_THREADS). Pick
+WEB_CONCURRENCY from the memory budget (each worker holds a full model
+and TF runtime); set RESULT_CACHE_DIR so the workers share cached results.
+When a worker's queue holds PREPROCESS_MAX_PENDING requests (default
+4 per pool thread), /predict answers 429 with Retry-After.
+"""
+
+import time
+_IMPORT_START = time.perf_counter()
+
+from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from contextlib import asynccontextmanager
 import tensorflow as tf
 from pathlib import Path
-from PIL import Image, ImageChops, ImageEnhance
-import numpy as np
-import io
-import tempfile
-
-app = FastAPI(title="Forgery Detection API")
+from typing import List
+import asyncio
+import os
+import sys
+import traceback
+
+# Make the repo's shared `src` package importable when run from serving/api
+ROOT_DIR = Path(__file__).resolve().parents[2]
+if (ROOT_DIR / "src").is_dir() and str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from src.serving.batch_predict import ResizePolicy, predict_cached, expand_uploads, predict_stream
+from src.serving.inference_engine import BatchingInferenceEngine
+from src.serving.preprocess_pool import Overloaded, PreprocessPool, cores_per_worker
+from src.serving.lifecycle import StartupReport, limit_tf_threads, warm_up
+from src.serving.metrics import RequestTrace, ServingMetrics, trace_outcome
+from src.inference.predictor import Predictor, load_predictor, resolve_model_artifact
+from src.serving.result_cache import ResultCache, file_digest
+
+startup = StartupReport()
+startup.record("imports", time.perf_counter() - _IMPORT_START)
 
 MODEL_PATH = Path("../../models/production_model.keras")
+# auto | savedmodel | keras | tflite-float16 | tflite-dynamic | tflite-int8
+MODEL_BACKEND = os.environ.get("MODEL_BACKEND", "auto")
+MAX_BATCH_SIZE = int(os.environ.get("MAX_BATCH_SIZE", 16))
+MAX_BATCH_WAIT_MS = float(os.environ.get("MAX_BATCH_WAIT_MS", 5))
+# Pre-ELA downscale of large uploads (ELA_MAX_SIDE, ELA_DRAFT)
+RESIZE_POLICY = ResizePolicy.from_env()
+# Decode/ELA pool with admission control (PREPROCESS_WORKERS,
+# PREPROCESS_MAX_PENDING, PREPROCESS_PROCESSES); full queue -> 429
+preprocess_pool = PreprocessPool.from_env()
+RETRY_AFTER_SECONDS = os.environ.get("RETRY_AFTER_SECONDS", "1")
+# Each uvicorn worker holds its own model; TF gets this process's core share
+limit_tf_threads(int(os.environ.get("TF_NUM_THREADS", 0)) or cores_per_worker())
+
+# Result cache; set RESULT_CACHE_DIR to share results between workers
+# (bounded to RESULT_CACHE_DISK_SIZE files, default RESULT_CACHE_SIZE)
+result_cache = ResultCache(
+    max_entries=int(os.environ.get("RESULT_CACHE_SIZE", 1024)),
+    ttl_seconds=float(os.environ.get("RESULT_CACHE_TTL", 3600)),
+    disk_dir=os.environ.get("RESULT_CACHE_DIR"),
+    disk_max_entries=int(os.environ.get("RESULT_CACHE_DISK_SIZE", 0)) or None
+)
 
 model = None
+engine = None
+
+# Prometheus metrics on /metrics; REQUEST_TIMING_LOG=1 adds JSON timing lines
+metrics = ServingMetrics.from_env().bind(
+    queue_depth=lambda: engine.queue_depth() if engine is not None else 0,
+    preprocess_pending=lambda: preprocess_pool.pending,
+    cache_stats=result_cache.stats,
+    startup_stages=lambda: startup.stages
+)
 
 def load_model():
-    global model
-    if model is None:
-        print("📦 Loading production model from:", MODEL_PATH.resolve())
-        model = tf.keras.models.load_model(MODEL_PATH)
-    return model
+    """
+    Load the artifact selected by MODEL_BACKEND (quantised TFLite or the
+    exported serving signature), or trace the .keras model if none applies;
+    warm it up and start the inference engine.
+    """
+    global model, engine
+    try:
+        artifact = resolve_model_artifact(MODEL_PATH.parent, MODEL_BACKEND)
+        if artifact is not None:
+            print("📦 Loading production model from:", artifact.resolve())
+            with startup.stage("model_load"):
+                predictor = load_predictor(artifact)
+            model_version = file_digest(artifact)
+        else:
+            print("📦 Loading production model from:", MODEL_PATH.resolve())
+            with startup.stage("model_load"):
+                loaded_model = tf.keras.models.load_model(MODEL_PATH)
+            with startup.stage("trace"):
+                predictor = Predictor.from_keras(loaded_model)
+            model_version = file_digest(MODEL_PATH)
+        with startup.stage("first_inference"):
+            warm_up(predictor)
+
+        result_cache.set_model_version(f"{model_version}:{RESIZE_POLICY}")
+        model = predictor
+        engine = BatchingInferenceEngine(
+            predictor,
+            max_batch_size=MAX_BATCH_SIZE,
+            max_wait_ms=MAX_BATCH_WAIT_MS,
+            on_batch=metrics.observe_batch
+        ).start()
+        startup.mark_ready()
+    except Exception as e:
+        startup.error = str(e)
+        traceback.print_exc()
+
+def get_engine():
+    if engine is None:
+        raise HTTPException(status_code=503, detail=startup.error or "Model is still loading")
+    return engine
+
+@asynccontextmanager
+async def lifespan(app):
+    # Load in the background so liveness answers while the model warms up
+    loader = asyncio.get_running_loop().run_in_executor(None, load_model)
+    yield
+    await loader
+    if engine is not None:
+        engine.stop()
+    preprocess_pool.shutdown()
+
+app = FastAPI(title="Forgery Detection API", lifespan=lifespan)
+metrics.instrument(app)
 
-def ela_transform(image: Image.Image, quality=90):
-    import tempfile
-    import os
+@app.get("/")
+def root():
+    return {"status": "Forgery Detection API is running"}
 
-    with tempfile.TemporaryDirectory() as tmpdir:
-        orig_path = os.path.join(tmpdir, "orig.jpg")
-        comp_path = os.path.join(tmpdir, "comp.jpg")
 
-        image.save(orig_path, "JPEG", quality=100)
-        image.save(comp_path, "JPEG", quality=quality)
+@app.get("/health")
+def health():
+    return {
+        "status": "healthy",
+        "model_loaded": model is not None,
+        "backend": MODEL_BACKEND,
+        "resize_policy": str(RESIZE_POLICY),
+        "startup": startup.as_dict(),
+        "cache": result_cache.stats(),
+        "preprocess": preprocess_pool.stats()
+    }
 
-        original = Image.open(orig_path).convert("RGB")
-        compressed = Image.open(comp_path).convert("RGB")
 
-        ela = ImageChops.difference(original, compressed)
+@app.get("/metrics")
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
 
-        extrema = ela.getextrema()
-        max_diff = max([e[1] for e in extrema]) or 1
 
-        scale = 255.0 / max_diff
-        ela = ImageEnhance.Brightness(ela).enhance(scale)
+@app.get("/health/live")
+def liveness():
+    return {"status": "alive"}
 
-        return ela
 
+@app.get("/health/ready")
+def readiness():
+    status_code = 200 if startup.ready else 503
+    return JSONResponse(status_code=status_code, content=startup.as_dict())
 
-@app.get("/")
-def root():
-    return {"status": "Forgery Detection API is running"}
 
+def overloaded(e: Overloaded):
+    return HTTPException(status_code=429, detail=str(e), headers={"Retry-After": RETRY_AFTER_SECONDS})
 
-@app.post("/predict")
-async def predict(file: UploadFile = File(...)):
-    image_bytes = await file.read()
-    image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-
-    ela = ela_transform(image)
-    ela = ela.resize((224, 224))
-
-    arr = np.array(ela) / 255.0
-    arr = np.expand_dims(arr, axis=0)
-
-    model = load_model()
-    pred = model.predict(arr)[0][0]
 
+def format_prediction(pred):
     label = "Forged" if pred < 0.5 else "Original"
     confidence = float(pred if pred > 0.5 else 1 - pred)
 
@@ -70,3 +182,44 @@ async def predict(file: UploadFile = File(...)):
         "prediction": label,
         "confidence": (confidence * 100)
     }
+
+
+@app.post("/predict")
+async def predict(file: UploadFile = File(...)):
+    trace = RequestTrace()
+    with trace.stage("read"):
+        image_bytes = await file.read()
+    try:
+        pred = await predict_cached(image_bytes, get_engine(), result_cache, preprocess_pool, RESIZE_POLICY, trace)
+    except Overloaded as e:
+        metrics.observe_trace(trace, "/predict", "rejected", filename=file.filename)
+        raise overloaded(e)
+    except HTTPException:
+        raise
+    except Exception:
+        metrics.observe_trace(trace, "/predict", "error", filename=file.filename)
+        raise
+    metrics.observe_trace(trace, "/predict", trace_outcome(trace), filename=file.filename)
+
+    return format_prediction(pred)
+
+
+@app.post("/predict/batch")
+async def predict_batch(files: List[UploadFile] = File(...)):
+    """
+    Predict many images (or zip archives of images) in one request.
+    Streams one JSON object per image as NDJSON; failed images carry "error".
+    """
+    inference_engine = get_engine()
+    try:
+        items = expand_uploads([(f.filename, await f.read()) for f in files])
+    except ValueError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    if preprocess_pool.saturated():
+        raise overloaded(Overloaded("Preprocessing queue full"))
+
+    return StreamingResponse(
+        predict_stream(items, inference_engine, format_prediction, preprocess_pool, result_cache,
+                       RESIZE_POLICY, metrics),
+        media_type="application/x-ndjson"
+    )
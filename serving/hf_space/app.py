@@ -1,18 +1,73 @@
+import time
+_IMPORT_START = time.perf_counter()
+
 from fastapi import FastAPI, UploadFile, File, HTTPException
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, StreamingResponse
+from contextlib import asynccontextmanager
 import tensorflow as tf
 from pathlib import Path
-from PIL import Image, ImageChops, ImageEnhance
-import numpy as np
-import io
+from typing import List
+import asyncio
+import os
+import sys
 import traceback
 
-app = FastAPI(title="Forgery Detection API")
+# Locally the shared `src` package lives at the repo root; in the Space it is
+# shipped next to app.py by the deployer.
+# (/app/app.py in the Space image has no grandparent directory.)
+_APP_PATH = Path(__file__).resolve()
+ROOT_DIR = _APP_PATH.parent
+if not (ROOT_DIR / "src").is_dir() and len(_APP_PATH.parents) > 2:
+    ROOT_DIR = _APP_PATH.parents[2]
+if (ROOT_DIR / "src").is_dir() and str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from src.serving.batch_predict import ResizePolicy, predict_cached, expand_uploads, predict_stream
+from src.serving.inference_engine import BatchingInferenceEngine
+from src.serving.preprocess_pool import Overloaded, PreprocessPool, cores_per_worker
+from src.serving.lifecycle import StartupReport, limit_tf_threads, warm_up
+from src.serving.metrics import RequestTrace, ServingMetrics, trace_outcome
+from src.inference.predictor import Predictor, load_predictor, resolve_model_artifact
+from src.serving.result_cache import ResultCache, file_digest
+
+startup = StartupReport()
+startup.record("imports", time.perf_counter() - _IMPORT_START)
 
 WEIGHTS_PATH = Path("production_model.weights.h5")
+# auto | savedmodel | keras | tflite-float16 | tflite-dynamic | tflite-int8
+MODEL_BACKEND = os.environ.get("MODEL_BACKEND", "auto")
+MAX_BATCH_SIZE = int(os.environ.get("MAX_BATCH_SIZE", 16))
+MAX_BATCH_WAIT_MS = float(os.environ.get("MAX_BATCH_WAIT_MS", 5))
+# Pre-ELA downscale of large uploads (ELA_MAX_SIDE, ELA_DRAFT)
+RESIZE_POLICY = ResizePolicy.from_env()
+# Decode/ELA pool with admission control (PREPROCESS_WORKERS,
+# PREPROCESS_MAX_PENDING, PREPROCESS_PROCESSES); full queue -> 429
+preprocess_pool = PreprocessPool.from_env()
+RETRY_AFTER_SECONDS = os.environ.get("RETRY_AFTER_SECONDS", "1")
+# Each uvicorn worker holds its own model; TF gets this process's core share
+limit_tf_threads(int(os.environ.get("TF_NUM_THREADS", 0)) or cores_per_worker())
+
+# Result cache; set RESULT_CACHE_DIR to share results between workers
+# (bounded to RESULT_CACHE_DISK_SIZE files, default RESULT_CACHE_SIZE)
+result_cache = ResultCache(
+    max_entries=int(os.environ.get("RESULT_CACHE_SIZE", 1024)),
+    ttl_seconds=float(os.environ.get("RESULT_CACHE_TTL", 3600)),
+    disk_dir=os.environ.get("RESULT_CACHE_DIR"),
+    disk_max_entries=int(os.environ.get("RESULT_CACHE_DISK_SIZE", 0)) or None
+)
+
 model = None
+engine = None
 load_error = None
 
+# Prometheus metrics on /metrics; REQUEST_TIMING_LOG=1 adds JSON timing lines
+metrics = ServingMetrics.from_env().bind(
+    queue_depth=lambda: engine.queue_depth() if engine is not None else 0,
+    preprocess_pending=lambda: preprocess_pool.pending,
+    cache_stats=result_cache.stats,
+    startup_stages=lambda: startup.stages
+)
+
 
 def build_model():
     """Rebuild the exact model architecture used during training"""
@@ -34,46 +89,73 @@ def build_model():
 
 
 def load_model():
-    global model, load_error
+    """
+    Load the artifact selected by MODEL_BACKEND (quantised TFLite or the
+    exported serving signature), or rebuild the architecture and load
+    weights when none applies; warm it up and start the inference engine.
+    """
+    global model, engine, load_error
     if model is None and load_error is None:
         try:
-            print(f"Building model architecture...")
-            model = build_model()
-            print(f"Loading weights from: {WEIGHTS_PATH}")
-            print(f"Weights file exists: {WEIGHTS_PATH.exists()}")
-            model.load_weights(WEIGHTS_PATH)
+            artifact = resolve_model_artifact(WEIGHTS_PATH.parent, MODEL_BACKEND)
+            if artifact is not None:
+                print(f"Loading model from: {artifact}")
+                with startup.stage("model_load"):
+                    predictor = load_predictor(artifact)
+                model_version = file_digest(artifact)
+            else:
+                print("Building model architecture...")
+                with startup.stage("graph_build"):
+                    loaded_model = build_model()
+                print(f"Loading weights from: {WEIGHTS_PATH}")
+                print(f"Weights file exists: {WEIGHTS_PATH.exists()}")
+                with startup.stage("weight_load"):
+                    loaded_model.load_weights(WEIGHTS_PATH)
+                with startup.stage("trace"):
+                    predictor = Predictor.from_keras(loaded_model)
+                model_version = file_digest(WEIGHTS_PATH)
+            with startup.stage("first_inference"):
+                warm_up(predictor)
+
+            result_cache.set_model_version(f"{model_version}:{RESIZE_POLICY}")
+            model = predictor
+            engine = BatchingInferenceEngine(
+                predictor,
+                max_batch_size=MAX_BATCH_SIZE,
+                max_wait_ms=MAX_BATCH_WAIT_MS,
+                on_batch=metrics.observe_batch
+            ).start()
+            startup.mark_ready()
             print("Model loaded successfully!")
         except Exception as e:
-            load_error = str(e)
+            load_error = startup.error = str(e)
             print(f"Error loading model: {e}")
             traceback.print_exc()
     return model
 
 
-def ela_transform(image: Image.Image, quality=90):
-    """Generate Error Level Analysis image"""
-    import tempfile
-    import os
-
-    with tempfile.TemporaryDirectory() as tmpdir:
-        orig_path = os.path.join(tmpdir, "orig.jpg")
-        comp_path = os.path.join(tmpdir, "comp.jpg")
-
-        image.save(orig_path, "JPEG", quality=100)
-        image.save(comp_path, "JPEG", quality=quality)
+def get_engine():
+    """Micro-batching engine around the warmed-up model."""
+    if engine is None:
+        if load_error is not None:
+            raise HTTPException(status_code=500, detail=f"Model failed to load: {load_error}")
+        raise HTTPException(status_code=503, detail="Model is still loading")
+    return engine
 
-        original = Image.open(orig_path).convert("RGB")
-        compressed = Image.open(comp_path).convert("RGB")
 
-        ela = ImageChops.difference(original, compressed)
+@asynccontextmanager
+async def lifespan(app):
+    # Load in the background so liveness answers while the model warms up
+    loader = asyncio.get_running_loop().run_in_executor(None, load_model)
+    yield
+    await loader
+    if engine is not None:
+        engine.stop()
+    preprocess_pool.shutdown()
 
-        extrema = ela.getextrema()
-        max_diff = max([e[1] for e in extrema]) or 1
 
-        scale = 255.0 / max_diff
-        ela = ImageEnhance.Brightness(ela).enhance(scale)
-
-        return ela
+app = FastAPI(title="Forgery Detection API", lifespan=lifespan)
+metrics.instrument(app)
 
 
 @app.get("/", response_class=HTMLResponse)
@@ -98,11 +180,29 @@ def root():
                 <p>Upload an image to check if it's original or forged.</p>
                 <p>Request: <code>multipart/form-data</code> with field <code>file</code></p>
                 <p>Response: <code>{"prediction": "Original|Forged", "confidence": float}</code></p>
+                <p>Returns 429 with <code>Retry-After</code> when the preprocessing queue is full.</p>
+            </div>
+            
+            <div class="endpoint">
+                <h3>POST /predict/batch</h3>
+                <p>Upload many images (or zip archives of images) in one request.</p>
+                <p>Request: <code>multipart/form-data</code> with repeated field <code>files</code></p>
+                <p>Response: NDJSON stream, one <code>{"index", "filename", "prediction", "confidence"}</code> (or <code>"error"</code>) per image</p>
             </div>
             
             <div class="endpoint">
                 <h3>GET /health</h3>
-                <p>Check API health status.</p>
+                <p>Check API health status, startup-time breakdown, result-cache hit/miss counters and preprocessing-pool load.</p>
+            </div>
+            
+            <div class="endpoint">
+                <h3>GET /metrics</h3>
+                <p>Prometheus metrics: request counts and latency, per-stage latency (decode, ELA, resize, inference, ...), batch sizes, queue depth and startup times.</p>
+            </div>
+            
+            <div class="endpoint">
+                <h3>GET /health/live, GET /health/ready</h3>
+                <p>Liveness (process is up) and readiness (model loaded and warmed up; 503 until then).</p>
             </div>
             
             <p><a href="/docs">Interactive API Documentation (Swagger UI)</a></p>
@@ -118,45 +218,87 @@ def health():
         "model_loaded": model is not None,
         "weights_path": str(WEIGHTS_PATH),
         "weights_exists": WEIGHTS_PATH.exists(),
-        "load_error": load_error
+        "backend": MODEL_BACKEND,
+        "resize_policy": str(RESIZE_POLICY),
+        "load_error": load_error,
+        "startup": startup.as_dict(),
+        "cache": result_cache.stats(),
+        "preprocess": preprocess_pool.stats()
+    }
+
+
+@app.get("/metrics")
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/health/live")
+def liveness():
+    return {"status": "alive"}
+
+
+@app.get("/health/ready")
+def readiness():
+    status_code = 200 if startup.ready else 503
+    return JSONResponse(status_code=status_code, content=startup.as_dict())
+
+
+def overloaded(e: Overloaded):
+    return HTTPException(status_code=429, detail=str(e), headers={"Retry-After": RETRY_AFTER_SECONDS})
+
+
+def format_prediction(pred):
+    label = "Forged" if pred < 0.5 else "Original"
+    confidence = float(pred if pred > 0.5 else 1 - pred)
+
+    return {
+        "prediction": label,
+        "confidence": round(confidence * 100, 2)
     }
 
 
 @app.post("/predict")
 async def predict(file: UploadFile = File(...)):
+    trace = None
     try:
-        # Load model
-        loaded_model = load_model()
-        if loaded_model is None:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Model failed to load: {load_error}"
-            )
-
-        # Read and process image
-        image_bytes = await file.read()
-        image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-
-        # Generate ELA
-        ela = ela_transform(image)
-        ela = ela.resize((224, 224))
-
-        # Prepare for prediction
-        arr = np.array(ela) / 255.0
-        arr = np.expand_dims(arr, axis=0)
-
-        # Predict
-        pred = loaded_model.predict(arr, verbose=0)[0][0]
-
-        label = "Forged" if pred < 0.5 else "Original"
-        confidence = float(pred if pred > 0.5 else 1 - pred)
-
-        return {
-            "prediction": label,
-            "confidence": round(confidence * 100, 2)
-        }
+        # Model is loaded and warmed up at startup
+        inference_engine = get_engine()
+
+        # Read image; ELA + prediction (batched with concurrent requests)
+        # unless the same bytes were already scored by this model
+        trace = RequestTrace()
+        with trace.stage("read"):
+            image_bytes = await file.read()
+        pred = await predict_cached(image_bytes, inference_engine, result_cache, preprocess_pool,
+                                    RESIZE_POLICY, trace)
+        metrics.observe_trace(trace, "/predict", trace_outcome(trace), filename=file.filename)
+
+        return format_prediction(pred)
     except HTTPException:
         raise
+    except Overloaded as e:
+        metrics.observe_trace(trace, "/predict", "rejected", filename=file.filename)
+        raise overloaded(e)
     except Exception as e:
+        if trace is not None:
+            metrics.observe_trace(trace, "/predict", "error", filename=file.filename)
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/predict/batch")
+async def predict_batch(files: List[UploadFile] = File(...)):
+    inference_engine = get_engine()
+
+    try:
+        items = expand_uploads([(f.filename, await f.read()) for f in files])
+    except ValueError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    if preprocess_pool.saturated():
+        raise overloaded(Overloaded("Preprocessing queue full"))
+
+    return StreamingResponse(
+        predict_stream(items, inference_engine, format_prediction, preprocess_pool, result_cache,
+                       RESIZE_POLICY, metrics),
+        media_type="application/x-ndjson"
+    )
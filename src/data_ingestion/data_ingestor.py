@@ -0,0 +1,182 @@
+"""
+Dataset ingestion from zip archives.
+
+Two modes:
+    extract   - unzip every archive into `extract_dir` (skipped when the
+                archive was already extracted) and return that directory
+    streaming - no extraction; members are read straight from the
+                archives as byte buffers by the cleaning stage
+
+Several archives can be given as a list or a comma-separated string.
+Every stage reports the bytes it moved and its bytes/sec.
+"""
+
+from abc import ABC, abstractmethod
+from datetime import datetime
+from pathlib import Path
+import json
+import time
+import zipfile
+
+ARCHIVE_SEPARATOR = ","
+
+
+def split_archives(zip_paths) -> list:
+    if isinstance(zip_paths, (str, Path)):
+        zip_paths = [p for p in str(zip_paths).split(ARCHIVE_SEPARATOR) if p.strip()]
+    return [Path(str(p).strip()) for p in zip_paths]
+
+
+def is_archive_spec(path) -> bool:
+    """True for a (comma-separated list of) zip archive path(s)."""
+    archives = split_archives(path)
+    return bool(archives) and all(p.suffix.lower() == ".zip" and p.is_file() for p in archives)
+
+
+class ThroughputMeter:
+    """Counts bytes/items for one stage and reports bytes/sec."""
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.bytes = 0
+        self.items = 0
+        self._start = time.perf_counter()
+
+    def add(self, nbytes: int, items: int = 1):
+        self.bytes += nbytes
+        self.items += items
+
+    def report(self) -> dict:
+        elapsed = max(time.perf_counter() - self._start, 1e-9)
+        stats = {
+            "stage": self.stage,
+            "items": self.items,
+            "bytes": self.bytes,
+            "seconds": round(elapsed, 3),
+            "mb_per_sec": round(self.bytes / elapsed / 1024 / 1024, 2),
+        }
+        print(f"[{self.stage.upper()}] {stats['items']} items, {stats['bytes'] / 1024 / 1024:.1f} MB "
+              f"in {stats['seconds']:.2f}s ({stats['mb_per_sec']:.1f} MB/s)")
+        return stats
+
+
+class DataIngestor(ABC):
+    @abstractmethod
+    def ingest(self) -> Path:
+        """Make the dataset available and return the path later stages read from."""
+
+
+class DirectoryDataIngestor(DataIngestor):
+    """Dataset is already a directory on disk."""
+
+    def __init__(self, data_dir: Path):
+        self.data_dir = data_dir
+
+    def ingest(self) -> Path:
+        if not self.data_dir.is_dir():
+            raise FileNotFoundError(f"Dataset directory not found: {self.data_dir}")
+        return self.data_dir
+
+
+class ZipDataIngestor(DataIngestor):
+    """Extracts one or more zip archives into `extract_dir`."""
+
+    MARKER = ".ingested.json"
+
+    def __init__(self, zip_paths, extract_dir: Path):
+        self.zip_paths = split_archives(zip_paths)
+        self.extract_dir = extract_dir
+
+    def _signature(self) -> list:
+        return [[str(p), p.stat().st_size, p.stat().st_mtime_ns] for p in self.zip_paths]
+
+    def ingest(self) -> Path:
+        marker = self.extract_dir / self.MARKER
+        if marker.exists() and json.loads(marker.read_text()) == self._signature():
+            print(f"--Archives already extracted to: {self.extract_dir}")
+            return self.extract_dir
+
+        self.extract_dir.mkdir(parents=True, exist_ok=True)
+        meter = ThroughputMeter("extract")
+        for zip_path in self.zip_paths:
+            with zipfile.ZipFile(zip_path) as archive:
+                archive.extractall(self.extract_dir)
+                meter.add(sum(m.file_size for m in archive.infolist()), len(archive.infolist()))
+        meter.report()
+
+        marker.write_text(json.dumps(self._signature()))
+        return self.extract_dir
+
+
+class ZipStreamIngestor(DataIngestor):
+    """
+    Reads image members directly from one or more zip archives.
+
+    Members are expected at <dataset_root>/<class>/<file>, the same layout
+    the extracted dataset has, and are yielded as ZipMember objects whose
+    bytes are only read on demand.
+    """
+
+    def __init__(self, zip_paths, dataset_root: str = ""):
+        self.zip_paths = split_archives(zip_paths)
+        self.dataset_root = dataset_root.strip("/")
+        self.meter = ThroughputMeter("read")
+
+    def ingest(self) -> Path:
+        for zip_path in self.zip_paths:
+            if not zipfile.is_zipfile(zip_path):
+                raise ValueError(f"Not a zip archive: {zip_path}")
+        return self.zip_paths[0]
+
+    def _split(self, name: str):
+        parts = name.split("/")
+        if self.dataset_root:
+            root = self.dataset_root.split("/")
+            if parts[:len(root)] != root:
+                return None
+            parts = parts[len(root):]
+        if len(parts) != 2 or not parts[1]:
+            return None
+        return parts[0], parts[1]
+
+    def members(self):
+        """Yield ZipMember(class_name, filename, ...) for every image member, in archive order."""
+        for zip_path in self.zip_paths:
+            with zipfile.ZipFile(zip_path) as archive:
+                for info in archive.infolist():
+                    if info.is_dir():
+                        continue
+                    split = self._split(info.filename)
+                    if split is None:
+                        continue
+                    yield ZipMember(archive, info, split[0], split[1], self.meter)
+
+
+class ZipMember:
+    def __init__(self, archive: zipfile.ZipFile, info: zipfile.ZipInfo, class_name: str,
+                 filename: str, meter: ThroughputMeter):
+        self.archive = archive
+        self.info = info
+        self.class_name = class_name
+        self.filename = filename
+        self.size = info.file_size
+        self.mtime_ns = int(datetime(*info.date_time).timestamp() * 1e9)
+        self._meter = meter
+        self._data = None
+
+    def read(self) -> bytes:
+        if self._data is None:
+            self._data = self.archive.read(self.info)
+            self._meter.add(len(self._data))
+        return self._data
+
+
+class DataIngestorFactory:
+    @staticmethod
+    def create(zip_path, output_dir: Path, streaming: bool = False, dataset_root: str = "") -> DataIngestor:
+        archives = split_archives(zip_path)
+        if len(archives) == 1 and archives[0].is_dir():
+            return DirectoryDataIngestor(archives[0])
+        if streaming:
+            return ZipStreamIngestor(archives, dataset_root)
+        return ZipDataIngestor(archives, output_dir)
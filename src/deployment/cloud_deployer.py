@@ -5,12 +5,12 @@ Automatically uploads the production model to a Hugging Face Space.
 """
 
 from pathlib import Path
-from huggingface_hub import HfApi
-import shutil
-import tempfile
+import os
 import sys
 import io
 
+from src.deployment.registry import FilesystemRegistry, HuggingFaceRegistry, publish
+
 # Fix Windows console encoding
 if sys.platform == "win32":
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
@@ -22,65 +22,95 @@ SPACE_NAME = "forgery-detection"
 REPO_ID = f"{HF_USERNAME}/{SPACE_NAME}"
 
 # Local paths
-HF_SPACE_DIR = Path(__file__).parent.parent.parent / "serving" / "hf_space"
+ROOT_DIR = Path(__file__).parent.parent.parent
+HF_SPACE_DIR = ROOT_DIR / "serving" / "hf_space"
 
+# Shared modules imported by the Space app, uploaded under the same path
+SHARED_MODULES = [
+    "src/preprocessing/ela.py",
+    "src/serving/inference_engine.py",
+    "src/serving/batch_predict.py",
+    "src/serving/result_cache.py",
+    "src/serving/lifecycle.py",
+    "src/serving/preprocess_pool.py",
+    "src/serving/metrics.py",
+    "src/inference/predictor.py",
+]
 
-def deploy_to_huggingface(model_path: Path) -> str:
-    """
-    Deploy the production model to Hugging Face Spaces.
-    
-    Args:
-        model_path: Path to the production_model.keras file
-        
-    Returns:
-        URL of the deployed Space
-    """
-    api = HfApi()
-    
-    print("\n" + "="*50)
-    print("[DEPLOY] DEPLOYING TO HUGGING FACE SPACES")
-    print("="*50)
-    
-    # Step 1: Create the Space if it doesn't exist
-    try:
-        api.create_repo(
-            repo_id=REPO_ID,
-            repo_type="space",
-            space_sdk="docker",
-            exist_ok=True
-        )
-        print(f"[OK] Space ready: {REPO_ID}")
-    except Exception as e:
-        print(f"[NOTE] Space creation note: {e}")
-    
-    # Step 2: Upload all Space files
+# Model artifacts the deployer owns in the Space: any that are not part of
+# the current deploy (rejected or stale variants) are deleted from it
+MANAGED_ARTIFACTS = (
+    "production_model_*.tflite",
+    "production_model_quantized.json",
+    "production_model_savedmodel/*",
+)
+
+
+def space_files(model_path: Path) -> list:
+    """(local path, path in the Space) for everything the Space app needs."""
     # Use weights file for cross-version compatibility
     weights_path = model_path.parent / "production_model.weights.h5"
-    
-    files_to_upload = [
+    saved_model_dir = model_path.parent / "production_model_savedmodel"
+
+    files = [
         (HF_SPACE_DIR / "app.py", "app.py"),
         (HF_SPACE_DIR / "requirements.txt", "requirements.txt"),
         (HF_SPACE_DIR / "Dockerfile", "Dockerfile"),
         (HF_SPACE_DIR / "README.md", "README.md"),
         (weights_path, "production_model.weights.h5"),
     ]
-    
-    print(f"[INFO] HF_SPACE_DIR: {HF_SPACE_DIR}")
-    print(f"[INFO] HF_SPACE_DIR exists: {HF_SPACE_DIR.exists()}")
-    
-    for local_path, repo_path in files_to_upload:
-        if local_path.exists():
-            print(f"[UPLOAD] Uploading {repo_path}...")
-            api.upload_file(
-                path_or_fileobj=str(local_path),
-                path_in_repo=repo_path,
-                repo_id=REPO_ID,
-                repo_type="space"
-            )
-            print(f"[OK] Uploaded {repo_path}")
-        else:
-            print(f"[WARN] File not found: {local_path}")
-    
+    files += [(ROOT_DIR / module, module) for module in SHARED_MODULES]
+    files += [
+        (path, path.name)
+        for path in sorted(model_path.parent.glob("production_model_*.tflite"))
+    ]
+    report_path = model_path.parent / "production_model_quantized.json"
+    if report_path.exists():
+        files.append((report_path, report_path.name))
+    if saved_model_dir.exists():
+        files += [
+            (path, f"{saved_model_dir.name}/{path.relative_to(saved_model_dir).as_posix()}")
+            for path in sorted(saved_model_dir.rglob("*")) if path.is_file()
+        ]
+    return files
+
+
+def registry_from_env():
+    """DEPLOY_REGISTRY_DIR publishes to a local directory instead of the Space."""
+    registry_dir = os.environ.get("DEPLOY_REGISTRY_DIR")
+    if registry_dir:
+        return FilesystemRegistry(Path(registry_dir))
+    return HuggingFaceRegistry(REPO_ID)
+
+
+def deploy_to_huggingface(model_path: Path, registry=None) -> str:
+    """
+    Deploy the production model to Hugging Face Spaces.
+
+    Only files whose content differs from the Space are uploaded, all in
+    one commit that also deletes MANAGED_ARTIFACTS the current model no
+    longer has (see src/deployment/registry.py).
+
+    Args:
+        model_path: Path to the production_model.keras file
+        registry: where to publish (default: registry_from_env())
+
+    Returns:
+        URL of the deployed Space (or the registry, if not the Space)
+    """
+    registry = registry or registry_from_env()
+
+    print("\n" + "="*50)
+    print(f"[DEPLOY] DEPLOYING TO {registry}")
+    print("="*50)
+
+    summary = publish(registry, space_files(model_path), f"Deploy {model_path.name}", managed=MANAGED_ARTIFACTS)
+
+    if not isinstance(registry, HuggingFaceRegistry):
+        print(f"[SUCCESS] {len(summary['uploaded'])} uploaded, {len(summary['deleted'])} deleted, "
+              f"{len(summary['unchanged'])} unchanged")
+        return str(registry)
+
     space_url = f"https://huggingface.co/spaces/{REPO_ID}"
     api_url = f"https://{HF_USERNAME.lower()}-{SPACE_NAME}.hf.space"
     
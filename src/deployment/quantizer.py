@@ -0,0 +1,85 @@
+"""
+Post-training quantisation of the production model to TFLite for
+CPU-only serving.
+
+Modes:
+    float16  - float16 weights, float compute
+    dynamic  - int8 weights, dynamic-range activations
+    int8     - full-integer kernels calibrated on a representative sample
+               of the ELA dataset (float32 input/output kept, so callers
+               feed the same normalised tensors)
+"""
+
+from pathlib import Path
+import random
+
+import numpy as np
+from PIL import Image
+from src.preprocessing.ela import resize_ela
+from src.preprocessing.ela_shards import is_shard_dir, iter_shards
+
+QUANTIZATION_MODES = ("float16", "dynamic", "int8")
+
+
+def tflite_path(model_path: Path, mode: str) -> Path:
+    return model_path.parent / f"production_model_{mode}.tflite"
+
+
+def representative_images(ela_dir: Path, samples: int = 100, image_size=(224, 224), seed: int = 0,
+                          raw: bool = False):
+    """
+    Sample normalised ELA images across classes for int8 calibration,
+    preprocessed the way serving does: ELA images are resized with
+    resize_ela; with raw=True the directory holds source images, which go
+    through the serving prepare_input (ELA, then resize_ela).
+    """
+    if is_shard_dir(ela_dir):
+        def shard_generator():
+            shard_images = [images for images, _, _ in iter_shards(ela_dir)]
+            offsets = np.cumsum([0] + [len(images) for images in shard_images])
+            picks = np.random.default_rng(seed).permutation(offsets[-1])[:samples]
+            for i in sorted(picks):
+                shard = np.searchsorted(offsets, i, side="right") - 1
+                row = i - offsets[shard]
+                yield [shard_images[shard][row:row + 1].astype(np.float32) / 255.0]
+        return shard_generator
+
+    files = sorted(p for p in Path(ela_dir).rglob("*") if p.suffix.lower() in (".jpg", ".jpeg", ".png"))
+    random.Random(seed).shuffle(files)
+
+    def generator():
+        if raw:
+            from src.serving.batch_predict import prepare_input
+
+        for path in files[:samples]:
+            if raw:
+                arr = prepare_input(path.read_bytes(), size=image_size)
+            else:
+                arr = resize_ela(np.asarray(Image.open(path).convert("RGB")), image_size) / 255.0
+            yield [arr[np.newaxis].astype(np.float32)]
+
+    return generator
+
+
+def convert_to_tflite(model, output_path: Path, mode: str, representative_dir: Path = None,
+                      samples: int = 100, representative_raw: bool = False) -> Path:
+    if mode not in QUANTIZATION_MODES:
+        raise ValueError(f"Unknown quantization mode: {mode} (expected one of {QUANTIZATION_MODES})")
+
+    import tensorflow as tf
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+
+    if mode == "float16":
+        converter.target_spec.supported_types = [tf.float16]
+    elif mode == "int8":
+        if representative_dir is None:
+            raise ValueError("int8 quantization needs a representative ELA dataset")
+        converter.representative_dataset = representative_images(representative_dir, samples,
+                                                                 raw=representative_raw)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+
+    output_path = Path(output_path)
+    output_path.write_bytes(converter.convert())
+    print(f"[QUANTIZE] {mode}: {output_path} ({output_path.stat().st_size / 1024 / 1024:.2f} MB)")
+    return output_path
@@ -0,0 +1,194 @@
+"""
+Model registries the deploy step publishes to.
+
+A registry takes a set of (local path, repo path) files and publishes
+only those whose content differs from what it already holds, as one
+commit. Files it holds that match the caller's `managed` patterns but are
+not in the set (e.g. a TFLite variant the new model did not promote) are
+deleted in the same commit. Two backends:
+
+    HuggingFaceRegistry   a Hugging Face Space; unchanged files are found
+                          from the repo tree (LFS sha256 or git blob id)
+                          and the rest go up in a single create_commit
+    FilesystemRegistry    a local directory with a JSON log of commits,
+                          for offline runs and checking a deploy
+"""
+
+import fnmatch
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+
+def sha256_file(path: Path, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def git_blob_id(path: Path, chunk_size: int = 1 << 20) -> str:
+    """The id git gives a file's content (sha1 of a "blob <size>\\0" header + bytes)."""
+    digest = hashlib.sha1(f"blob {path.stat().st_size}\0".encode())
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class HuggingFaceRegistry:
+    def __init__(self, repo_id: str, repo_type: str = "space", space_sdk: str = "docker"):
+        from huggingface_hub import HfApi
+
+        self.api = HfApi()
+        self.repo_id = repo_id
+        self.repo_type = repo_type
+        self.space_sdk = space_sdk
+        self._tree = None
+
+    def ensure_repo(self):
+        try:
+            self.api.create_repo(repo_id=self.repo_id, repo_type=self.repo_type,
+                                 space_sdk=self.space_sdk, exist_ok=True)
+            print(f"[OK] Space ready: {self.repo_id}")
+        except Exception as e:
+            print(f"[NOTE] Space creation note: {e}")
+
+    def _remote_files(self) -> dict:
+        """{repo path: file entry}, listed once per commit."""
+        if self._tree is None:
+            try:
+                tree = self.api.list_repo_tree(self.repo_id, recursive=True, repo_type=self.repo_type)
+                self._tree = {entry.path: entry for entry in tree if hasattr(entry, "blob_id")}
+            except Exception as e:
+                print(f"[NOTE] Could not list {self.repo_id}, uploading everything: {e}")
+                self._tree = {}
+        return self._tree
+
+    def paths(self) -> list:
+        return sorted(self._remote_files())
+
+    def changed(self, files) -> list:
+        remote = self._remote_files()
+        changed = []
+        for local_path, repo_path in files:
+            entry = remote.get(repo_path)
+            if entry is None or entry.size != local_path.stat().st_size:
+                changed.append((local_path, repo_path))
+            elif entry.lfs is not None:
+                if entry.lfs.sha256 != sha256_file(local_path):
+                    changed.append((local_path, repo_path))
+            elif entry.blob_id != git_blob_id(local_path):
+                changed.append((local_path, repo_path))
+        return changed
+
+    def commit(self, files, message: str, deletions=()):
+        from huggingface_hub import CommitOperationAdd, CommitOperationDelete
+
+        operations = [CommitOperationAdd(path_in_repo=repo_path, path_or_fileobj=str(local_path))
+                      for local_path, repo_path in files]
+        operations += [CommitOperationDelete(path_in_repo=repo_path) for repo_path in deletions]
+        self._tree = None
+        return self.api.create_commit(self.repo_id, operations, commit_message=message,
+                                      repo_type=self.repo_type)
+
+    def __str__(self):
+        return f"huggingface:{self.repo_type}/{self.repo_id}"
+
+
+class FilesystemRegistry:
+    """
+    Publishes into `root`, keeping the repo layout. commits.jsonl records
+    each commit's message, time, {repo path: sha256} and deleted paths.
+    """
+
+    LOG_NAME = "commits.jsonl"
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def ensure_repo(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def paths(self) -> list:
+        if not self.root.exists():
+            return []
+        return sorted(
+            path.relative_to(self.root).as_posix() for path in self.root.rglob("*")
+            if path.is_file() and path.name != self.LOG_NAME
+        )
+
+    def changed(self, files) -> list:
+        changed = []
+        for local_path, repo_path in files:
+            target = self.root / repo_path
+            if (not target.exists() or target.stat().st_size != local_path.stat().st_size
+                    or sha256_file(target) != sha256_file(local_path)):
+                changed.append((local_path, repo_path))
+        return changed
+
+    def commit(self, files, message: str, deletions=()):
+        hashes = {}
+        for local_path, repo_path in files:
+            target = self.root / repo_path
+            target.parent.mkdir(parents=True, exist_ok=True)
+            # Copy next to the target, then swap in, so readers never see half a file
+            partial = target.with_name(target.name + ".partial")
+            shutil.copyfile(local_path, partial)
+            os.replace(partial, target)
+            hashes[repo_path] = sha256_file(target)
+        for repo_path in deletions:
+            (self.root / repo_path).unlink(missing_ok=True)
+
+        entry = {"message": message, "time": time.time(), "files": hashes, "deleted": list(deletions)}
+        with open(self.root / self.LOG_NAME, "a") as log:
+            log.write(json.dumps(entry) + "\n")
+        return entry
+
+    def commits(self) -> list:
+        log = self.root / self.LOG_NAME
+        if not log.exists():
+            return []
+        return [json.loads(line) for line in log.read_text().splitlines() if line]
+
+    def __str__(self):
+        return f"filesystem:{self.root}"
+
+
+def stale_paths(held, files, managed=()) -> list:
+    """Paths in `held` that match a `managed` glob pattern but are not published in `files`."""
+    publishing = {repo for _, repo in files}
+    return [path for path in held
+            if path not in publishing and any(fnmatch.fnmatch(path, pattern) for pattern in managed)]
+
+
+def publish(registry, files, message: str, managed=()) -> dict:
+    """
+    Publish the files that changed as one commit, deleting files the
+    registry holds that match a `managed` glob pattern but are no longer
+    in `files`. Missing local files are reported and skipped. Returns the
+    repo paths uploaded, unchanged, deleted and missing.
+    """
+    present = [(local, repo) for local, repo in files if local.exists()]
+    missing = [repo for local, repo in files if not local.exists()]
+    for repo_path in missing:
+        print(f"[WARN] File not found: {repo_path}")
+
+    registry.ensure_repo()
+    changed = registry.changed(present)
+    changed_paths = {repo for _, repo in changed}
+    unchanged = [repo for _, repo in present if repo not in changed_paths]
+    deleted = stale_paths(registry.paths(), present, managed) if managed else []
+
+    if changed or deleted:
+        print(f"[UPLOAD] {len(changed)} changed file(s), {len(deleted)} deletion(s) in one commit "
+              f"to {registry} ({len(unchanged)} unchanged)")
+        registry.commit(changed, message, deletions=deleted)
+    else:
+        print(f"[OK] {registry} is up to date ({len(unchanged)} files unchanged)")
+
+    return {"uploaded": sorted(changed_paths), "unchanged": unchanged, "deleted": deleted, "missing": missing}
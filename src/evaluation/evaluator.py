@@ -1,13 +1,15 @@
-import tensorflow as tf
-from sklearn.metrics import accuracy_score, f1_score
+from pathlib import Path
+import time
+import numpy as np
+from PIL import Image
+from src.inference.predictor import load_predictor
+from src.preprocessing.ela_shards import IMAGE_EXTENSIONS, is_shard_dir, iter_shards
+from src.serving.batch_predict import FULL_RESOLUTION, prepare_input
+from src.profiling.profiler import profile_function
 
 class Evaluator:
-    def evaluate(self, model_path, X, y):
-        model = tf.keras.models.load_model(model_path)
-
-        preds = model.predict(X)
-        preds = (preds > 0.5).astype(int).reshape(-1)
-        y = y.numpy().reshape(-1)
+    def _metrics(self, y, preds):
+        from sklearn.metrics import accuracy_score, f1_score
 
         acc = accuracy_score(y, preds)
         f1 = f1_score(y, preds)
@@ -16,3 +18,97 @@ class Evaluator:
             "accuracy": float(acc),
             "f1": float(f1)
         }
+
+    @profile_function()
+    def evaluate(self, model_path, X, y, batch_size=32):
+        predictor = load_predictor(model_path)
+
+        preds = np.concatenate([
+            predictor(X[i:i + batch_size]) for i in range(0, len(X), batch_size)
+        ])
+        preds = (preds > 0.5).astype(int).reshape(-1)
+        y = y.numpy().reshape(-1)
+
+        return self._metrics(y, preds)
+
+    def load_dataset(self, data_dir, image_size=(224, 224), batch_size=32):
+        """Lazily decoded, normalised and prefetched test set (no shuffling)."""
+        import tensorflow as tf
+
+        data = tf.keras.utils.image_dataset_from_directory(
+            data_dir,
+            image_size=tuple(image_size),
+            batch_size=batch_size,
+            shuffle=False
+        )
+        data = data.map(lambda x, y: (x / 255.0, y), num_parallel_calls=tf.data.AUTOTUNE)
+        return data.prefetch(tf.data.AUTOTUNE)
+
+    def _iter_shard_batches(self, shard_dir, batch_size):
+        """Sequential, memory-mapped batches from a packed shard dir."""
+        for images, labels, _ in iter_shards(shard_dir):
+            for i in range(0, len(labels), batch_size):
+                yield images[i:i + batch_size].astype(np.float32) / 255.0, labels[i:i + batch_size]
+
+    @profile_function()
+    def evaluate_streaming(self, model_path, data_dir, image_size=(224, 224), batch_size=32):
+        """
+        Evaluate batch by batch from disk. Peak memory is bounded by a few
+        batches (prefetch buffer) instead of the whole test set.
+        """
+        predictor = load_predictor(model_path)
+        if is_shard_dir(data_dir):
+            data = self._iter_shard_batches(data_dir, batch_size)
+        else:
+            data = self.load_dataset(data_dir, image_size, batch_size)
+
+        all_preds, all_labels = [], []
+        for images, labels in data:
+            batch_preds = predictor(images)
+            all_preds.append((np.asarray(batch_preds) > 0.5).astype(int).reshape(-1))
+            all_labels.append(np.asarray(labels).reshape(-1))
+
+        preds = np.concatenate(all_preds) if all_preds else np.zeros(0, dtype=int)
+        y = np.concatenate(all_labels) if all_labels else np.zeros(0, dtype=int)
+
+        return self._metrics(y, preds)
+
+    @profile_function()
+    def evaluate_uploads(self, model_path, data_dir, policy=FULL_RESOLUTION, batch_size=32):
+        """
+        Evaluate raw images (one sub-folder per class) through the serving
+        preprocessing, i.e. prepare_input with the given ResizePolicy.
+        Besides accuracy/F1, reports the mean preprocessing time per image
+        and the mean/max megapixels ELA ran on.
+        """
+        predictor = load_predictor(model_path)
+        data_dir = Path(data_dir)
+        class_dirs = sorted(d for d in data_dir.iterdir() if d.is_dir())
+        files = [(path, label) for label, class_dir in enumerate(class_dirs)
+                 for path in sorted(class_dir.iterdir()) if path.suffix.lower() in IMAGE_EXTENSIONS]
+
+        all_preds, labels, megapixels = [], [], []
+        preprocess_seconds = 0.0
+        for i in range(0, len(files), batch_size):
+            batch = []
+            for path, label in files[i:i + batch_size]:
+                image_bytes = path.read_bytes()
+                with Image.open(path) as image:
+                    width, height = policy.output_size(image.size)
+                start = time.perf_counter()
+                batch.append(prepare_input(image_bytes, policy=policy))
+                preprocess_seconds += time.perf_counter() - start
+                megapixels.append(width * height / 1e6)
+                labels.append(label)
+            batch_preds = predictor(np.stack(batch))
+            all_preds.append((np.asarray(batch_preds) > 0.5).astype(int).reshape(-1))
+
+        preds = np.concatenate(all_preds) if all_preds else np.zeros(0, dtype=int)
+        metrics = self._metrics(np.asarray(labels, dtype=int), preds)
+        metrics.update({
+            "images": len(files),
+            "preprocess_ms": 1000 * preprocess_seconds / max(len(files), 1),
+            "mean_megapixels": float(np.mean(megapixels)) if megapixels else 0.0,
+            "max_megapixels": float(np.max(megapixels)) if megapixels else 0.0
+        })
+        return metrics
@@ -0,0 +1,173 @@
+"""
+Low-overhead inference through a compiled serving signature.
+
+Keras `model.predict` sets up a data adapter, callbacks and a progress bar
+on every call. `Predictor` instead calls a concrete tf.function with a
+fixed (None, 224, 224, 3) float32 input, either traced in-process from a
+Keras model or loaded from an exported SavedModel. `TFLitePredictor` runs
+the quantised CPU variants behind the same interface.
+
+TensorFlow is imported on first use, so resolving an artifact or running
+a TFLite model through ai_edge_litert never loads it.
+"""
+
+from pathlib import Path
+import json
+
+import numpy as np
+
+BACKENDS = ("auto", "savedmodel", "keras", "tflite-float16", "tflite-dynamic", "tflite-int8")
+SAVED_MODEL_DIRNAME = "production_model_savedmodel"
+QUANTIZATION_REPORT = "production_model_quantized.json"
+
+INPUT_SHAPE = (224, 224, 3)
+INPUT_NAME = "ela"
+OUTPUT_NAME = "score"
+SIGNATURE_KEY = "serving_default"
+
+
+def _input_spec(input_shape=INPUT_SHAPE):
+    import tensorflow as tf
+    return tf.TensorSpec([None, *input_shape], tf.float32, name=INPUT_NAME)
+
+
+def trace_serving_function(model, input_shape=INPUT_SHAPE):
+    """Trace the model once with a fixed signature; returns a concrete function."""
+    import tensorflow as tf
+    serve = tf.function(
+        lambda x: model(x, training=False),
+        input_signature=[_input_spec(input_shape)]
+    )
+    return serve.get_concrete_function()
+
+
+def export_saved_model(model, export_dir: Path, input_shape=INPUT_SHAPE) -> Path:
+    """Write a SavedModel whose serving signature maps {"ela"} -> {"score"}."""
+    import tensorflow as tf
+    module = tf.Module()
+    module.model = model
+    module.serve = tf.function(
+        lambda ela: {OUTPUT_NAME: model(ela, training=False)},
+        input_signature=[_input_spec(input_shape)]
+    )
+    tf.saved_model.save(module, str(export_dir), signatures={SIGNATURE_KEY: module.serve})
+    return Path(export_dir)
+
+
+def is_saved_model(path: Path) -> bool:
+    return (Path(path) / "saved_model.pb").exists()
+
+
+class Predictor:
+    """Callable mapping a (N, H, W, C) float batch to an (N, 1) score array."""
+
+    def __init__(self, fn, owner=None, keyword=None):
+        import tensorflow as tf
+
+        self._to_tensor = tf.convert_to_tensor
+        self._fn = fn
+        self._owner = owner  # keeps a loaded SavedModel alive
+        self._keyword = keyword
+
+    def __call__(self, batch) -> np.ndarray:
+        x = self._to_tensor(batch, "float32")
+        if self._keyword is None:
+            out = self._fn(x)
+        else:
+            out = self._fn(**{self._keyword: x})
+        if isinstance(out, dict):
+            out = out[OUTPUT_NAME]
+        return out.numpy()
+
+    @classmethod
+    def from_keras(cls, model, input_shape=INPUT_SHAPE):
+        return cls(trace_serving_function(model, input_shape))
+
+    @classmethod
+    def from_saved_model(cls, export_dir: Path):
+        import tensorflow as tf
+        loaded = tf.saved_model.load(str(export_dir))
+        return cls(loaded.signatures[SIGNATURE_KEY], owner=loaded, keyword=INPUT_NAME)
+
+
+class TFLitePredictor:
+    """
+    Same call interface as Predictor for a .tflite model. Not thread-safe;
+    the serving engine and evaluator call it from a single thread.
+    """
+
+    def __init__(self, model_path: Path, num_threads: int = None):
+        try:
+            from ai_edge_litert.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+
+        self.interpreter = Interpreter(model_path=str(model_path), num_threads=num_threads)
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self._batch_size = None
+
+    def __call__(self, batch) -> np.ndarray:
+        x = np.asarray(batch, dtype=np.float32)
+        if x.shape[0] != self._batch_size:
+            self.interpreter.resize_tensor_input(self._input["index"], list(x.shape))
+            self.interpreter.allocate_tensors()
+            self._batch_size = x.shape[0]
+
+        self.interpreter.set_tensor(self._input["index"], x)
+        self.interpreter.invoke()
+        return self.interpreter.get_tensor(self._output["index"]).copy()
+
+
+def load_predictor(model_path):
+    """Predictor for a SavedModel directory, a .tflite file or a .keras file."""
+    if Path(model_path).suffix == ".tflite":
+        return TFLitePredictor(model_path)
+    if is_saved_model(model_path):
+        return Predictor.from_saved_model(model_path)
+    import tensorflow as tf
+    return Predictor.from_keras(tf.keras.models.load_model(model_path))
+
+
+def resolve_model_artifact(models_dir: Path, backend: str = "auto"):
+    """
+    Pick the serving artifact in `models_dir` for a MODEL_BACKEND value.
+
+    "auto" prefers the fastest quantised variant that deploy promoted
+    (within the accuracy tolerance), then the SavedModel. Returns None when
+    the caller should fall back to its Keras / weights loading path.
+    """
+    models_dir = Path(models_dir)
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown MODEL_BACKEND: {backend} (expected one of {BACKENDS})")
+
+    if backend.startswith("tflite-"):
+        path = models_dir / f"production_model_{backend[len('tflite-'):]}.tflite"
+        if not path.exists():
+            raise FileNotFoundError(f"No {backend} model at {path}")
+        return path
+
+    if backend == "keras":
+        return None
+
+    saved_model_dir = models_dir / SAVED_MODEL_DIRNAME
+    if backend == "savedmodel":
+        if not is_saved_model(saved_model_dir):
+            raise FileNotFoundError(f"No SavedModel at {saved_model_dir}")
+        return saved_model_dir
+
+    report_path = models_dir / QUANTIZATION_REPORT
+    if report_path.exists():
+        variants = json.loads(report_path.read_text()).get("variants", {})
+        promoted = [
+            v for v in variants.values()
+            if v.get("promoted") and (models_dir / v["path"]).exists()
+        ]
+        if promoted:
+            fastest = min(promoted, key=lambda v: v.get("latency_ms", float("inf")))
+            return models_dir / fastest["path"]
+
+    if is_saved_model(saved_model_dir):
+        return saved_model_dir
+    return None
@@ -0,0 +1,142 @@
+"""
+In-memory Error Level Analysis (ELA).
+
+The JPEG recompress / difference / rescale cycle runs entirely on
+io.BytesIO buffers and NumPy arrays, so no temporary files are written.
+Shared by the preprocessing stages and both serving apps.
+
+The difference and rescale run in ela_kernel over cache-sized blocks of a
+preallocated uint8 buffer, so no full-size int16/float32 temporaries are
+created; ela_batch applies it to a stack of same-size images at once.
+"""
+
+import io
+
+import numpy as np
+from PIL import Image
+
+# Elements per block in ela_kernel; the float32 scratch stays in L2 cache
+BLOCK_SIZE = 1 << 16
+
+
+def _decode_rgb(buffer) -> np.ndarray:
+    image = Image.open(buffer)
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    return np.asarray(image)
+
+
+def _jpeg_roundtrip(image: Image.Image, quality: int) -> np.ndarray:
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=quality)
+    buffer.seek(0)
+    return _decode_rgb(buffer)
+
+
+def _ela_pair(image: Image.Image, quality: int, reference_quality: int = None):
+    if reference_quality is None:
+        original = np.asarray(image)
+    else:
+        original = _jpeg_roundtrip(image, reference_quality)
+    return original, _jpeg_roundtrip(image, quality)
+
+
+def ela_kernel(original: np.ndarray, compressed: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+    """
+    |original - compressed| rescaled so its maximum maps to 255.
+
+    Both inputs are uint8 arrays of the same shape; a leading batch axis is
+    allowed, in which case every image is scaled by its own maximum. The
+    result is written into `out` (allocated if None) and is byte-identical
+    to ImageChops.difference followed by ImageEnhance.Brightness.
+    """
+    if out is None:
+        out = np.empty(original.shape, dtype=np.uint8)
+    batched = original.ndim == 4
+    images = out.reshape(len(out) if batched else 1, -1)
+    orig = original.reshape(images.shape)
+    comp = compressed.reshape(images.shape)
+
+    low = np.empty(min(BLOCK_SIZE, images.shape[1]), dtype=np.uint8)
+    scaled = np.empty(low.shape, dtype=np.float32)
+
+    for dst, a, b in zip(images, orig, comp):
+        max_diff = 0
+        for start in range(0, dst.size, BLOCK_SIZE):
+            block = dst[start:start + BLOCK_SIZE]
+            lo = low[:block.size]
+            # min first: `out` may alias `original`
+            np.minimum(a[start:start + BLOCK_SIZE], b[start:start + BLOCK_SIZE], out=lo)
+            np.maximum(a[start:start + BLOCK_SIZE], b[start:start + BLOCK_SIZE], out=block)
+            np.subtract(block, lo, out=block)
+            max_diff = max(max_diff, int(block.max()))
+
+        max_diff = max_diff or 1
+        if max_diff == 255:
+            continue
+
+        # Same float32 multiply-and-truncate as ImageEnhance.Brightness
+        scale = np.float32(255.0 / max_diff)
+        for start in range(0, dst.size, BLOCK_SIZE):
+            block = dst[start:start + BLOCK_SIZE]
+            s = scaled[:block.size]
+            np.multiply(block, scale, out=s)
+            np.minimum(s, 255.0, out=s)
+            block[...] = s
+
+    return out
+
+
+def resize_ela(ela: np.ndarray, size) -> np.ndarray:
+    """Resize a uint8 (H, W, 3) ELA array to (width, height) the way PIL's Image.resize does."""
+    return np.asarray(Image.fromarray(ela, "RGB").resize(tuple(size)))
+
+
+def ela_array(image: Image.Image, quality: int = 90, reference_quality: int = None, size=None) -> np.ndarray:
+    """
+    Compute the ELA of an RGB image as a uint8 (H, W, 3) array.
+
+    Args:
+        image: RGB PIL image
+        quality: JPEG quality used for the recompressed copy
+        reference_quality: if set, the image is first re-encoded at this
+            quality and that copy is used as the reference (serving path);
+            otherwise the image itself is the reference (preprocessing path)
+        size: optional (width, height); the ELA is resized before being
+            returned, same as ela_image(...).resize(size)
+    """
+    original, compressed = _ela_pair(image, quality, reference_quality)
+    ela = ela_kernel(original, compressed)
+    return ela if size is None else resize_ela(ela, size)
+
+
+def ela_batch(images, quality: int = 90, reference_quality: int = None, size=None) -> np.ndarray:
+    """
+    ela_array for a sequence of same-size RGB images, as a uint8
+    (N, H, W, 3) array. Each image's difference and rescale are written
+    straight into its slot of one preallocated stack.
+    """
+    images = list(images)
+    if not images:
+        raise ValueError("ela_batch needs at least one image")
+    if len({image.size for image in images}) != 1:
+        raise ValueError("ela_batch needs images of the same size")
+
+    width, height = images[0].size
+    ela = np.empty((len(images), height, width, 3), dtype=np.uint8)
+    for i, image in enumerate(images):
+        ela_kernel(*_ela_pair(image, quality, reference_quality), out=ela[i])
+
+    if size is None:
+        return ela
+    return np.stack([resize_ela(frame, size) for frame in ela])
+
+
+def ela_image(image: Image.Image, quality: int = 90, reference_quality: int = None) -> Image.Image:
+    """Same as ela_array, returned as an RGB PIL image."""
+    return Image.fromarray(ela_array(image, quality, reference_quality), "RGB")
+
+
+def ela_transform(image: Image.Image, quality=90):
+    """Generate the serving-side ELA image (q=100 reference vs q=quality copy)."""
+    return ela_image(image, quality=quality, reference_quality=100)
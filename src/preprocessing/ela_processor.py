@@ -1,16 +1,56 @@
 from pathlib import Path
-from PIL import Image, ImageChops, ImageEnhance
+from concurrent.futures import ProcessPoolExecutor
+import os
+from PIL import Image
+from src.data_ingestion.data_ingestor import ThroughputMeter
+from src.preprocessing.ela import ela_image
+from src.preprocessing.manifest import StageManifest
+from src.profiling.profiler import pool_map, profile_function
+
+
+@profile_function("ELAProcessor._generate_ela")
+def _generate_ela_file(image_path: Path, save_path: Path, quality: int):
+    original = Image.open(image_path).convert("RGB")
+    ela = ela_image(original, quality=quality)
+    ela.save(save_path, "JPEG")
+
+
+def _ela_task(task):
+    """Process-pool entry point. Intermediate data stays in this worker's memory."""
+    image_path, save_path, quality = task
+    try:
+        _generate_ela_file(image_path, save_path, quality)
+        return image_path, None
+    except Exception as e:
+        return image_path, f"{type(e).__name__}: {e}"
 
 
 class ELAProcessor:
     """
     Generates Error Level Analysis (ELA) images for forgery detection.
+
+    With workers > 1 images are processed in a process pool; tasks are
+    submitted in chunks of `chunksize` and results are collected in input
+    order, so counts and the error report are the same for any worker count.
+
+    With incremental=True, a manifest in the output dir lets reruns skip
+    unchanged images and delete outputs whose sources are gone.
+
+    Failed images are listed in `errors`; with strict=True (default)
+    process() raises after the report so the step fails instead of
+    handing an incomplete dataset to training.
     """
 
-    def __init__(self, input_dir: Path, output_dir: Path, quality: int = 90):
+    def __init__(self, input_dir: Path, output_dir: Path, quality: int = 90,
+                 workers: int = 1, chunksize: int = 32, incremental: bool = True, strict: bool = True):
         self.input_dir = input_dir
         self.output_dir = output_dir
         self.quality = quality
+        self.workers = workers or os.cpu_count() or 1
+        self.chunksize = chunksize
+        self.incremental = incremental
+        self.strict = strict
+        self.errors = []
 
     def _prepare_folders(self):
         self.output_dir.mkdir(parents=True, exist_ok=True)
@@ -19,39 +59,66 @@ class ELAProcessor:
                 (self.output_dir / class_dir.name).mkdir(exist_ok=True)
 
     def _generate_ela(self, image_path: Path, save_path: Path):
-        original = Image.open(image_path).convert("RGB")
-
-        temp_path = save_path.parent / "temp.jpg"
-        original.save(temp_path, "JPEG", quality=self.quality)
-
-        compressed = Image.open(temp_path)
-
-        ela = ImageChops.difference(original, compressed)
-
-        extrema = ela.getextrema()
-        max_diff = max([e[1] for e in extrema]) or 1
+        _generate_ela_file(image_path, save_path, self.quality)
 
-        scale = 255.0 / max_diff
-        ela = ImageEnhance.Brightness(ela).enhance(scale)
-
-        ela.save(save_path, "JPEG")
-        temp_path.unlink()
-
-    def process(self) -> Path:
-        self._prepare_folders()
-
-        count = 0
-        for class_dir in self.input_dir.iterdir():
+    def _collect_tasks(self):
+        tasks = []
+        for class_dir in sorted(self.input_dir.iterdir()):
             if not class_dir.is_dir():
                 continue
 
-            for img_file in class_dir.iterdir():
+            for img_file in sorted(class_dir.iterdir()):
                 if not img_file.is_file():
                     continue
 
                 out_file = self.output_dir / class_dir.name / img_file.name
-                self._generate_ela(img_file, out_file)
-                count += 1
+                tasks.append((img_file, out_file, self.quality))
+        return tasks
+
+    def _key(self, image_path: Path) -> str:
+        return image_path.relative_to(self.input_dir).as_posix()
+
+    def process(self) -> Path:
+        self._prepare_folders()
+        tasks = self._collect_tasks()
+
+        manifest = None
+        skipped = 0
+        if self.incremental:
+            seen = {self._key(image_path) for image_path, _, _ in tasks}
+            manifest = StageManifest(self.output_dir, {"stage": "ela", "quality": self.quality})
+            pending = [task for task in tasks if not manifest.is_current(self._key(task[0]), task[0])]
+            skipped = len(tasks) - len(pending)
+            tasks = pending
+
+        meter = ThroughputMeter("ela")
+        if self.workers > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                results = list(pool_map(pool, _ela_task, tasks, chunksize=self.chunksize))
+        else:
+            results = [_ela_task(task) for task in tasks]
+
+        self.errors = [(path, error) for path, error in results if error is not None]
+        count = len(results) - len(self.errors)
+        for image_path, _, _ in tasks:
+            meter.add(image_path.stat().st_size)
 
         print(f"--Generated ELA images: {count}")
+        if self.errors:
+            print(f"--Failed ELA images: {len(self.errors)}")
+            for path, error in self.errors:
+                print(f"   {path}: {error}")
+
+        if manifest is not None:
+            for (image_path, out_file, _), (_, error) in zip(tasks, results):
+                if error is None:
+                    manifest.record(self._key(image_path), image_path, out_file)
+            deleted = manifest.prune(seen)
+            manifest.save()
+            print(f"--Skipped unchanged: {skipped}")
+            print(f"--Deleted stale outputs: {deleted}")
+
+        self.throughput = meter.report()
+        if self.strict and self.errors:
+            raise RuntimeError(f"ELA failed for {len(self.errors)} images")
         return self.output_dir
@@ -0,0 +1,182 @@
+"""
+Sharded binary format for ELA datasets.
+
+Packs an ELA class-folder dataset into fixed-size shards of already
+resized uint8 tensors:
+
+    shard-00000.images.npy   uint8 (N, H, W, 3)
+    shard-00000.labels.npy   uint8 (N,)
+    index.json               class names, image size, per-shard counts
+                             and source ids (relative paths)
+
+Shards are plain .npy files, so readers get bulk sequential I/O and can
+memory-map them (np.load(mmap_mode="r")). index.json is written last; its
+presence marks a complete shard set.
+
+Images are resized like tf.image.resize(..., "bilinear") (half-pixel
+centres, no antialiasing), which is what image_dataset_from_directory
+does, then rounded to uint8; so shard pixels are within 0.5 of what the
+directory loader produces. Serving resizes with PIL (resize_ela) and is
+not affected.
+"""
+
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+import json
+import os
+
+import numpy as np
+from PIL import Image
+
+INDEX_FILENAME = "index.json"
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+
+def resize_bilinear(image: np.ndarray, size) -> np.ndarray:
+    """
+    Resize an (H, W, C) array to (width, height) with the semantics of
+    tf.image.resize(method="bilinear", antialias=False), without
+    importing TensorFlow. Returns float32.
+    """
+    width, height = size
+    src_h, src_w = image.shape[:2]
+
+    def axis(out_size, in_size):
+        centres = (np.arange(out_size, dtype=np.float64) + 0.5) * (in_size / out_size) - 0.5
+        floor = np.floor(centres)
+        lower = np.clip(floor, 0, in_size - 1).astype(np.intp)
+        upper = np.clip(np.ceil(centres), 0, in_size - 1).astype(np.intp)
+        return lower, upper, (centres - floor).astype(np.float32)
+
+    top, bottom, dy = axis(height, src_h)
+    left, right, dx = axis(width, src_w)
+    image = image.astype(np.float32)
+    dx = dx[None, :, None]
+
+    def lerp_columns(rows):
+        return rows[:, left] + (rows[:, right] - rows[:, left]) * dx
+
+    upper_rows, lower_rows = lerp_columns(image[top]), lerp_columns(image[bottom])
+    return upper_rows + (lower_rows - upper_rows) * dy[:, None, None]
+
+
+def _load_resized(task):
+    image_path, image_size = task
+    try:
+        image = np.asarray(Image.open(image_path).convert("RGB"))
+        resized = resize_bilinear(image, image_size)
+        return np.clip(np.rint(resized), 0, 255).astype(np.uint8), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+
+def is_shard_dir(path) -> bool:
+    return (Path(path) / INDEX_FILENAME).exists()
+
+
+def load_shard_index(shard_dir: Path) -> dict:
+    return json.loads((Path(shard_dir) / INDEX_FILENAME).read_text())
+
+
+def iter_shards(shard_dir: Path, mmap: bool = True):
+    """Yield (images, labels, sources) per shard; arrays are memory-mapped by default."""
+    shard_dir = Path(shard_dir)
+    mode = "r" if mmap else None
+    for shard in load_shard_index(shard_dir)["shards"]:
+        images = np.load(shard_dir / shard["images"], mmap_mode=mode)
+        labels = np.load(shard_dir / shard["labels"], mmap_mode=mode)
+        yield images, labels, shard["sources"]
+
+
+class ELAShardWriter:
+    """
+    Writes an ELA dataset (one sub-folder per class) as fixed-size shards.
+    Class indices follow sorted folder names, like image_dataset_from_directory.
+    With strict=True (default) any unreadable image makes write() raise
+    before index.json is written, so the shard set is never marked complete.
+    """
+
+    def __init__(self, input_dir: Path, output_dir: Path, shard_size: int = 1024,
+                 image_size=(224, 224), workers: int = 1, strict: bool = True):
+        self.input_dir = input_dir
+        self.output_dir = output_dir
+        self.shard_size = shard_size
+        self.image_size = tuple(image_size)
+        self.workers = workers or os.cpu_count() or 1
+        self.strict = strict
+        self.errors = []
+
+    def _collect(self):
+        class_names = sorted(d.name for d in self.input_dir.iterdir() if d.is_dir())
+        items = []
+        for label, class_name in enumerate(class_names):
+            for img_file in sorted((self.input_dir / class_name).iterdir()):
+                if img_file.is_file() and img_file.suffix.lower() in IMAGE_EXTENSIONS:
+                    items.append((img_file, label))
+        return class_names, items
+
+    def _load_all(self, items):
+        tasks = [(path, self.image_size) for path, _ in items]
+        if self.workers > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                yield from pool.map(_load_resized, tasks, chunksize=32)
+        else:
+            yield from map(_load_resized, tasks)
+
+    def write(self) -> Path:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        (self.output_dir / INDEX_FILENAME).unlink(missing_ok=True)
+        for old_shard in self.output_dir.glob("shard-*.npy"):
+            old_shard.unlink()
+
+        class_names, items = self._collect()
+        height, width = self.image_size[1], self.image_size[0]
+
+        shards = []
+        images, labels, sources = [], [], []
+
+        def flush():
+            name = f"shard-{len(shards):05d}"
+            np.save(self.output_dir / f"{name}.images.npy", np.stack(images))
+            np.save(self.output_dir / f"{name}.labels.npy", np.asarray(labels, dtype=np.uint8))
+            shards.append({
+                "images": f"{name}.images.npy",
+                "labels": f"{name}.labels.npy",
+                "count": len(labels),
+                "sources": list(sources)
+            })
+            images.clear()
+            labels.clear()
+            sources.clear()
+
+        self.errors = []
+        for (path, label), (arr, error) in zip(items, self._load_all(items)):
+            if error is not None:
+                self.errors.append((path, error))
+                continue
+            images.append(arr)
+            labels.append(label)
+            sources.append(path.relative_to(self.input_dir).as_posix())
+            if len(labels) == self.shard_size:
+                flush()
+        if labels:
+            flush()
+
+        if self.errors:
+            print(f"--Failed images: {len(self.errors)}")
+            for path, error in self.errors:
+                print(f"   {path}: {error}")
+            if self.strict:
+                raise RuntimeError(f"Shard packing failed for {len(self.errors)} images")
+
+        index = {
+            "class_names": class_names,
+            "image_size": [height, width],
+            "shard_size": self.shard_size,
+            "count": sum(s["count"] for s in shards),
+            "shards": shards
+        }
+        (self.output_dir / INDEX_FILENAME).write_text(json.dumps(index, indent=2))
+
+        print(f"--Packed images: {index['count']} into {len(shards)} shards")
+        return self.output_dir
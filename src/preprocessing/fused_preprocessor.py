@@ -0,0 +1,192 @@
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import io
+import os
+from PIL import Image
+from src.data_ingestion.data_ingestor import ThroughputMeter
+from src.preprocessing.ela import ela_image
+from src.preprocessing.manifest import StageManifest
+from src.profiling.profiler import pool_map, profile_function
+
+
+@profile_function()
+def _fused_task(task):
+    """
+    Process-pool entry point: decode + validate, clean-encode in memory,
+    optionally write the cleaned copy, then ELA from the in-memory image.
+    Returns "ok", "rejected" (not a readable image) or an error message.
+    """
+    source, clean_path, ela_path, quality, clean_quality, exact = task
+    try:
+        image = Image.open(io.BytesIO(source) if isinstance(source, bytes) else source)
+        image = image.convert("RGB")
+    except Exception:
+        return "rejected"
+
+    try:
+        cleaned = io.BytesIO()
+        image.save(cleaned, "JPEG", quality=clean_quality)
+        if clean_path is not None:
+            clean_path.write_bytes(cleaned.getvalue())
+
+        if exact:
+            # The two-stage path runs ELA on the decoded cleaned JPEG
+            cleaned.seek(0)
+            image = Image.open(cleaned).convert("RGB")
+
+        ela_image(image, quality=quality).save(ela_path, "JPEG")
+        return "ok"
+    except Exception as e:
+        return f"{type(e).__name__}: {e}"
+
+
+class FusedPreprocessor:
+    """
+    Cleans and generates ELA images in one pass per image.
+
+    Replaces ImageCleaner followed by ELAProcessor: the source is decoded
+    and validated once, the cleaned q=95 JPEG is produced in memory (and
+    written to `clean_dir` only if given), and the ELA image is computed
+    from memory without re-reading the cleaned file.
+
+    exact=True (default) decodes the in-memory cleaned JPEG before ELA, so
+    outputs are byte-identical to the two-stage path. exact=False runs ELA
+    on the decoded source directly (one decode fewer, slightly different
+    output).
+
+    Unreadable sources are dropped like ImageCleaner does; any other
+    failure is listed in `errors` and, with strict=True (default), makes
+    the run raise after the report.
+    """
+
+    def __init__(self, input_dir: Path, ela_dir: Path, clean_dir: Path = None, quality: int = 90,
+                 clean_quality: int = 95, exact: bool = True, workers: int = 1, chunksize: int = 32,
+                 incremental: bool = True, strict: bool = True):
+        self.input_dir = input_dir
+        self.ela_dir = ela_dir
+        self.clean_dir = clean_dir
+        self.quality = quality
+        self.clean_quality = clean_quality
+        self.exact = exact
+        self.workers = workers or os.cpu_count() or 1
+        self.chunksize = chunksize
+        self.incremental = incremental
+        self.strict = strict
+        self.errors = []
+
+    def _manifest(self):
+        if not self.incremental:
+            return None
+        params = {"stage": "fused", "quality": self.quality, "clean_quality": self.clean_quality,
+                  "exact": self.exact, "clean": self.clean_dir is not None}
+        mirrors = [self.clean_dir] if self.clean_dir is not None else []
+        return StageManifest(self.ela_dir, params, mirror_dirs=mirrors)
+
+    def _outputs(self, class_name: str, filename: str):
+        name = Path(filename).stem + ".jpg"
+        for base in filter(None, (self.ela_dir, self.clean_dir)):
+            (base / class_name).mkdir(parents=True, exist_ok=True)
+        clean_path = self.clean_dir / class_name / name if self.clean_dir is not None else None
+        return clean_path, self.ela_dir / class_name / name
+
+    def _batches(self, sources, manifest, counts, seen):
+        """Group sources needing work into batches so streamed bytes are not all held at once."""
+        batch = []
+        for key, class_name, filename, source, size, mtime_ns, hash_fn in sources:
+            seen.add(key)
+            if manifest is not None and manifest.is_current_info(key, size, mtime_ns, hash_fn):
+                counts["skipped"] += 1
+                continue
+            clean_path, ela_path = self._outputs(class_name, filename)
+            payload = source() if callable(source) else source
+            batch.append(((payload, clean_path, ela_path, self.quality, self.clean_quality, self.exact),
+                          key, size, mtime_ns, hash_fn))
+            if len(batch) >= self.workers * self.chunksize * 4:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _run(self, sources, manifest):
+        """
+        sources: (key, class_name, filename, source, size, mtime_ns, hash_fn)
+        where source is a Path or a callable returning the bytes.
+        """
+        meter = ThroughputMeter("fused")
+        counts = {"processed": 0, "removed": 0, "skipped": 0}
+        seen = set()
+        self.errors = []
+
+        pool = ProcessPoolExecutor(max_workers=self.workers) if self.workers > 1 else None
+        try:
+            for batch in self._batches(sources, manifest, counts, seen):
+                tasks = [task for task, *_ in batch]
+                if pool is not None and len(tasks) > 1:
+                    results = pool_map(pool, _fused_task, tasks, chunksize=self.chunksize)
+                else:
+                    results = map(_fused_task, tasks)
+
+                for (task, key, size, mtime_ns, hash_fn), status in zip(batch, results):
+                    meter.add(size)
+                    if status == "ok":
+                        counts["processed"] += 1
+                    elif status == "rejected":
+                        counts["removed"] += 1
+                    else:
+                        self.errors.append((key, status))
+                        continue
+                    if manifest is not None:
+                        manifest.record_info(key, size, mtime_ns, hash_fn(), task[2] if status == "ok" else None)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        processed, removed, skipped = counts["processed"], counts["removed"], counts["skipped"]
+        print(f"--Processed images: {processed}")
+        print(f"--Removed corrupted: {removed}")
+        if self.errors:
+            print(f"--Failed images: {len(self.errors)}")
+            for key, error in self.errors:
+                print(f"   {key}: {error}")
+
+        if manifest is not None:
+            deleted = manifest.prune(seen)
+            manifest.save()
+            print(f"--Skipped unchanged: {skipped}")
+            print(f"--Deleted stale outputs: {deleted}")
+
+        self.throughput = meter.report()
+        if self.strict and self.errors:
+            raise RuntimeError(f"Preprocessing failed for {len(self.errors)} images")
+        return self.ela_dir
+
+    def process(self) -> Path:
+        """Fused stage over an extracted dataset (one sub-folder per class)."""
+        self.ela_dir.mkdir(parents=True, exist_ok=True)
+
+        def sources():
+            for class_dir in sorted(self.input_dir.iterdir()):
+                if not class_dir.is_dir():
+                    continue
+                for img_file in sorted(class_dir.iterdir()):
+                    if not img_file.is_file():
+                        continue
+                    stat = img_file.stat()
+                    yield (f"{class_dir.name}/{img_file.name}", class_dir.name, img_file.name, img_file,
+                           stat.st_size, stat.st_mtime_ns,
+                           lambda path=img_file: StageManifest.file_hash(path))
+
+        return self._run(sources(), self._manifest())
+
+    def process_stream(self, members) -> Path:
+        """Fused stage over archive members (see ZipStreamIngestor)."""
+        self.ela_dir.mkdir(parents=True, exist_ok=True)
+
+        def sources():
+            for member in members:
+                yield (f"{member.class_name}/{member.filename}", member.class_name, member.filename,
+                       member.read, member.size, member.mtime_ns,
+                       lambda m=member: hashlib.sha256(m.read()).hexdigest())
+
+        return self._run(sources(), self._manifest())
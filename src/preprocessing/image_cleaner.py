@@ -1,6 +1,11 @@
 from pathlib import Path
 from PIL import Image
+import hashlib
+import io
 import shutil
+from src.data_ingestion.data_ingestor import ThroughputMeter
+from src.preprocessing.manifest import StageManifest
+from src.profiling.profiler import profile_function
 
 
 class ImageCleaner:
@@ -8,11 +13,17 @@ class ImageCleaner:
     Cleans and validates image datasets.
     Converts all images to RGB JPEG.
     Removes corrupted files.
+
+    With incremental=True, a manifest in the output dir lets reruns skip
+    unchanged images and delete outputs whose sources are gone.
+    clean_stream() takes archive members (see ZipStreamIngestor) instead of
+    an extracted directory.
     """
 
-    def __init__(self, input_dir: Path, output_dir: Path):
+    def __init__(self, input_dir: Path, output_dir: Path, incremental: bool = True):
         self.input_dir = input_dir
         self.output_dir = output_dir
+        self.incremental = incremental
 
     def _prepare_folders(self):
         self.output_dir.mkdir(parents=True, exist_ok=True)
@@ -20,7 +31,8 @@ class ImageCleaner:
             if class_dir.is_dir():
                 (self.output_dir / class_dir.name).mkdir(exist_ok=True)
 
-    def _process_image(self, image_path: Path, save_path: Path) -> bool:
+    @profile_function()
+    def _process_image(self, image_path, save_path: Path) -> bool:
         try:
             img = Image.open(image_path)
             img = img.convert("RGB")
@@ -29,10 +41,32 @@ class ImageCleaner:
         except Exception:
             return False
 
+    def _manifest(self):
+        if not self.incremental:
+            return None
+        return StageManifest(self.output_dir, {"stage": "clean", "quality": 95})
+
+    def _finish(self, manifest, seen, processed, removed, skipped, meter):
+        print(f"--Processed images: {processed}")
+        print(f"--Removed corrupted: {removed}")
+
+        if manifest is not None:
+            deleted = manifest.prune(seen)
+            manifest.save()
+            print(f"--Skipped unchanged: {skipped}")
+            print(f"--Deleted stale outputs: {deleted}")
+
+        self.throughput = meter.report()
+        return self.output_dir
+
     def clean(self) -> Path:
         self._prepare_folders()
+        manifest = self._manifest()
+        meter = ThroughputMeter("clean")
+        seen = set()
         removed = 0
         processed = 0
+        skipped = 0
 
         for class_dir in self.input_dir.iterdir():
             if not class_dir.is_dir():
@@ -43,14 +77,65 @@ class ImageCleaner:
                     continue
 
                 target = self.output_dir / class_dir.name / (img_file.stem + ".jpg")
+                key = f"{class_dir.name}/{img_file.name}"
+                seen.add(key)
+
+                if manifest is not None and manifest.is_current(key, img_file):
+                    skipped += 1
+                    continue
 
                 success = self._process_image(img_file, target)
+                meter.add(img_file.stat().st_size)
                 if success:
                     processed += 1
                 else:
                     removed += 1
 
-        print(f"--Processed images: {processed}")
-        print(f"--Removed corrupted: {removed}")
+                if manifest is not None:
+                    manifest.record(key, img_file, target if success else None)
 
-        return self.output_dir
+        return self._finish(manifest, seen, processed, removed, skipped, meter)
+
+    def clean_stream(self, members) -> Path:
+        """
+        Clean archive members read straight from their byte buffers, so the
+        dataset is never extracted to disk first.
+        """
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        manifest = self._manifest()
+        meter = ThroughputMeter("clean")
+        class_dirs = set()
+        seen = set()
+        removed = 0
+        processed = 0
+        skipped = 0
+
+        for member in members:
+            if member.class_name not in class_dirs:
+                (self.output_dir / member.class_name).mkdir(exist_ok=True)
+                class_dirs.add(member.class_name)
+
+            target = self.output_dir / member.class_name / (Path(member.filename).stem + ".jpg")
+            key = f"{member.class_name}/{member.filename}"
+            seen.add(key)
+
+            def content_hash():
+                return hashlib.sha256(member.read()).hexdigest()
+
+            if manifest is not None and manifest.is_current_info(key, member.size, member.mtime_ns, content_hash):
+                skipped += 1
+                continue
+
+            data = member.read()
+            success = self._process_image(io.BytesIO(data), target)
+            meter.add(len(data))
+            if success:
+                processed += 1
+            else:
+                removed += 1
+
+            if manifest is not None:
+                manifest.record_info(key, member.size, member.mtime_ns, content_hash(),
+                                     target if success else None)
+
+        return self._finish(manifest, seen, processed, removed, skipped, meter)
@@ -0,0 +1,127 @@
+from pathlib import Path
+import hashlib
+import json
+import os
+
+
+class StageManifest:
+    """
+    Persistent index of the outputs a preprocessing stage has produced.
+
+    Stored as JSON in the stage's output dir. Each entry is keyed by the
+    source path (relative to the stage input) and records size, mtime,
+    content hash and the output written for it. A source whose size and
+    mtime are unchanged is up to date; if only the mtime moved, the
+    content hash decides. Changing `params` (e.g. ELA quality) invalidates
+    every entry. `mirror_dirs` hold secondary outputs stored under the same
+    relative path (e.g. the cleaned copy written by the fused stage); they
+    are deleted together with the primary output.
+    """
+
+    FILENAME = ".manifest.json"
+    VERSION = 1
+
+    def __init__(self, output_dir: Path, params: dict = None, mirror_dirs=()):
+        self.path = output_dir / self.FILENAME
+        self.output_dir = output_dir
+        self.mirror_dirs = [Path(d) for d in mirror_dirs]
+        self.params = params or {}
+        self.entries = {}
+        self._load()
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            print(f"--Ignoring unreadable manifest: {self.path}")
+            return
+        if data.get("version") == self.VERSION and data.get("params") == self.params:
+            self.entries = data.get("entries", {})
+
+    @staticmethod
+    def file_hash(path: Path) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def is_current(self, key: str, source: Path) -> bool:
+        stat = source.stat()
+        return self.is_current_info(key, stat.st_size, stat.st_mtime_ns, lambda: self.file_hash(source))
+
+    def is_current_info(self, key: str, size: int, mtime_ns: int, hash_fn) -> bool:
+        """
+        Same check for sources that are not plain files (e.g. archive
+        members); hash_fn is only called when size matches but mtime moved.
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            return False
+
+        output = entry["output"]
+        if output is not None and not (self.output_dir / output).exists():
+            return False
+
+        if size != entry["size"]:
+            return False
+        if mtime_ns == entry["mtime_ns"]:
+            return True
+
+        # Touched but possibly unchanged (e.g. re-extracted from the zip)
+        if hash_fn() == entry["sha256"]:
+            entry["mtime_ns"] = mtime_ns
+            return True
+        return False
+
+    def record(self, key: str, source: Path, output: Path = None):
+        """Record a processed source. output=None marks a rejected source."""
+        stat = source.stat()
+        self.record_info(key, stat.st_size, stat.st_mtime_ns, self.file_hash(source), output)
+
+    def record_info(self, key: str, size: int, mtime_ns: int, sha256: str, output: Path = None):
+        previous = self.entries.get(key)
+        if output is None and previous is not None and previous["output"] is not None:
+            self._delete_output(previous["output"])
+
+        self.entries[key] = {
+            "size": size,
+            "mtime_ns": mtime_ns,
+            "sha256": sha256,
+            "output": None if output is None else output.relative_to(self.output_dir).as_posix(),
+        }
+
+    def prune(self, seen_keys) -> int:
+        """Drop entries whose source is gone and delete their outputs."""
+        stale = [key for key in self.entries if key not in seen_keys]
+        live_outputs = {self.entries[key]["output"] for key in seen_keys if key in self.entries}
+
+        removed = 0
+        for key in stale:
+            output = self.entries.pop(key)["output"]
+            if output is None or output in live_outputs:
+                continue
+            if self._delete_output(output):
+                removed += 1
+        return removed
+
+    def _delete_output(self, output: str) -> bool:
+        deleted = False
+        for base in [self.output_dir, *self.mirror_dirs]:
+            output_path = base / output
+            if output_path.exists():
+                output_path.unlink()
+                deleted = deleted or base == self.output_dir
+        return deleted
+
+    def save(self):
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps({
+            "version": self.VERSION,
+            "params": self.params,
+            "entries": self.entries,
+        }))
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,278 @@
+"""
+Opt-in profiling for the pipeline steps and their hot functions.
+
+Off unless PIPELINE_PROFILE=1; when off, the hooks below only check a flag.
+
+    profile_step(name)      wraps a whole ZenML step; on exit its records
+                            are printed, logged to MLflow and reset
+    profile_stage(name)     one timed stage inside a step (dataset
+                            loading, one fit epoch, ...)
+    profile_function(name)  decorator aggregating every call of a hot
+                            function (_process_image, ELA generation, ...)
+
+Each stage records wall time, CPU time of this process and of finished
+child processes (process pools), the process's peak RSS so far, and
+items/sec when it knows how many items it handled. Functions record
+calls, wall and CPU time. Calls made in process-pool workers are counted
+too when the pool is driven through pool_map(), which ships each worker's
+function stats back to the parent.
+
+With PIPELINE_PROFILE_CPROFILE=1 each step also runs under cProfile and
+writes <PIPELINE_PROFILE_DIR>/<step>.prof (pstats format; snakeviz,
+`python -m pstats`). For native frames and worker processes, run the
+pipeline under `py-spy record --subprocesses` instead.
+"""
+
+import cProfile
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _cpu_seconds():
+    own = time.process_time()
+    if resource is None:
+        return own, 0.0
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own, children.ru_utime + children.ru_stime
+
+
+def peak_rss_mb():
+    """High-water mark of this process's resident memory, in MB."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+class StageRecord:
+    def __init__(self, name: str, items: int = None, step: int = None):
+        self.name = name
+        self.items = items
+        self.step = step
+        self._start = time.perf_counter()
+        self._cpu, self._children_cpu = _cpu_seconds()
+        self.stats = None
+
+    def add(self, items: int = 1):
+        self.items = (self.items or 0) + items
+
+    def finish(self) -> dict:
+        wall = time.perf_counter() - self._start
+        cpu, children_cpu = _cpu_seconds()
+        self.stats = {
+            "wall_seconds": round(wall, 4),
+            "cpu_seconds": round(cpu - self._cpu, 4),
+            "children_cpu_seconds": round(children_cpu - self._children_cpu, 4),
+            "peak_rss_mb": peak_rss_mb(),
+        }
+        if self.items is not None:
+            self.stats["items"] = self.items
+            self.stats["items_per_sec"] = round(self.items / max(wall, 1e-9), 2)
+        return self.stats
+
+
+class PipelineProfiler:
+    def __init__(self, enabled: bool = False, cprofile: bool = False, output_dir: Path = Path("profiles")):
+        self.enabled = enabled
+        self.cprofile = cprofile
+        self.output_dir = Path(output_dir)
+        self.stages = []
+        self.functions = {}
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    @classmethod
+    def from_env(cls):
+        """PIPELINE_PROFILE, PIPELINE_PROFILE_CPROFILE (0/1), PIPELINE_PROFILE_DIR."""
+        return cls(
+            enabled=os.environ.get("PIPELINE_PROFILE", "0") == "1",
+            cprofile=os.environ.get("PIPELINE_PROFILE_CPROFILE", "0") == "1",
+            output_dir=Path(os.environ.get("PIPELINE_PROFILE_DIR", "profiles"))
+        )
+
+    @contextmanager
+    def stage(self, name: str, items: int = None, step: int = None):
+        if not self.enabled:
+            yield StageRecord(name, items, step)
+            return
+        record = StageRecord(name, items, step)
+        try:
+            yield record
+        finally:
+            record.finish()
+            with self._lock:
+                self.stages.append(record)
+
+    def record_call(self, name: str, wall: float, cpu: float):
+        with self._lock:
+            calls, total_wall, total_cpu = self.functions.get(name, (0, 0.0, 0.0))
+            self.functions[name] = (calls + 1, total_wall + wall, total_cpu + cpu)
+
+    def take_functions(self) -> dict:
+        """Return and clear the function stats recorded so far ({name: (calls, wall, cpu)})."""
+        with self._lock:
+            functions, self.functions = self.functions, {}
+        return functions
+
+    def merge_functions(self, functions: dict):
+        """Add function stats recorded elsewhere (e.g. in a pool worker)."""
+        with self._lock:
+            for name, (calls, wall, cpu) in functions.items():
+                total_calls, total_wall, total_cpu = self.functions.get(name, (0, 0.0, 0.0))
+                self.functions[name] = (total_calls + calls, total_wall + wall, total_cpu + cpu)
+
+    def begin_worker(self):
+        """In a forked pool worker, drop the records inherited from the parent (once)."""
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self.reset()
+
+    def report(self) -> dict:
+        with self._lock:
+            stages = [{"stage": r.name, **({"step": r.step} if r.step is not None else {}), **r.stats}
+                      for r in self.stages]
+            functions = {
+                name: {
+                    "calls": calls,
+                    "wall_seconds": round(wall, 4),
+                    "cpu_seconds": round(cpu, 4),
+                    "items_per_sec": round(calls / max(wall, 1e-9), 2)
+                }
+                for name, (calls, wall, cpu) in self.functions.items()
+            }
+        return {"stages": stages, "functions": functions}
+
+    def reset(self):
+        with self._lock:
+            self.stages = []
+            self.functions = {}
+
+    def print_report(self, report: dict):
+        for stage in report["stages"]:
+            rate = f", {stage['items_per_sec']:.1f} items/s" if "items_per_sec" in stage else ""
+            step = f"[{stage['step']}]" if "step" in stage else ""
+            print(f"[PROFILE] {stage['stage']}{step}: {stage['wall_seconds']:.2f}s wall, "
+                  f"{stage['cpu_seconds'] + stage['children_cpu_seconds']:.2f}s CPU, "
+                  f"peak RSS {stage['peak_rss_mb']} MB{rate}")
+        for name, fn in report["functions"].items():
+            print(f"[PROFILE] {name}(): {fn['calls']} calls, {fn['wall_seconds']:.2f}s wall, "
+                  f"{fn['items_per_sec']:.1f} calls/s")
+
+    def log_to_mlflow(self, report: dict, artifacts=()):
+        """Stage/function stats as MLflow metrics, the report files as artifacts."""
+        try:
+            import mlflow
+        except ImportError:
+            print("[PROFILE] mlflow not installed; profile not logged")
+            return
+
+        metrics = {}
+        for stage in report["stages"]:
+            prefix = f"profile.{stage['stage']}"
+            for key, value in stage.items():
+                if key not in ("stage", "step") and value is not None:
+                    metrics.setdefault(stage.get("step", 0), {})[f"{prefix}.{key}"] = value
+        for name, fn in report["functions"].items():
+            for key, value in fn.items():
+                metrics.setdefault(0, {})[f"profile.fn.{name}.{key}"] = value
+        try:
+            for step, values in metrics.items():
+                mlflow.log_metrics(values, step=step)
+            for path in artifacts:
+                mlflow.log_artifact(str(path), artifact_path="profiles")
+        except Exception as e:
+            print(f"[WARNING] Could not log profile to MLflow: {e}")
+
+
+PROFILER = PipelineProfiler.from_env()
+
+
+def profile_stage(name: str, items: int = None, step: int = None):
+    """Context manager yielding a StageRecord; call .add(n) to count items."""
+    return PROFILER.stage(name, items, step)
+
+
+def profile_function(name: str = None):
+    def decorator(fn):
+        label = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not PROFILER.enabled:
+                return fn(*args, **kwargs)
+            start, cpu = time.perf_counter(), time.process_time()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                PROFILER.record_call(label, time.perf_counter() - start, time.process_time() - cpu)
+        return wrapper
+    return decorator
+
+
+def _run_profiled(fn, task):
+    """Pool-worker side of pool_map: (fn(task), function stats this call recorded)."""
+    PROFILER.begin_worker()
+    result = fn(task)
+    return result, PROFILER.take_functions()
+
+
+def pool_map(pool, fn, tasks, chunksize: int = 1):
+    """
+    pool.map(fn, tasks, chunksize=...) whose workers' profile_function
+    stats are merged into this process's PROFILER. `fn` must be a
+    module-level function (picklable). A plain pool.map when profiling is off.
+    """
+    if not PROFILER.enabled:
+        yield from pool.map(fn, tasks, chunksize=chunksize)
+        return
+    results = pool.map(functools.partial(_run_profiled, fn), tasks, chunksize=chunksize)
+    for result, functions in results:
+        PROFILER.merge_functions(functions)
+        yield result
+
+
+@contextmanager
+def profile_step(name: str, items: int = None):
+    """
+    Profile a whole step: a stage named `name` plus everything recorded
+    inside it. On exit the report is printed, written to
+    <PIPELINE_PROFILE_DIR>/<name>.json, logged to MLflow and reset.
+    """
+    if not PROFILER.enabled:
+        yield StageRecord(name, items)
+        return
+
+    profiler = cProfile.Profile() if PROFILER.cprofile else None
+    if profiler is not None:
+        profiler.enable()
+    try:
+        with PROFILER.stage(name, items) as record:
+            yield record
+    finally:
+        artifacts = []
+        PROFILER.output_dir.mkdir(parents=True, exist_ok=True)
+        if profiler is not None:
+            profiler.disable()
+            dump = PROFILER.output_dir / f"{name}.prof"
+            profiler.dump_stats(dump)
+            artifacts.append(dump)
+            print(f"[PROFILE] cProfile dump: {dump}")
+
+        report = PROFILER.report()
+        PROFILER.print_report(report)
+        report_path = PROFILER.output_dir / f"{name}.json"
+        report_path.write_text(json.dumps(report, indent=2))
+        PROFILER.log_to_mlflow(report, [report_path] + artifacts)
+        PROFILER.reset()
@@ -0,0 +1,225 @@
+"""
+Shared request preprocessing and the batch prediction stream for the
+serving apps.
+"""
+
+import asyncio
+import io
+import json
+import os
+import time
+import zipfile
+
+import numpy as np
+from PIL import Image
+
+from src.preprocessing.ela import ela_array, resize_ela
+from src.serving.metrics import RequestTrace, trace_outcome
+
+MAX_BATCH_FILES = 256
+# Total decompressed size of the zip members in one request
+MAX_ARCHIVE_BYTES = 256 * 1024 * 1024
+# ELA quality and model input size the serving apps preprocess with
+ELA_QUALITY = 90
+INPUT_SIZE = (224, 224)
+
+
+class ResizePolicy:
+    """
+    Pre-ELA downscale for large uploads.
+
+    max_side > 0 shrinks images whose longer side exceeds it (aspect kept)
+    before ELA runs; 0 keeps full resolution. With draft=True, JPEGs are
+    decoded directly at a reduced 1/2, 1/4 or 1/8 scale (Image.draft) that
+    is still at least max_side, so the full-size bitmap is never built.
+    Downscaling changes the ELA the model sees, so pick max_side with
+    benchmarks/bench_resize_policy.py.
+    """
+
+    def __init__(self, max_side: int = 0, draft: bool = False):
+        self.max_side = max_side
+        self.draft = draft
+
+    @classmethod
+    def from_env(cls):
+        """ELA_MAX_SIDE (default 0 = off) and ELA_DRAFT (default 0)."""
+        return cls(int(os.environ.get("ELA_MAX_SIDE", 0)), os.environ.get("ELA_DRAFT", "0") == "1")
+
+    def output_size(self, size):
+        """(width, height) that ELA runs on for an upload of `size`."""
+        width, height = size
+        if not self.max_side or max(width, height) <= self.max_side:
+            return size
+        scale = self.max_side / max(width, height)
+        return max(1, round(width * scale)), max(1, round(height * scale))
+
+    def open(self, image_bytes: bytes) -> Image.Image:
+        image = Image.open(io.BytesIO(image_bytes))
+        target = self.output_size(image.size)
+        if target == image.size:
+            return image.convert("RGB")
+
+        if self.draft and image.format == "JPEG":
+            image.draft("RGB", target)
+        image = image.convert("RGB")
+        if image.size != target:
+            image = image.resize(target, Image.BILINEAR, reducing_gap=2.0)
+        return image
+
+    def __str__(self):
+        return f"max_side={self.max_side},draft={int(self.draft)}"
+
+
+FULL_RESOLUTION = ResizePolicy()
+
+
+def prepare_input(image_bytes: bytes, quality: int = ELA_QUALITY, size=INPUT_SIZE,
+                  policy: ResizePolicy = FULL_RESOLUTION, timings: dict = None) -> np.ndarray:
+    """
+    Decode an upload and turn it into a normalised (H, W, 3) ELA array.
+    If `timings` is given, seconds per stage (decode, ela, resize,
+    normalise) are stored in it.
+    """
+    start = time.perf_counter()
+
+    def lap(stage):
+        nonlocal start
+        if timings is not None:
+            now = time.perf_counter()
+            timings[stage] = now - start
+            start = now
+
+    image = policy.open(image_bytes)
+    lap("decode")
+
+    ela = ela_array(image, quality, reference_quality=100)
+    lap("ela")
+    ela = resize_ela(ela, size)
+    lap("resize")
+
+    arr = ela / 255.0
+    lap("normalise")
+    return arr
+
+
+def prepare_input_timed(image_bytes: bytes, quality: int = ELA_QUALITY, size=INPUT_SIZE,
+                        policy: ResizePolicy = FULL_RESOLUTION):
+    """prepare_input returning (array, stage timings); picklable for process pools."""
+    timings = {}
+    return prepare_input(image_bytes, quality, size, policy, timings), timings
+
+
+def expand_uploads(uploads):
+    """
+    Flatten (filename, bytes) uploads, expanding zip archives into one
+    entry per member file named "<archive>/<member>".
+
+    Raises ValueError for more than MAX_BATCH_FILES images or more than
+    MAX_ARCHIVE_BYTES of zip members; both are checked from the archive
+    directory before a member is decompressed.
+    """
+    def check_count(count):
+        if count > MAX_BATCH_FILES:
+            raise ValueError(f"Too many images in one request (max {MAX_BATCH_FILES})")
+
+    items = []
+    archive_bytes = 0
+    for filename, data in uploads:
+        if zipfile.is_zipfile(io.BytesIO(data)):
+            with zipfile.ZipFile(io.BytesIO(data)) as archive:
+                for member in archive.infolist():
+                    if member.is_dir():
+                        continue
+                    check_count(len(items) + 1)
+                    # Reads stop at the declared file_size, so this bounds memory
+                    archive_bytes += member.file_size
+                    if archive_bytes > MAX_ARCHIVE_BYTES:
+                        raise ValueError(f"Archive contents too large (max {MAX_ARCHIVE_BYTES // (1024 * 1024)} MB)")
+                    items.append((f"{filename}/{member.filename}", archive.read(member)))
+        else:
+            check_count(len(items) + 1)
+            items.append((filename, data))
+    return items
+
+
+async def predict_cached(image_bytes: bytes, engine, cache=None, pool=None,
+                         policy: ResizePolicy = FULL_RESOLUTION, trace=None) -> float:
+    """
+    Raw model score for one upload, served from `cache` when possible.
+    Preprocessing runs in `pool` (a PreprocessPool, which may raise
+    Overloaded) or, if None, the loop's default executor. With a
+    RequestTrace, the time of each stage is added to it.
+    """
+    key = None
+    if cache is not None:
+        start = time.perf_counter()
+        key = cache.key(image_bytes)
+        cached = cache.get(key)
+        if trace is not None:
+            trace.add("cache", time.perf_counter() - start)
+        if cached is not None:
+            return cached
+
+    fn = prepare_input_timed if trace is not None else prepare_input
+    args = (fn, image_bytes, ELA_QUALITY, INPUT_SIZE, policy)
+    if pool is not None:
+        result = await pool.run(*args)
+    else:
+        result = await asyncio.get_running_loop().run_in_executor(None, *args)
+
+    if trace is not None:
+        arr, timings = result
+        for stage, seconds in timings.items():
+            trace.add(stage, seconds)
+    else:
+        arr = result
+
+    start = time.perf_counter()
+    pred = float((await engine.predict(arr))[0])
+    if trace is not None:
+        trace.add("inference", time.perf_counter() - start)
+
+    if cache is not None:
+        cache.put(key, pred)
+    return pred
+
+
+async def predict_stream(items, engine, format_result, pool=None, cache=None,
+                         policy: ResizePolicy = FULL_RESOLUTION, metrics=None):
+    """
+    Yield one NDJSON line per image as soon as its prediction is ready.
+
+    Decoding/ELA runs in `pool` in parallel; with a pool, at most
+    pool.workers images of one stream are in flight, so a large batch
+    waits for capacity instead of filling the shared queue. Inference goes
+    through the batching engine, so the model sees a few large batches. A
+    failing image yields an {"error": ...} line without affecting the others.
+    With `metrics` (ServingMetrics), every image is traced per stage.
+    """
+    limit = asyncio.Semaphore(pool.workers) if pool is not None else None
+
+    async def score(data, trace):
+        if limit is None:
+            return await predict_cached(data, engine, cache, pool, policy, trace)
+        async with limit:
+            return await predict_cached(data, engine, cache, pool, policy, trace)
+
+    async def run_one(index, filename, data):
+        trace = RequestTrace() if metrics is not None else None
+        try:
+            pred = await score(data, trace)
+            if metrics is not None:
+                metrics.observe_trace(trace, "/predict/batch", trace_outcome(trace), filename=filename)
+            return {"index": index, "filename": filename, **format_result(pred)}
+        except Exception as e:
+            if metrics is not None:
+                metrics.observe_trace(trace, "/predict/batch", "error", filename=filename)
+            return {"index": index, "filename": filename, "error": str(e)}
+
+    tasks = [asyncio.ensure_future(run_one(i, name, data)) for i, (name, data) in enumerate(items)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield json.dumps(await next_done) + "\n"
+    finally:
+        for task in tasks:
+            task.cancel()
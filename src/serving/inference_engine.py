@@ -0,0 +1,133 @@
+"""
+Dynamic micro-batching for the prediction APIs.
+
+Requests put single ELA tensors on a queue; a dedicated worker thread
+groups them into batches of up to `max_batch_size`, waiting at most
+`max_wait_ms` after the first item, runs the model once per batch and
+resolves each request's future. Requests cancelled while queued (a client
+that went away) are dropped from the batch; a failure to resolve one
+future never stops the worker thread.
+"""
+
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError
+
+import numpy as np
+
+
+class BatchingInferenceEngine:
+    def __init__(self, predict_fn, max_batch_size: int = 16, max_wait_ms: float = 5.0, on_batch=None):
+        """
+        Args:
+            predict_fn: callable taking a (N, H, W, C) float32 batch and
+                returning N predictions (any shape with N leading rows)
+            max_batch_size: largest batch handed to predict_fn
+            max_wait_ms: how long to hold a partial batch for more requests
+            on_batch: optional callback(batch_size, model_seconds,
+                queue_waits) run on the worker thread after each batch
+        """
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.on_batch = on_batch
+        self._queue = queue.Queue()
+        self._thread = None
+        self._stopped = threading.Event()
+        self.batches = 0
+        self.requests = 0
+
+    def start(self):
+        if self._thread is None:
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name="inference-engine", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._stopped.set()
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def submit(self, arr: np.ndarray) -> Future:
+        """Queue one (H, W, C) input; the future resolves to its prediction row."""
+        future = Future()
+        self._queue.put((arr, future, time.monotonic()))
+        return future
+
+    async def predict(self, arr: np.ndarray):
+        """Awaitable form of submit() for async request handlers."""
+        return await asyncio.wrap_future(self.submit(arr))
+
+    def _collect_batch(self, first):
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._stopped.set()
+                break
+            batch.append(item)
+        return batch
+
+    @staticmethod
+    def _resolve(future: Future, result=None, exception: BaseException = None):
+        try:
+            if exception is not None:
+                future.set_exception(exception)
+            else:
+                future.set_result(result)
+        except InvalidStateError:
+            pass  # cancelled or already resolved; nobody is waiting for it
+
+    def _run(self):
+        while not self._stopped.is_set():
+            first = self._queue.get()
+            if first is None:
+                break
+            # Marks the futures running, so a later cancel() cannot race set_result
+            batch = [item for item in self._collect_batch(first) if item[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            arrays = [arr for arr, _, _ in batch]
+            futures = [future for _, future, _ in batch]
+            start = time.monotonic()
+            try:
+                preds = np.asarray(self.predict_fn(np.stack(arrays).astype(np.float32)))
+            except Exception as e:
+                for future in futures:
+                    self._resolve(future, exception=e)
+                continue
+
+            self.batches += 1
+            self.requests += len(batch)
+            if self.on_batch is not None:
+                try:
+                    self.on_batch(len(batch), time.monotonic() - start, [start - queued for _, _, queued in batch])
+                except Exception as e:
+                    print(f"[WARNING] Inference engine on_batch callback failed: {e}")
+            for future, pred in zip(futures, preds):
+                self._resolve(future, pred)
+
+        # Fail anything still queued so callers are not left hanging
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                self._resolve(item[1], exception=RuntimeError("Inference engine stopped"))
@@ -0,0 +1,60 @@
+"""
+Startup lifecycle helpers for the serving apps: per-stage startup timing
+and model warm-up.
+"""
+
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+
+class StartupReport:
+    """Collects a startup-time breakdown and the ready/failed state."""
+
+    def __init__(self):
+        self.stages = {}
+        self.ready = False
+        self.error = None
+
+    def record(self, name: str, seconds: float):
+        self.stages[name] = round(seconds, 4)
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+            print(f"[STARTUP] {name}: {self.stages[name]:.3f}s")
+
+    def mark_ready(self):
+        self.ready = True
+        self.record("total", sum(v for k, v in self.stages.items() if k != "total"))
+        print(f"[STARTUP] Ready in {self.stages['total']:.3f}s")
+
+    def as_dict(self) -> dict:
+        return {
+            "ready": self.ready,
+            "error": self.error,
+            "stages_seconds": dict(self.stages),
+        }
+
+
+def warm_up(predict_fn, input_shape=(224, 224, 3)):
+    """Run one inference so kernels and allocators are initialised."""
+    predict_fn(np.zeros([1, *input_shape], np.float32))
+
+
+def limit_tf_threads(threads: int):
+    """
+    Cap TensorFlow's intra-op pool, so several uvicorn workers (one model
+    each) do not oversubscribe the cores. Must run before the first op.
+    """
+    import tensorflow as tf
+    try:
+        tf.config.threading.set_intra_op_parallelism_threads(threads)
+        tf.config.threading.set_inter_op_parallelism_threads(min(threads, 2))
+    except RuntimeError as e:
+        print(f"[STARTUP] TensorFlow already initialised, thread limit not applied: {e}")
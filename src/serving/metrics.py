@@ -0,0 +1,246 @@
+"""
+Prometheus-style metrics and per-request stage tracing for the serving
+apps.
+
+Metrics are rendered in the Prometheus text exposition format by a small
+in-process registry (no client library needed) and served on /metrics.
+Each uvicorn worker keeps its own registry; the `worker` label (pid) tells
+the series apart.
+
+A RequestTrace collects the seconds spent in each stage of one request
+(read, cache, decode, ela, resize, normalise, inference); ServingMetrics
+folds it into the per-stage histograms and, optionally, prints it as one
+JSON line per request.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels.items()) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels=()):
+        self.name = name
+        self.help = help_text
+        self.kind = "counter"
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(str(labels[label]) for label in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, value in values.items():
+            yield "", dict(zip(self.labels, key)), value
+
+
+class Gauge:
+    """Read from `fn` at scrape time; fn returns a number, None, or {label value: number}."""
+
+    def __init__(self, name: str, help_text: str, fn, label: str = None):
+        self.name = name
+        self.help = help_text
+        self.kind = "gauge"
+        self.fn = fn
+        self.label = label
+
+    def samples(self):
+        value = self.fn()
+        if isinstance(value, dict):
+            for label_value, v in value.items():
+                yield "", {self.label: label_value}, v
+        elif value is not None:
+            yield "", {}, value
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.kind = "histogram"
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels[label]) for label in self.labels)
+        with self._lock:
+            counts, total, n = self._values.get(key, ([0] * len(self.buckets), 0.0, 0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value, n + 1)
+
+    def samples(self):
+        with self._lock:
+            values = {key: (list(counts), total, n) for key, (counts, total, n) in self._values.items()}
+        for key, (counts, total, n) in values.items():
+            labels = dict(zip(self.labels, key))
+            for bound, count in zip(self.buckets, counts):
+                yield "_bucket", {**labels, "le": bound}, count
+            yield "_bucket", {**labels, "le": "+Inf"}, n
+            yield "_sum", labels, total
+            yield "_count", labels, n
+
+
+class MetricsRegistry:
+    def __init__(self, prefix: str, const_labels: dict = None):
+        self.prefix = prefix
+        self.const_labels = const_labels or {}
+        self.metrics = []
+
+    def _add(self, metric):
+        metric.name = f"{self.prefix}_{metric.name}"
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text, labels=()):
+        return self._add(Counter(name, help_text, labels))
+
+    def gauge(self, name, help_text, fn, label=None):
+        return self._add(Gauge(name, help_text, fn, label))
+
+    def histogram(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        return self._add(Histogram(name, help_text, labels, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for suffix, labels, value in metric.samples():
+                lines.append(f"{metric.name}{suffix}{_format_labels({**self.const_labels, **labels})} {value}")
+        return "\n".join(lines) + "\n"
+
+
+class RequestTrace:
+    """Seconds per stage for one request."""
+
+    def __init__(self):
+        self.stages = {}
+        self.start = time.perf_counter()
+
+    def add(self, stage: str, seconds: float):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start)
+
+    def total(self) -> float:
+        return time.perf_counter() - self.start
+
+
+def trace_outcome(trace: RequestTrace) -> str:
+    """Outcome label: cached if the request never reached inference, else ok."""
+    return "ok" if "inference" in trace.stages else "cached"
+
+
+class ServingMetrics:
+    """
+    The metric set shared by both serving apps. Live values (queue depth,
+    pool load, cache counters, startup stages) are read through callables
+    passed to bind(), so they are current at scrape time.
+    """
+
+    def __init__(self, prefix: str = "forgery", log_requests: bool = False):
+        self.registry = MetricsRegistry(prefix, {"worker": os.getpid()})
+        self.log_requests = log_requests
+        r = self.registry
+        self.requests = r.counter("requests_total", "HTTP requests by endpoint and status code",
+                                  ("endpoint", "status"))
+        self.request_seconds = r.histogram("request_seconds", "End-to-end request latency", ("endpoint",))
+        self.stage_seconds = r.histogram("stage_seconds", "Per-image latency of each prediction stage",
+                                         ("stage",))
+        self.images = r.counter("images_total", "Images scored, by outcome (ok, cached, error)", ("outcome",))
+        self.batch_size = r.histogram("inference_batch_size", "Images per model call",
+                                      buckets=BATCH_SIZE_BUCKETS)
+        self.model_seconds = r.histogram("inference_batch_seconds", "Model call latency per batch")
+        self.queue_wait = r.histogram("inference_queue_wait_seconds",
+                                      "Time an image waited in the inference queue")
+
+    @classmethod
+    def from_env(cls):
+        """REQUEST_TIMING_LOG=1 prints one JSON timing line per request."""
+        return cls(log_requests=os.environ.get("REQUEST_TIMING_LOG", "0") == "1")
+
+    def bind(self, queue_depth, preprocess_pending, cache_stats, startup_stages):
+        r = self.registry
+        r.gauge("inference_queue_depth", "Images waiting for the inference engine", queue_depth)
+        r.gauge("preprocess_pending", "Jobs queued or running in the preprocessing pool", preprocess_pending)
+        r.gauge("cache_hits", "Result-cache hits since start", lambda: cache_stats().get("hits"))
+        r.gauge("cache_misses", "Result-cache misses since start", lambda: cache_stats().get("misses"))
+        r.gauge("startup_stage_seconds", "Startup time per stage (model load, trace, warm-up, ...)",
+                startup_stages, label="stage")
+        return self
+
+    def observe_batch(self, size: int, seconds: float, queue_waits):
+        """BatchingInferenceEngine on_batch hook (runs on the engine thread)."""
+        self.batch_size.observe(size)
+        self.model_seconds.observe(seconds)
+        for wait in queue_waits:
+            self.queue_wait.observe(wait)
+
+    def observe_request(self, endpoint: str, status: int, seconds: float):
+        self.requests.inc(endpoint=endpoint, status=status)
+        self.request_seconds.observe(seconds, endpoint=endpoint)
+
+    def observe_trace(self, trace: RequestTrace, endpoint: str, outcome: str = "ok", **fields):
+        for stage, seconds in trace.stages.items():
+            self.stage_seconds.observe(seconds, stage=stage)
+        self.images.inc(outcome=outcome)
+
+        if self.log_requests:
+            print(json.dumps({
+                "event": "request_timing",
+                "endpoint": endpoint,
+                "outcome": outcome,
+                **fields,
+                "total_ms": round(trace.total() * 1000, 3),
+                "stages_ms": {stage: round(s * 1000, 3) for stage, s in trace.stages.items()}
+            }))
+
+    def instrument(self, app):
+        """Count and time every HTTP request of a FastAPI app, labelled by route path."""
+        routes = set()
+
+        @app.middleware("http")
+        async def record_request(request, call_next):
+            if not routes:
+                routes.update(route.path for route in app.routes)
+            endpoint = request.url.path if request.url.path in routes else "other"
+            start = time.perf_counter()
+            try:
+                response = await call_next(request)
+            except Exception:
+                self.observe_request(endpoint, 500, time.perf_counter() - start)
+                raise
+            # For streamed responses this is the time to the first byte
+            self.observe_request(endpoint, response.status_code, time.perf_counter() - start)
+            return response
+
+        return app
+
+    def render(self) -> str:
+        return self.registry.render()
@@ -0,0 +1,99 @@
+"""
+Bounded worker pool for the CPU-bound request preprocessing (decode, ELA,
+resize) of the serving apps.
+
+Work runs in a fixed number of threads (PIL and NumPy release the GIL for
+the heavy parts) or, with processes=True, spawned worker processes, so the
+event loop only awaits results. At most `max_pending` jobs may be queued
+or running; beyond that run() raises Overloaded and the apps answer 429
+with a Retry-After header instead of letting latency grow without bound.
+A job stays counted until the pool finishes it, even if the request that
+submitted it was cancelled (client disconnect).
+"""
+
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+
+def cores_per_worker() -> int:
+    """
+    CPU cores available to this server process when uvicorn runs
+    WEB_CONCURRENCY worker processes on the machine (at least 1).
+    """
+    return max(1, (os.cpu_count() or 1) // max(1, int(os.environ.get("WEB_CONCURRENCY", 1))))
+
+
+class Overloaded(Exception):
+    """The preprocessing queue is full; the request should be retried later."""
+
+
+class PreprocessPool:
+    def __init__(self, workers: int = None, max_pending: int = None, processes: bool = False):
+        """
+        Args:
+            workers: pool size (default: this process's share of the CPU
+                cores, see cores_per_worker)
+            max_pending: queued + running jobs admitted before rejecting
+                (default: 4 per worker)
+            processes: use spawned processes instead of threads
+        """
+        self.workers = workers or cores_per_worker()
+        self.max_pending = max_pending or self.workers * 4
+        self.processes = processes
+        if processes:
+            # spawn, not fork: the parent already runs TensorFlow threads
+            self.executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        else:
+            self.executor = ThreadPoolExecutor(self.workers, thread_name_prefix="preprocess")
+        self.pending = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """PREPROCESS_WORKERS, PREPROCESS_MAX_PENDING, PREPROCESS_PROCESSES (0/1)."""
+        return cls(
+            workers=int(os.environ.get("PREPROCESS_WORKERS", 0)) or None,
+            max_pending=int(os.environ.get("PREPROCESS_MAX_PENDING", 0)) or None,
+            processes=os.environ.get("PREPROCESS_PROCESSES", "0") == "1"
+        )
+
+    def saturated(self) -> bool:
+        return self.pending >= self.max_pending
+
+    async def run(self, fn, *args):
+        """Run fn(*args) in the pool, or raise Overloaded if the queue is full."""
+        with self._lock:
+            if self.saturated():
+                self.rejected += 1
+                raise Overloaded(f"Preprocessing queue full ({self.max_pending} pending)")
+            self.pending += 1
+
+        try:
+            future = self.executor.submit(fn, *args)
+        except Exception:
+            self._release()
+            raise
+        # Released when the job is done (or cancelled before it started), not
+        # when the awaiting request goes away while a worker still runs it
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def _release(self, _future=None):
+        with self._lock:
+            self.pending -= 1
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "kind": "process" if self.processes else "thread",
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "rejected": self.rejected
+        }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,173 @@
+"""
+Prediction cache for the serving apps.
+
+Keyed on sha256(model version + uploaded bytes), so repeat submissions of
+the same image skip ELA and inference, and swapping the model makes every
+old entry unreachable. In-memory LRU with TTL; an optional on-disk
+directory lets several uvicorn workers share results. The disk tier is
+bounded too: every few writes it drops expired files and then the oldest
+(by mtime) beyond `disk_max_entries`.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+
+def file_digest(path: Path) -> str:
+    """
+    sha256 of a model/weights file, used as the cache's model version.
+    For a directory (SavedModel) every file is hashed in path order.
+    """
+    path = Path(path)
+    files = sorted(p for p in path.rglob("*") if p.is_file()) if path.is_dir() else [path]
+
+    digest = hashlib.sha256()
+    for file in files:
+        digest.update(file.relative_to(path).as_posix().encode() if path.is_dir() else b"")
+        with open(file, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600,
+                 disk_dir: Path = None, model_version: str = "", disk_max_entries: int = None):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_max_entries = disk_max_entries or max_entries
+        # Prune after this many disk writes, so the bound is exceeded by at most ~10%
+        self._prune_every = max(1, self.disk_max_entries // 10)
+        self._disk_writes = 0
+        self.model_version = model_version
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+    def set_model_version(self, version: str):
+        """Drop in-memory entries when the model changes (disk keys differ anyway)."""
+        with self._lock:
+            if version != self.model_version:
+                self._entries.clear()
+                self.model_version = version
+
+    def key(self, image_bytes: bytes) -> str:
+        digest = hashlib.sha256(self.model_version.encode())
+        digest.update(image_bytes)
+        return digest.hexdigest()
+
+    def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                if now - stored_at <= self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+
+        value = self._disk_get(key, now)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._store(key, value, now)
+        return value
+
+    def put(self, key: str, value):
+        now = time.time()
+        with self._lock:
+            self._store(key, value, now)
+        self._disk_put(key, value)
+
+    def _store(self, key, value, now):
+        self._entries[key] = (now, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / key[:2] / f"{key}.json"
+
+    def _disk_get(self, key: str, now: float):
+        if self.disk_dir is None:
+            return None
+        path = self._disk_path(key)
+        try:
+            if now - path.stat().st_mtime > self.ttl:
+                path.unlink()
+                return None
+            return json.loads(path.read_text())
+        except (OSError, ValueError):
+            return None
+
+    def _disk_put(self, key: str, value):
+        if self.disk_dir is None:
+            return
+        path = self._disk_path(key)
+        try:
+            path.parent.mkdir(exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump(value, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"[CACHE] Disk write failed: {e}")
+            return
+
+        with self._lock:
+            self._disk_writes += 1
+            prune = self._disk_writes % self._prune_every == 0
+        if prune:
+            self.prune_disk()
+
+    def prune_disk(self) -> int:
+        """Delete expired disk entries, then the oldest beyond disk_max_entries; returns how many."""
+        if self.disk_dir is None:
+            return 0
+        now = time.time()
+        files = []
+        for path in self.disk_dir.glob("*/*.json"):
+            try:
+                files.append((path.stat().st_mtime, path))
+            except OSError:
+                continue  # removed by another worker
+        files.sort()
+        expired = [path for mtime, path in files if now - mtime > self.ttl]
+        live = [path for mtime, path in files if now - mtime <= self.ttl]
+        doomed = expired + live[:max(0, len(live) - self.disk_max_entries)]
+        for path in doomed:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+        return len(doomed)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "disk_dir": str(self.disk_dir) if self.disk_dir else None,
+                "disk_max_entries": self.disk_max_entries if self.disk_dir else None,
+                "model_version": self.model_version[:12],
+            }
@@ -0,0 +1,65 @@
+"""
+Ranked results of a sweep (see sweep_runner), stored as leaderboard.json
+in the sweep dir. Each entry is one trial:
+
+    trial_id, status ("ok" / "failed"), error, params, metrics,
+    train_seconds, model_path, ela_path (its training ELA set) and
+    test_spec (the ELA test set it was scored on)
+
+Finished trials rank by test F1, then accuracy, then training time;
+failed trials come last.
+"""
+
+import json
+import time
+from pathlib import Path
+
+
+def _rank(entry: dict):
+    metrics = entry.get("metrics") or {}
+    return (entry.get("status") != "ok", -metrics.get("f1", 0.0), -metrics.get("accuracy", 0.0),
+            entry.get("train_seconds") or 0.0)
+
+
+class Leaderboard:
+    FILENAME = "leaderboard.json"
+
+    def __init__(self, entries, sweep: dict = None):
+        self.entries = sorted(entries, key=_rank)
+        self.sweep = sweep or {}
+
+    @classmethod
+    def load(cls, path: Path):
+        path = Path(path)
+        if path.is_dir():
+            path = path / cls.FILENAME
+        data = json.loads(path.read_text())
+        return cls(data["entries"], data.get("sweep"))
+
+    def save(self, path: Path) -> Path:
+        path = Path(path)
+        if path.is_dir():
+            path = path / self.FILENAME
+        data = {"created": time.time(), "sweep": self.sweep, "entries": self.entries}
+        path.write_text(json.dumps(data, indent=2))
+        return path
+
+    def best(self, where: dict = None):
+        """Top finished trial whose params match all of `where` (None if there is none)."""
+        for entry in self.entries:
+            if entry.get("status") != "ok":
+                continue
+            if all(entry["params"].get(key) == value for key, value in (where or {}).items()):
+                return entry
+        return None
+
+    def print_report(self, top: int = 10):
+        print(f"{'rank':<6}{'trial':<12}{'f1':>8}{'acc':>8}{'train s':>10}  params")
+        for rank, entry in enumerate(self.entries[:top], 1):
+            metrics = entry.get("metrics") or {}
+            if entry.get("status") == "ok":
+                scores = f"{metrics['f1']:>8.4f}{metrics['accuracy']:>8.4f}{entry['train_seconds']:>10.1f}"
+            else:
+                scores = f"{'failed':>26}"
+            params = ", ".join(f"{k}={v}" for k, v in entry["params"].items())
+            print(f"{rank:<6}{entry['trial_id']:<12}{scores}  {params}")
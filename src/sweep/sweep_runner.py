@@ -0,0 +1,324 @@
+"""
+Parallel hyperparameter / ELA-quality sweeps.
+
+A sweep fine-tunes one model per trial on the cleaned training images and
+scores it on the cleaned test images. A trial sets:
+
+    ela_quality       JPEG quality of the ELA recompression (ELAProcessor)
+    img_size          model input [height, width]; sizes other than the
+                      base model's input need a base model built with a
+                      flexible input shape
+    lr                fine-tuning learning rate
+    trainable_layers  how many of the last layers are fine-tuned
+    batch_size
+
+The ELA sets depend only on ela_quality, so the train and test ELA sets
+are built once per quality, with every core, before any trial starts
+(<sweep_dir>/ela/q<quality>, <sweep_dir>/test_ela/q<quality>) and shared
+by all trials with that quality; their stage manifests keep reruns
+incremental. Trials then run in `workers` spawned processes, each capped
+at cpu_count // workers TensorFlow/OpenMP threads, so concurrent trials
+split the CPU instead of oversubscribing it.
+
+Each trial writes <sweep_dir>/trials/<trial_id>/result.json, and a rerun
+of the same sweep skips trials that already finished. Every trial is
+logged as its own MLflow run (nested under the caller's active run), and
+the results are ranked into a Leaderboard (<sweep_dir>/leaderboard.json)
+that the deploy step consumes.
+"""
+
+import hashlib
+import itertools
+import json
+import os
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+from src.preprocessing.ela_processor import ELAProcessor
+from src.sweep.leaderboard import Leaderboard
+
+# Values used today, and the default (single-trial) space
+DEFAULT_SPACE = {
+    "ela_quality": [90],
+    "img_size": [[224, 224]],
+    "lr": [1e-5],
+    "trainable_layers": [30],
+    "batch_size": [16],
+}
+PARAMS = tuple(DEFAULT_SPACE)
+RESULT_FILENAME = "result.json"
+
+
+def _full_space(space: dict) -> dict:
+    unknown = set(space or {}) - set(PARAMS)
+    if unknown:
+        raise ValueError(f"Unknown sweep parameters: {sorted(unknown)} (expected some of {PARAMS})")
+    return {**DEFAULT_SPACE, **(space or {})}
+
+
+def grid_trials(space: dict = None) -> list:
+    """Every combination of the values in `space` (missing keys use DEFAULT_SPACE)."""
+    space = _full_space(space)
+    trials = []
+    for values in itertools.product(*(space[name] for name in PARAMS)):
+        params = dict(zip(PARAMS, values))
+        params["img_size"] = [int(v) for v in params["img_size"]]
+        trials.append(params)
+    return trials
+
+
+def random_trials(space: dict = None, n_trials: int = 8, seed: int = 0) -> list:
+    """`n_trials` distinct combinations drawn at random from the grid."""
+    grid = grid_trials(space)
+    picks = np.random.default_rng(seed).permutation(len(grid))[:n_trials]
+    return [grid[i] for i in sorted(picks)]
+
+
+def trial_id(params: dict) -> str:
+    """Stable id of a parameter set, so reruns find finished trials."""
+    return "t" + hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()[:10]
+
+
+def thread_budget(workers: int, cpus: int = None) -> int:
+    """Threads per trial worker when `workers` trials share `cpus` cores."""
+    cpus = cpus or os.cpu_count() or 1
+    return max(1, cpus // max(1, workers))
+
+
+def _init_worker(threads: int):
+    """Process-pool initializer: cap oneDNN/OpenMP and TensorFlow threads before the first op."""
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    from src.serving.lifecycle import limit_tf_threads
+    limit_tf_threads(threads)
+
+
+@contextmanager
+def _mlflow_run(context: dict, run_name: str):
+    """An MLflow run for one trial, nested under the sweep's run; yields None without MLflow."""
+    try:
+        import mlflow
+    except ImportError:
+        yield None
+        return
+
+    tags = {"sweep": context["sweep"]}
+    if context.get("parent_run_id"):
+        tags["mlflow.parentRunId"] = context["parent_run_id"]
+    with mlflow.start_run(run_name=run_name, experiment_id=context.get("experiment_id"), tags=tags):
+        yield mlflow
+
+
+def _run_trial(task: dict) -> dict:
+    """Process-pool entry point: train, evaluate and log one trial."""
+    params = task["params"]
+    trial_dir = Path(task["trial_dir"])
+    trial_dir.mkdir(parents=True, exist_ok=True)
+    entry = {
+        "trial_id": task["trial_id"],
+        "params": params,
+        "status": "failed",
+        "error": None,
+        "metrics": None,
+        "train_seconds": None,
+        "model_path": None,
+        "ela_path": task["ela_path"],
+        "test_spec": task["test_spec"],
+    }
+    try:
+        import tensorflow as tf
+        from src.evaluation.evaluator import Evaluator
+        from src.training.model_trainer import ModelTrainer
+        from src.training.training_config import TrainingConfig
+
+        config = TrainingConfig.from_options(task["training_config"])
+        if config is not None and config.checkpoint_dir:
+            # Trials run concurrently; a shared backup dir would mix their states
+            config.checkpoint_dir = str(trial_dir / "checkpoints")
+        validation_split = task["validation_split"]
+        if config is not None and config.early_stopping_patience and not validation_split:
+            validation_split = 0.1
+        trainer = ModelTrainer(
+            Path(task["base_model_path"]),
+            img_size=tuple(params["img_size"]),
+            batch_size=params["batch_size"],
+            input_mode=task["input_mode"],
+            cache=task["cache"],
+            validation_split=validation_split,
+            config=config,
+            trainable_layers=params["trainable_layers"]
+        )
+
+        with _mlflow_run(task["mlflow"], task["trial_id"]) as mlflow:
+            if mlflow is not None:
+                mlflow.log_params({**params, "img_size": "x".join(map(str, params["img_size"]))})
+
+            start = time.perf_counter()
+            model_path = trainer.train_and_save(Path(task["ela_path"]), output_dir=trial_dir,
+                                                epochs=task["epochs"], lr=params["lr"])
+            train_seconds = time.perf_counter() - start
+
+            spec = task["test_spec"]
+            metrics = Evaluator().evaluate_streaming(model_path, spec["path"],
+                                                     image_size=spec["image_size"],
+                                                     batch_size=spec["batch_size"])
+            if mlflow is not None:
+                mlflow.log_metrics({"test_accuracy": metrics["accuracy"], "test_f1": metrics["f1"],
+                                    "sweep_train_seconds": train_seconds})
+
+        entry.update(status="ok", metrics=metrics, train_seconds=round(train_seconds, 2),
+                     model_path=str(model_path))
+        tf.keras.backend.clear_session()
+    except Exception as e:
+        entry["error"] = f"{type(e).__name__}: {e}"
+
+    (trial_dir / RESULT_FILENAME).write_text(json.dumps(entry, indent=2))
+    return entry
+
+
+class SweepRunner:
+    """
+    Runs trials (from grid_trials / random_trials) for one base model and
+    dataset. workers=None runs one trial per core (at most one per trial).
+    `training_config` holds TrainingConfig arguments or a preset (see
+    TrainingConfig.from_options) shared by all trials; checkpoints go to
+    each trial's own dir;
+    input_mode/validation_split are passed to ModelTrainer, and with
+    input_mode="features" trials share one feature cache in the sweep dir.
+    """
+
+    def __init__(self, base_model_path: Path, clean_data_path: Path, test_clean_path: Path,
+                 sweep_dir: Path = Path("sweeps/default"), workers: int = None, epochs: int = 4,
+                 input_mode: str = "fast", validation_split: float = 0.0,
+                 training_config: dict = None, test_batch_size: int = 32):
+        self.base_model_path = Path(base_model_path)
+        self.clean_data_path = Path(clean_data_path)
+        self.test_clean_path = Path(test_clean_path)
+        self.sweep_dir = Path(sweep_dir)
+        self.workers = workers
+        self.epochs = epochs
+        self.input_mode = input_mode
+        self.validation_split = validation_split
+        self.training_config = training_config
+        self.test_batch_size = test_batch_size
+
+    def prepare_ela(self, qualities) -> dict:
+        """{quality: (train ELA dir, test ELA dir)}, each built once with every core."""
+        datasets = {}
+        for quality in sorted(set(qualities)):
+            print(f"--Sweep ELA sets for quality={quality}")
+            train = ELAProcessor(self.clean_data_path, self.sweep_dir / "ela" / f"q{quality}",
+                                 quality=quality, workers=0).process()
+            test = ELAProcessor(self.test_clean_path, self.sweep_dir / "test_ela" / f"q{quality}",
+                                quality=quality, workers=0).process()
+            datasets[quality] = (train, test)
+        return datasets
+
+    def _mlflow_context(self) -> dict:
+        context = {"sweep": self.sweep_dir.name, "experiment_id": None, "parent_run_id": None}
+        try:
+            import mlflow
+        except ImportError:
+            return context
+        run = mlflow.active_run()
+        if run is not None:
+            context.update(experiment_id=run.info.experiment_id, parent_run_id=run.info.run_id)
+        return context
+
+    def _tasks(self, trials, datasets) -> list:
+        # Absolute paths, so the leaderboard can be read from any working directory
+        sweep_dir = self.sweep_dir.resolve()
+        mlflow_context = self._mlflow_context()
+        cache = str(sweep_dir / "feature_cache") if self.input_mode == "features" else None
+        tasks = []
+        for params in trials:
+            train_path, test_path = datasets[params["ela_quality"]]
+            tid = trial_id(params)
+            tasks.append({
+                "trial_id": tid,
+                "params": params,
+                "trial_dir": str(sweep_dir / "trials" / tid),
+                "base_model_path": str(self.base_model_path.resolve()),
+                "ela_path": str(train_path.resolve()),
+                "test_spec": {"path": str(test_path.resolve()), "format": "directory",
+                              "image_size": params["img_size"], "batch_size": self.test_batch_size},
+                "epochs": self.epochs,
+                "input_mode": self.input_mode,
+                "cache": cache,
+                "validation_split": self.validation_split,
+                "training_config": self.training_config,
+                "mlflow": mlflow_context,
+            })
+        return tasks
+
+    def _finished(self, task: dict):
+        result = Path(task["trial_dir"]) / RESULT_FILENAME
+        if not result.exists():
+            return None
+        entry = json.loads(result.read_text())
+        return entry if entry.get("status") == "ok" else None
+
+    def run(self, trials) -> Leaderboard:
+        if not trials:
+            raise ValueError("Sweep has no trials")
+        self.sweep_dir.mkdir(parents=True, exist_ok=True)
+        datasets = self.prepare_ela(params["ela_quality"] for params in trials)
+        tasks = self._tasks(trials, datasets)
+
+        entries = [entry for entry in map(self._finished, tasks) if entry is not None]
+        done = {entry["trial_id"] for entry in entries}
+        pending = [task for task in tasks if task["trial_id"] not in done]
+
+        workers = min(self.workers or os.cpu_count() or 1, max(1, len(pending)))
+        threads = thread_budget(workers)
+        print(f"--Sweep: {len(tasks)} trials ({len(done)} already finished), "
+              f"{workers} worker(s) x {threads} thread(s)")
+
+        start = time.perf_counter()
+        if pending:
+            # spawn: TensorFlow is not fork-safe, and each worker sets its own thread caps
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                     initializer=_init_worker, initargs=(threads,)) as pool:
+                futures = [pool.submit(_run_trial, task) for task in pending]
+                for n, future in enumerate(as_completed(futures), 1):
+                    entry = future.result()
+                    entries.append(entry)
+                    outcome = (f"f1={entry['metrics']['f1']:.4f}" if entry["status"] == "ok"
+                               else f"FAILED {entry['error']}")
+                    print(f"[SWEEP] {entry['trial_id']} ({n}/{len(pending)}): {outcome}")
+
+        leaderboard = Leaderboard(entries, sweep={
+            "base_model_path": str(self.base_model_path),
+            "trials": len(tasks),
+            "workers": workers,
+            "threads_per_worker": threads,
+            "epochs": self.epochs,
+            "input_mode": self.input_mode,
+            "wall_seconds": round(time.perf_counter() - start, 2),
+        })
+        path = leaderboard.save(self.sweep_dir)
+        leaderboard.print_report()
+        print(f"--Leaderboard: {path}")
+        self._log_leaderboard(leaderboard, path)
+        return leaderboard
+
+    def _log_leaderboard(self, leaderboard: Leaderboard, path: Path):
+        try:
+            import mlflow
+        except ImportError:
+            print("[NOTE] mlflow not installed; leaderboard not logged")
+            return
+        try:
+            best = leaderboard.best()
+            if best is not None:
+                mlflow.log_metrics({"sweep_best_f1": best["metrics"]["f1"],
+                                    "sweep_best_accuracy": best["metrics"]["accuracy"]})
+                mlflow.set_tag("sweep_best_trial", best["trial_id"])
+            mlflow.log_metric("sweep_wall_seconds", leaderboard.sweep["wall_seconds"])
+            mlflow.log_artifact(str(path), artifact_path="sweep")
+        except Exception as e:
+            print(f"[WARNING] Could not log leaderboard to MLflow: {e}")
@@ -0,0 +1,221 @@
+"""
+Frozen-backbone feature cache for retraining only the trainable tail.
+
+ModelTrainer freezes all but the last `trainable_layers` layers, so the
+frozen prefix computes the same activations for an image in every epoch.
+split_model() cuts the network into that frozen backbone and a head made
+of the trainable tail (sharing the original layer objects, so training
+the head trains the model). FeatureCache runs the backbone once over the
+dataset and stores the activations that cross the cut as .npy files,
+which training then reads memory-mapped:
+
+    <cache_dir>/<key>/features-0.npy   (N, ...) one file per tensor crossing the cut
+    <cache_dir>/<key>/labels.npy       float32 (N,)
+    <cache_dir>/<key>/index.json       key inputs, count and shapes
+
+A cache is built in a private .partial directory and renamed into place
+when complete, so concurrent trainers (sweep workers) sharing a key never
+read a half-written cache; if two build the same key, the first rename wins.
+
+The key covers the base model file, the cut point, image size, the ELA
+parameters recorded in the dataset's manifest and the dataset files
+themselves, so a new base model, new ELA settings or refreshed data
+gets a new cache.
+"""
+
+from pathlib import Path
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+
+INDEX_FILENAME = "index.json"
+
+
+def split_model(model, trainable_layers: int):
+    """
+    (backbone, head) with head(backbone(x)) == model(x). The backbone maps
+    the model inputs to every tensor that crosses from the frozen layers
+    into the last `trainable_layers` layers; the head maps those tensors to
+    the model outputs and reuses the model's own layer objects.
+    """
+    import keras
+
+    layers = model.layers
+    if trainable_layers <= 0 or trainable_layers >= len(layers):
+        raise ValueError(f"Cannot split a {len(layers)}-layer model at its last {trainable_layers} layers")
+    frozen = {id(layer) for layer in layers[:-trainable_layers]}
+
+    produced = {id(t) for t in model.inputs}
+    mapping = {}
+    boundary = []
+
+    def to_head_input(x):
+        if not isinstance(x, keras.KerasTensor):
+            return x
+        if id(x) not in mapping:
+            head_input = keras.Input(shape=x.shape[1:], dtype="float32", name=f"cut_{len(boundary)}")
+            mapping[id(x)] = head_input
+            boundary.append((x, head_input))
+        return mapping[id(x)]
+
+    for layer in layers:
+        if isinstance(layer, keras.layers.InputLayer):
+            continue
+        node = next((n for n in layer._inbound_nodes
+                     if all(id(t) in produced for t in n.input_tensors)), None)
+        if node is None:
+            raise ValueError(f"Layer {layer.name} is not connected to the model inputs")
+        outputs = keras.tree.flatten(node.output_tensors)
+        produced.update(id(t) for t in outputs)
+        if id(layer) in frozen:
+            continue
+
+        args = keras.tree.map_structure(to_head_input, node.arguments.args)
+        kwargs = keras.tree.map_structure(to_head_input, node.arguments.kwargs)
+        new_outputs = keras.tree.flatten(layer(*args, **kwargs))
+        for original, new in zip(outputs, new_outputs):
+            mapping[id(original)] = new
+
+    def unwrap(tensors):
+        return tensors[0] if len(tensors) == 1 else tensors
+
+    backbone = keras.Model(unwrap(model.inputs), unwrap([original for original, _ in boundary]),
+                           name="frozen_backbone")
+    head = keras.Model(unwrap([head_input for _, head_input in boundary]),
+                       unwrap([mapping[id(t)] for t in model.outputs]), name="trainable_head")
+    return backbone, head
+
+
+def _ela_params(data_dir: Path) -> dict:
+    """Parameters the ELA stage recorded in its manifest (empty if none)."""
+    from src.preprocessing.manifest import StageManifest
+
+    manifest = Path(data_dir) / StageManifest.FILENAME
+    if not manifest.exists():
+        return {}
+    try:
+        return json.loads(manifest.read_text()).get("params", {})
+    except (OSError, ValueError):
+        return {}
+
+
+def feature_cache_key(base_model_path: Path, dataset_fingerprint: str, trainable_layers: int,
+                      img_size, dtype: str, data_dir: Path) -> str:
+    from src.preprocessing.manifest import StageManifest
+
+    parts = {
+        "base_model": StageManifest.file_hash(Path(base_model_path)),
+        "trainable_layers": trainable_layers,
+        "img_size": list(img_size),
+        "dtype": dtype,
+        "ela": _ela_params(data_dir),
+        "dataset": dataset_fingerprint,
+    }
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()[:16]
+
+
+class FeatureCache:
+    def __init__(self, cache_dir: Path, key: str, dtype: str = "float16"):
+        """
+        Args:
+            cache_dir: root directory; each key gets its own sub-directory
+            key: from feature_cache_key()
+            dtype: storage dtype of the activations ("float16" halves the
+                disk and page-cache footprint; "float32" is exact)
+        """
+        self.path = Path(cache_dir) / key
+        self.key = key
+        self.dtype = dtype
+
+    def exists(self) -> bool:
+        return (self.path / INDEX_FILENAME).exists()
+
+    def build(self, backbone, batches, count: int):
+        """
+        Run `backbone` once over `batches` of (normalised images, labels)
+        and write the activations for `count` images.
+        """
+        partial = self.path.with_name(f"{self.key}.partial-{os.getpid()}")
+        shutil.rmtree(partial, ignore_errors=True)
+        partial.mkdir(parents=True)
+
+        shapes = [tuple(t.shape[1:]) for t in backbone.outputs]
+        features = [
+            np.lib.format.open_memmap(partial / f"features-{i}.npy", mode="w+",
+                                      dtype=self.dtype, shape=(count, *shape))
+            for i, shape in enumerate(shapes)
+        ]
+        labels = np.lib.format.open_memmap(partial / "labels.npy", mode="w+",
+                                           dtype=np.float32, shape=(count,))
+
+        offset = 0
+        for images, batch_labels in batches:
+            outputs = backbone(images, training=False)
+            if not isinstance(outputs, (list, tuple)):
+                outputs = [outputs]
+            n = len(batch_labels)
+            for target, output in zip(features, outputs):
+                target[offset:offset + n] = np.asarray(output, dtype=np.float32)
+            labels[offset:offset + n] = np.asarray(batch_labels, dtype=np.float32).reshape(-1)
+            offset += n
+
+        if offset != count:
+            raise ValueError(f"Expected {count} images, backbone saw {offset}")
+        for array in features + [labels]:
+            array.flush()
+        del features, labels
+
+        index = {"key": self.key, "count": count, "dtype": self.dtype, "shapes": [list(s) for s in shapes]}
+        (partial / INDEX_FILENAME).write_text(json.dumps(index, indent=2))
+        try:
+            os.rename(partial, self.path)
+        except OSError:
+            if not self.exists():
+                # A stale, incomplete directory rather than a finished cache
+                shutil.rmtree(self.path, ignore_errors=True)
+                os.rename(partial, self.path)
+        shutil.rmtree(partial, ignore_errors=True)
+        print(f"--Cached frozen-backbone features: {count} images -> {self.path}")
+
+    def load(self):
+        """(list of memory-mapped feature arrays, labels)."""
+        index = json.loads((self.path / INDEX_FILENAME).read_text())
+        features = [np.load(self.path / f"features-{i}.npy", mmap_mode="r") for i in range(len(index["shapes"]))]
+        return features, np.load(self.path / "labels.npy", mmap_mode="r")
+
+    def datasets(self, batch_size: int, validation_split: float = 0.0, seed: int = 1337):
+        """
+        (train, validation) tf.data pipelines of (features, label) read
+        from the memory-mapped cache; features is a tuple when more than
+        one tensor crosses the cut. The training order is reshuffled
+        every epoch; validation is None without a split.
+        """
+        import tensorflow as tf
+
+        features, labels = self.load()
+        total = len(labels)
+        order = np.random.default_rng(seed).permutation(total)
+        n_val = int(total * validation_split)
+        val_idx, train_idx = np.sort(order[:n_val]), order[n_val:]
+        epoch_seed = iter(range(seed, seed + 1_000_000))
+
+        def make(indices, shuffle):
+            def generator():
+                idx = np.random.default_rng(next(epoch_seed)).permutation(indices) if shuffle else indices
+                for start in range(0, len(idx), batch_size):
+                    # Sorted within a batch for sequential reads from the memory map
+                    batch = np.sort(idx[start:start + batch_size])
+                    x = tuple(f[batch].astype(np.float32) for f in features)
+                    yield (x[0] if len(x) == 1 else x), labels[batch].reshape(-1, 1)
+
+            specs = tuple(tf.TensorSpec([None, *f.shape[1:]], tf.float32) for f in features)
+            signature = (specs[0] if len(specs) == 1 else specs, tf.TensorSpec([None, 1], tf.float32))
+            steps = -(-len(indices) // batch_size)
+            return (tf.data.Dataset.from_generator(generator, output_signature=signature)
+                    .apply(tf.data.experimental.assert_cardinality(steps))
+                    .prefetch(tf.data.AUTOTUNE))
+
+        return make(train_idx, True), (make(val_idx, False) if n_val else None)
@@ -1,13 +1,143 @@
 from pathlib import Path
+import hashlib
+import time
+import numpy as np
 import tensorflow as tf
 from keras.optimizers import Adam
 from datetime import datetime
+from src.preprocessing.ela_shards import is_shard_dir, load_shard_index, iter_shards
+from src.profiling.profiler import PROFILER, profile_function, profile_stage
+from src.training.feature_cache import FeatureCache, feature_cache_key, split_model
+from src.training.training_config import TrainingConfig
+
+TRAINABLE_LAYERS = 30
+
+
+class EpochProfiler(tf.keras.callbacks.Callback):
+    """Records each fit epoch as a "train.epoch" profiling stage (items = steps)."""
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._stage = profile_stage("train.epoch", items=0, step=epoch)
+        self._record = self._stage.__enter__()
+
+    def on_train_batch_end(self, batch, logs=None):
+        self._record.add(1)
+
+    def on_epoch_end(self, epoch, logs=None):
+        self._stage.__exit__(None, None, None)
+
+
+class TrainingTimer(tf.keras.callbacks.Callback):
+    """
+    Logs seconds per epoch to MLflow and, with target_f1, the time and
+    epochs until the validation F1 first reaches it.
+    """
+
+    def __init__(self, target_f1: float = None, params: dict = None):
+        super().__init__()
+        self.target_f1 = target_f1
+        self.params_to_log = params or {}
+        try:
+            import mlflow
+            self._mlflow = mlflow
+        except ImportError:
+            self._mlflow = None
+
+    def _log(self, fn, *args, **kwargs):
+        if self._mlflow is None:
+            return
+        try:
+            getattr(self._mlflow, fn)(*args, **kwargs)
+        except Exception as e:
+            print(f"[WARNING] Could not log to MLflow: {e}")
+
+    def on_train_begin(self, logs=None):
+        self._start = time.perf_counter()
+        self.time_to_target = None
+        self._log("log_params", self.params_to_log)
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._epoch_start = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        seconds = time.perf_counter() - self._epoch_start
+        self._log("log_metric", "epoch_seconds", seconds, step=epoch)
+
+        logs = logs or {}
+        f1 = logs.get("val_f1", logs.get("f1"))
+        if self.target_f1 is not None and self.time_to_target is None and f1 is not None and f1 >= self.target_f1:
+            self.time_to_target = time.perf_counter() - self._start
+            print(f"--Reached F1 {f1:.4f} >= {self.target_f1} after {epoch + 1} epochs "
+                  f"({self.time_to_target:.1f}s)")
+            self._log("log_metric", "time_to_target_f1_seconds", self.time_to_target)
+            self._log("log_metric", "epochs_to_target_f1", epoch + 1)
+
+    def on_train_end(self, logs=None):
+        self._log("log_metric", "train_seconds", time.perf_counter() - self._start)
+
+
+def with_dtype_policy(model, policy: str):
+    """
+    Rebuild `model` with every layer on the given dtype policy (e.g.
+    "mixed_bfloat16") and copy its weights. The output layer stays float32
+    so the sigmoid and the loss are computed at full precision. Needed
+    because a loaded model keeps the policies it was saved with.
+    """
+    config = model.get_config()
+    output_name = model.layers[-1].name
+
+    def set_policy(node, name):
+        if isinstance(node, dict):
+            if node.get("class_name") == "DTypePolicy":
+                node["config"]["name"] = name
+            for value in node.values():
+                set_policy(value, name)
+        elif isinstance(node, list):
+            for value in node:
+                set_policy(value, name)
+
+    set_policy(config, policy)
+    for layer in config["layers"]:
+        if layer.get("config", {}).get("name") == output_name:
+            set_policy(layer, "float32")
+
+    rebuilt = model.__class__.from_config(config)
+    rebuilt.set_weights(model.get_weights())
+    return rebuilt
+
 
 class ModelTrainer:
-    def __init__(self, base_model_path: Path, img_size=(224,224), batch_size=16):
+    """
+    Fine-tunes the base model on an ELA dataset.
+
+    input_mode="legacy" keeps the original per-epoch decode pipeline.
+    input_mode="fast" decodes once into a uint8 cache (in memory, or on
+    disk when `cache` is a directory), reshuffles per epoch from the cache,
+    normalises with a parallel map and prefetches. `validation_split` uses
+    a fixed `seed`, so the train/validation split is the same every run.
+    input_mode="shards" reads a packed shard dir (see ela_shards) with
+    sequential, memory-mapped I/O and no per-file JPEG decodes.
+    input_mode="features" runs the frozen layers once per dataset version,
+    caches their activations under `cache` (default "feature_cache", see
+    feature_cache) and trains only the trainable tail on them; the data
+    dir may be an ELA folder or a shard dir.
+    `trainable_layers` is how many of the last layers are fine-tuned.
+    `config` (TrainingConfig) adds XLA, bfloat16, learning-rate scaling,
+    early stopping and checkpoint resume; None trains as before.
+    """
+
+    def __init__(self, base_model_path: Path, img_size=(224,224), batch_size=16,
+                 input_mode="legacy", cache=None, validation_split=0.0, seed=1337,
+                 config: TrainingConfig = None, trainable_layers: int = TRAINABLE_LAYERS):
         self.base_model_path = base_model_path
         self.img_size = img_size
         self.batch_size = batch_size
+        self.input_mode = input_mode
+        self.cache = cache
+        self.validation_split = validation_split
+        self.seed = seed
+        self.config = config
+        self.trainable_layers = trainable_layers
 
     def _load_data(self, data_dir: Path):
         data = tf.keras.utils.image_dataset_from_directory(
@@ -18,22 +148,209 @@ class ModelTrainer:
         )
         return data.map(lambda x, y: (x/255.0, y))
 
-    def _freeze_layers(self, model, trainable_layers=30):
-        for layer in model.layers[:-trainable_layers]:
+    def _fingerprint(self, data_dir: Path) -> str:
+        """
+        Changes whenever the data files, image size, split or seed change.
+        Dotfiles are skipped: the stage manifest (.manifest.json) is
+        rewritten by every preprocessing run, even one that changed nothing.
+        """
+        digest = hashlib.sha256(repr((self.img_size, self.validation_split, self.seed)).encode())
+        for path in sorted(Path(data_dir).rglob("*")):
+            relative = path.relative_to(data_dir)
+            if path.is_file() and not any(part.startswith(".") for part in relative.parts):
+                stat = path.stat()
+                digest.update(f"{relative}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+        return digest.hexdigest()[:16]
+
+    def _cached(self, data, name):
+        if self.cache is None:
+            return data
+        if self.cache == "memory":
+            return data.cache()
+        cache_dir = Path(self.cache)
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        return data.cache(str(cache_dir / f"{name}-{self._cache_key}"))
+
+    def _finish(self, data, name, training):
+        # Cache decoded uint8 images (4x smaller than float32), then
+        # shuffle / batch / normalise / prefetch per epoch
+        data = self._cached(data, name)
+        if training:
+            data = data.shuffle(1024, seed=self.seed, reshuffle_each_iteration=True)
+        data = data.batch(self.batch_size)
+        data = data.map(
+            lambda x, y: (tf.cast(x, tf.float32) / 255.0, y),
+            num_parallel_calls=tf.data.AUTOTUNE
+        )
+        return data.prefetch(tf.data.AUTOTUNE)
+
+    def _to_uint8(self, data):
+        return data.map(
+            lambda x, y: (tf.cast(tf.round(x), tf.uint8), y),
+            num_parallel_calls=tf.data.AUTOTUNE
+        )
+
+    def _load_data_fast(self, data_dir: Path):
+        """Returns (train, validation); validation is None without a split."""
+        options = dict(
+            image_size=self.img_size,
+            batch_size=None,
+            label_mode="binary",
+            shuffle=True,
+            seed=self.seed
+        )
+        if self.validation_split:
+            train, val = tf.keras.utils.image_dataset_from_directory(
+                data_dir,
+                validation_split=self.validation_split,
+                subset="both",
+                **options
+            )
+            return (self._finish(self._to_uint8(train), "train", True),
+                    self._finish(self._to_uint8(val), "val", False))
+
+        train = tf.keras.utils.image_dataset_from_directory(data_dir, **options)
+        return self._finish(self._to_uint8(train), "train", True), None
+
+    def _load_data_shards(self, shard_dir: Path):
+        """Returns (train, validation) read from uint8 shards."""
+        index = load_shard_index(shard_dir)
+        height, width = index["image_size"]
+        if (height, width) != tuple(self.img_size):
+            raise ValueError(f"Shards are {height}x{width}, trainer expects {self.img_size}")
+
+        total = index["count"]
+        is_val = np.zeros(total, dtype=bool)
+        if self.validation_split:
+            rng = np.random.default_rng(self.seed)
+            is_val[rng.permutation(total)[:int(total * self.validation_split)]] = True
+
+        def subset(want_val):
+            def generator():
+                offset = 0
+                for images, labels, _ in iter_shards(shard_dir):
+                    mask = is_val[offset:offset + len(labels)] == want_val
+                    offset += len(labels)
+                    yield images[mask], labels[mask]
+
+            data = tf.data.Dataset.from_generator(
+                generator,
+                output_signature=(
+                    tf.TensorSpec([None, height, width, 3], tf.uint8),
+                    tf.TensorSpec([None], tf.uint8)
+                )
+            ).unbatch()
+            return data.map(lambda x, y: (x, tf.cast(tf.reshape(y, [1]), tf.float32)))
+
+        train = self._finish(subset(False), "train", True)
+        val = self._finish(subset(True), "val", False) if self.validation_split else None
+        return train, val
+
+    @profile_function()
+    def load_datasets(self, data_dir: Path):
+        if self.cache not in (None, "memory"):
+            self._cache_key = self._fingerprint(data_dir)
+        if self.input_mode == "shards":
+            return self._load_data_shards(data_dir)
+        if self.input_mode == "fast":
+            return self._load_data_fast(data_dir)
+        return self._load_data(data_dir), None
+
+    def _feature_batches(self, data_dir: Path, batch_size: int = 64):
+        """(count, iterator of normalised (images, labels) batches) in a fixed order."""
+        if is_shard_dir(data_dir):
+            def shard_batches():
+                for images, labels, _ in iter_shards(data_dir):
+                    for i in range(0, len(labels), batch_size):
+                        yield images[i:i + batch_size].astype(np.float32) / 255.0, labels[i:i + batch_size]
+            return load_shard_index(data_dir)["count"], shard_batches()
+
+        data = tf.keras.utils.image_dataset_from_directory(
+            data_dir,
+            image_size=self.img_size,
+            batch_size=batch_size,
+            label_mode="binary",
+            shuffle=False
+        )
+        count = len(data.file_paths)
+        return count, ((images.numpy() / 255.0, labels.numpy()) for images, labels in data)
+
+    def _load_data_features(self, data_dir: Path, backbone):
+        """Returns (train, validation) over cached frozen-backbone activations."""
+        key = feature_cache_key(self.base_model_path, self._fingerprint(data_dir), self.trainable_layers,
+                                self.img_size, "float16", data_dir)
+        cache = FeatureCache(Path(self.cache or "feature_cache"), key, dtype="float16")
+        if cache.exists():
+            print(f"--Reusing frozen-backbone features: {cache.path}")
+        else:
+            count, batches = self._feature_batches(data_dir)
+            with profile_stage("train.feature_cache", items=count):
+                cache.build(backbone, batches, count)
+        return cache.datasets(self.batch_size, self.validation_split, self.seed)
+
+    def _freeze_layers(self, model):
+        for layer in model.layers[:-self.trainable_layers]:
             layer.trainable = False
 
+    def _callbacks(self, config: TrainingConfig, has_validation: bool, params: dict):
+        callbacks = [TrainingTimer(config.target_f1, params)]
+        if PROFILER.enabled:
+            callbacks.append(EpochProfiler())
+        if config.early_stopping_patience:
+            if not has_validation:
+                print("[WARNING] Early stopping without a validation split monitors the training loss")
+            callbacks.append(tf.keras.callbacks.EarlyStopping(
+                monitor="val_loss" if has_validation else "loss",
+                patience=config.early_stopping_patience,
+                restore_best_weights=True
+            ))
+        if config.checkpoint_dir:
+            # Resumes an interrupted fit from the last finished epoch; removed on success
+            callbacks.append(tf.keras.callbacks.BackupAndRestore(str(config.checkpoint_dir)))
+        return callbacks
+
     def train_and_save(self, ela_data_path: Path, output_dir="models", epochs=32, lr=1e-5):
-        model = tf.keras.models.load_model(self.base_model_path)
+        config = self.config or TrainingConfig()
+        with profile_stage("train.load_model"):
+            model = tf.keras.models.load_model(self.base_model_path)
+        bfloat16 = config.use_bfloat16()
+        if bfloat16:
+            model = with_dtype_policy(model, "mixed_bfloat16")
         self._freeze_layers(model)
 
-        model.compile(
-            optimizer=Adam(lr),
-            loss="binary_crossentropy",
-            metrics=["accuracy"]
-        )
+        fit_model = model
+        if self.input_mode == "features":
+            # The head shares the model's layer objects, so fitting it trains `model`
+            backbone, fit_model = split_model(model, self.trainable_layers)
+
+        lr = config.scaled_lr(lr, self.batch_size)
+        if self.config is None:
+            fit_model.compile(
+                optimizer=Adam(lr),
+                loss="binary_crossentropy",
+                metrics=["accuracy"]
+            )
+        else:
+            fit_model.compile(
+                optimizer=Adam(lr),
+                loss="binary_crossentropy",
+                metrics=["accuracy", tf.keras.metrics.F1Score(average="micro", threshold=0.5, name="f1")],
+                jit_compile=config.jit_compile
+            )
 
-        train_data = self._load_data(ela_data_path)
-        model.fit(train_data, epochs=epochs)
+        if self.input_mode == "features":
+            train_data, val_data = self._load_data_features(Path(ela_data_path), backbone)
+        else:
+            train_data, val_data = self.load_datasets(ela_data_path)
+        params = {**config.as_dict(), "batch_size": self.batch_size, "lr": lr, "bfloat16": bfloat16,
+                  "input_mode": self.input_mode, "trainable_layers": self.trainable_layers}
+        print(f"--Training: batch_size={self.batch_size}, lr={lr:g}, "
+              f"jit_compile={config.jit_compile}, bfloat16={bfloat16}")
+        callbacks = self._callbacks(config, val_data is not None, params)
+        fit_model.fit(train_data, validation_data=val_data, epochs=epochs, callbacks=callbacks)
+        if bfloat16:
+            # Save float32 weights, so serving does not depend on the trainer's CPU
+            model = with_dtype_policy(model, "float32")
 
         Path(output_dir).mkdir(exist_ok=True)
         model_path = Path(output_dir) / f"model_{datetime.now().strftime('%Y%m%d_%H%M%S')}.keras"
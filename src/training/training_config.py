@@ -0,0 +1,99 @@
+"""
+Performance options for ModelTrainer.train_and_save.
+
+The defaults reproduce the original training run (float32, no XLA, no
+early stopping). TrainingConfig.performance() is the tuned preset: XLA-
+compiled train steps, bfloat16 mixed precision where the CPU has native
+bf16 (AVX512-BF16 / AMX), early stopping with checkpoint resume, and
+learning-rate scaling when the batch size grows.
+"""
+
+import math
+import platform
+from pathlib import Path
+
+LR_SCALING = ("none", "linear", "sqrt")
+MIXED_PRECISION = ("off", "auto", "bfloat16")
+PRESETS = ("performance",)
+
+
+def cpu_supports_bfloat16() -> bool:
+    """True when the CPU advertises native bfloat16 instructions (Linux only)."""
+    if platform.system() != "Linux":
+        return False
+    try:
+        flags = Path("/proc/cpuinfo").read_text()
+    except OSError:
+        return False
+    return "avx512_bf16" in flags or "amx_bf16" in flags
+
+
+class TrainingConfig:
+    def __init__(self, jit_compile: bool = False, mixed_precision: str = "off",
+                 base_batch_size: int = 16, lr_scaling: str = "none",
+                 early_stopping_patience: int = 0, checkpoint_dir: str = None,
+                 target_f1: float = None):
+        """
+        Args:
+            jit_compile: compile train/eval steps with XLA
+            mixed_precision: "off", "bfloat16", or "auto" (bfloat16 only if
+                cpu_supports_bfloat16())
+            base_batch_size: batch size the base learning rate was tuned for
+            lr_scaling: how lr follows batch_size / base_batch_size
+                ("none", "linear" or "sqrt")
+            early_stopping_patience: epochs without val_loss improvement
+                before stopping (0 = off); the best weights are restored
+            checkpoint_dir: back up after every epoch and resume an
+                interrupted run from here (None = off)
+            target_f1: validation F1 whose first reach is logged as
+                time_to_target_f1_seconds
+        """
+        if lr_scaling not in LR_SCALING:
+            raise ValueError(f"Unknown lr_scaling: {lr_scaling} (expected one of {LR_SCALING})")
+        if mixed_precision not in MIXED_PRECISION:
+            raise ValueError(f"Unknown mixed_precision: {mixed_precision} (expected one of {MIXED_PRECISION})")
+        self.jit_compile = jit_compile
+        self.mixed_precision = mixed_precision
+        self.base_batch_size = base_batch_size
+        self.lr_scaling = lr_scaling
+        self.early_stopping_patience = early_stopping_patience
+        self.checkpoint_dir = checkpoint_dir
+        self.target_f1 = target_f1
+
+    @classmethod
+    def performance(cls, checkpoint_dir: str = "checkpoints/train", target_f1: float = None):
+        return cls(jit_compile=True, mixed_precision="auto", lr_scaling="linear",
+                   early_stopping_patience=3, checkpoint_dir=checkpoint_dir, target_f1=target_f1)
+
+    @classmethod
+    def from_options(cls, options: dict = None):
+        """
+        Config from step/sweep arguments: TrainingConfig arguments, or
+        {"preset": "performance", ...} with the preset's own arguments.
+        Empty or None returns None (train as before).
+        """
+        if not options:
+            return None
+        options = dict(options)
+        preset = options.pop("preset", None)
+        if preset is None:
+            return cls(**options)
+        if preset not in PRESETS:
+            raise ValueError(f"Unknown training preset: {preset} (expected one of {PRESETS})")
+        return getattr(cls, preset)(**options)
+
+    def use_bfloat16(self) -> bool:
+        if self.mixed_precision == "auto":
+            return cpu_supports_bfloat16()
+        return self.mixed_precision == "bfloat16"
+
+    def scaled_lr(self, lr: float, batch_size: int) -> float:
+        ratio = batch_size / self.base_batch_size
+        if self.lr_scaling == "linear":
+            return lr * ratio
+        if self.lr_scaling == "sqrt":
+            return lr * math.sqrt(ratio)
+        return lr
+
+    def as_dict(self) -> dict:
+        return dict(vars(self))
@@ -1,19 +1,31 @@
 from zenml import step
 from pathlib import Path
+from src.data_ingestion.data_ingestor import ZipStreamIngestor, is_archive_spec
 from src.preprocessing.image_cleaner import ImageCleaner
+from src.profiling.profiler import profile_step
 
 
 @step
 def clean_images(raw_dataset_path: str, dataset_root_folder: str, clean_dataset_path: str) -> str:
     """
     Cleans the image dataset.
+    raw_dataset_path is either the extracted data dir or, in streaming
+    mode, the comma-separated list of zip archives to read from.
     """
-    base_path = Path(raw_dataset_path)
-    actual_data = base_path / dataset_root_folder 
-
     output_dir = Path(clean_dataset_path)
 
-    cleaner = ImageCleaner(actual_data, output_dir)
-    cleaned_path = cleaner.clean()
+    with profile_step("clean_images") as profile:
+        if is_archive_spec(raw_dataset_path):
+            ingestor = ZipStreamIngestor(raw_dataset_path, dataset_root_folder)
+            cleaner = ImageCleaner(None, output_dir)
+            cleaned_path = cleaner.clean_stream(ingestor.members())
+            ingestor.meter.report()
+        else:
+            base_path = Path(raw_dataset_path)
+            actual_data = base_path / dataset_root_folder 
+
+            cleaner = ImageCleaner(actual_data, output_dir)
+            cleaned_path = cleaner.clean()
+        profile.add(cleaner.throughput["items"])
 
     return str(cleaned_path)
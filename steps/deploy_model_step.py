@@ -1,17 +1,31 @@
 from zenml import step
+import os
 import shutil
 from pathlib import Path
 import json
-import tensorflow as tf
+import time
+import numpy as np
 from src.deployment.cloud_deployer import deploy_to_huggingface
+from src.deployment.quantizer import QUANTIZATION_MODES, convert_to_tflite, tflite_path
+from src.evaluation.evaluator import Evaluator
+from src.inference.predictor import (QUANTIZATION_REPORT, SAVED_MODEL_DIRNAME, Predictor, export_saved_model,
+                                     load_predictor)
+from src.profiling.profiler import profile_stage, profile_step
+from src.serving.batch_predict import ELA_QUALITY, INPUT_SIZE
+from src.sweep.leaderboard import Leaderboard
 
+# Largest F1 drop (absolute) a quantised variant may show and still be promoted
+QUANT_F1_TOLERANCE = 0.01
 
-def export_weights(model_path: Path) -> Path:
+
+def export_weights(model_path: Path, model=None) -> Path:
     """Export model weights for cross-version compatibility"""
     weights_path = model_path.parent / "production_model.weights.h5"
     
-    print(f"[EXPORT] Loading model to export weights...")
-    model = tf.keras.models.load_model(model_path)
+    if model is None:
+        import tensorflow as tf
+        print("[EXPORT] Loading model to export weights...")
+        model = tf.keras.models.load_model(model_path)
     
     print(f"[EXPORT] Saving weights to: {weights_path}")
     model.save_weights(weights_path)
@@ -20,8 +34,126 @@ def export_weights(model_path: Path) -> Path:
     return weights_path
 
 
-@step
-def deploy_model_if_better(metrics: dict, candidate_model_path: str) -> str:
+def export_serving_signature(model_path: Path, model=None) -> Path:
+    """Export a SavedModel with a fixed-shape serving signature for fast inference"""
+    export_dir = model_path.parent / "production_model_savedmodel"
+
+    if model is None:
+        import tensorflow as tf
+        print("[EXPORT] Loading model to export serving signature...")
+        model = tf.keras.models.load_model(model_path)
+
+    if export_dir.exists():
+        shutil.rmtree(export_dir)
+    print(f"[EXPORT] Saving SavedModel to: {export_dir}")
+    export_saved_model(model, export_dir)
+    return export_dir
+
+
+def install_model(candidate_path: Path, prod_path: Path):
+    """
+    Copy the candidate next to the production .keras file and swap it in
+    atomically, so a server reloading the model never sees a partial file.
+    Artifacts exported from the previous model are removed first.
+    """
+    clear_derived_artifacts(prod_path)
+    staging = prod_path.with_name(prod_path.name + ".partial")
+    shutil.copyfile(candidate_path, staging)
+    os.replace(staging, prod_path)
+
+
+def clear_derived_artifacts(prod_path: Path):
+    """
+    Delete the TFLite variants, their report and the SavedModel exported
+    from the current production model. MODEL_BACKEND=auto prefers these
+    over the .keras file, so they must never outlive the model they came from.
+    """
+    for mode in QUANTIZATION_MODES:
+        tflite_path(prod_path, mode).unlink(missing_ok=True)
+    (prod_path.parent / QUANTIZATION_REPORT).unlink(missing_ok=True)
+    shutil.rmtree(prod_path.parent / SAVED_MODEL_DIRNAME, ignore_errors=True)
+
+
+def _latency_ms(model_path: Path, calls: int = 20, predictor=None) -> float:
+    predictor = predictor or load_predictor(model_path)
+    x = np.zeros((1, 224, 224, 3), dtype=np.float32)
+    predictor(x)
+    start = time.perf_counter()
+    for _ in range(calls):
+        predictor(x)
+    return (time.perf_counter() - start) / calls * 1000
+
+
+def export_quantized_variants(model_path: Path, float_metrics: dict, test_spec: dict,
+                              representative_dir: str = None,
+                              tolerance: float = QUANT_F1_TOLERANCE, model=None) -> dict:
+    """
+    Convert the production model to TFLite variants, evaluate each on the
+    test set and keep only those whose F1 stays within `tolerance` of the
+    float model and that are faster than it. Writes the comparison (with
+    the reason for each rejection) to production_model_quantized.json.
+    """
+    if model is None:
+        import tensorflow as tf
+        model = tf.keras.models.load_model(model_path)
+    evaluator = Evaluator()
+
+    report = {
+        "float": {"metrics": float_metrics,
+                  "latency_ms": _latency_ms(model_path, predictor=Predictor.from_keras(model))},
+        "tolerance_f1": tolerance,
+        "variants": {}
+    }
+
+    for mode in QUANTIZATION_MODES:
+        output_path = tflite_path(model_path, mode)
+        output_path.unlink(missing_ok=True)
+
+        if mode == "int8" and representative_dir is None:
+            print("[QUANTIZE] int8: skipped (no representative dataset)")
+            continue
+        try:
+            convert_to_tflite(model, output_path, mode, representative_dir=representative_dir)
+        except Exception as e:
+            print(f"[WARNING] {mode} conversion failed: {e}")
+            continue
+
+        variant_metrics = evaluator.evaluate_streaming(
+            output_path,
+            test_spec["path"],
+            image_size=test_spec["image_size"],
+            batch_size=test_spec["batch_size"]
+        )
+        delta = {k: variant_metrics[k] - float_metrics[k] for k in ("accuracy", "f1")}
+        latency_ms = _latency_ms(output_path)
+        rejected = []
+        if delta["f1"] < -tolerance:
+            rejected.append(f"F1 drop {-delta['f1']:.4f} > {tolerance}")
+        if latency_ms >= report["float"]["latency_ms"]:
+            rejected.append(f"not faster than float ({latency_ms:.2f} >= {report['float']['latency_ms']:.2f} ms)")
+        promoted = not rejected
+
+        report["variants"][mode] = {
+            "path": output_path.name,
+            "metrics": variant_metrics,
+            "delta": delta,
+            "size_mb": round(output_path.stat().st_size / 1024 / 1024, 2),
+            "latency_ms": latency_ms,
+            "promoted": promoted,
+            "rejected_because": rejected
+        }
+        print(f"[QUANTIZE] {mode}: F1 delta {delta['f1']:+.4f}, {latency_ms:.2f} ms -> "
+              f"{'PROMOTED' if promoted else 'REJECTED (' + '; '.join(rejected) + ')'}")
+        if not promoted:
+            output_path.unlink()
+
+    (model_path.parent / QUANTIZATION_REPORT).write_text(json.dumps(report, indent=2))
+    return report
+
+
+def deploy_if_better(metrics: dict, candidate_model_path: str,
+                     test_spec: dict = None, representative_dir: str = None) -> str:
+    """Install the candidate if it beats production on F1, then export and upload it."""
     prod_path = Path("models/production_model.keras")
     prod_metrics_path = Path("models/production_metrics.json")
     candidate_path = Path(candidate_model_path)
@@ -36,7 +168,7 @@ def deploy_model_if_better(metrics: dict, candidate_model_path: str) -> str:
     if not prod_path.exists():
         print("No production model found -> deploying first model")
         prod_path.parent.mkdir(exist_ok=True)
-        shutil.copy(candidate_path, prod_path)
+        install_model(candidate_path, prod_path)
         prod_metrics_path.write_text(json.dumps(metrics, indent=2))
         should_deploy = True
         result = "DEPLOYED_FIRST_MODEL"
@@ -48,7 +180,7 @@ def deploy_model_if_better(metrics: dict, candidate_model_path: str) -> str:
 
         if candidate_f1 > prod_f1:
             print("Candidate is BETTER -> replacing production model")
-            shutil.copy(candidate_path, prod_path)
+            install_model(candidate_path, prod_path)
             prod_metrics_path.write_text(json.dumps(metrics, indent=2))
             should_deploy = True
             result = "DEPLOYED_NEW_MODEL"
@@ -59,16 +191,63 @@ def deploy_model_if_better(metrics: dict, candidate_model_path: str) -> str:
     # Deploy to cloud if we have a new/better model
     if should_deploy:
         try:
-            # Step 1: Export weights for cross-version compatibility
-            print("\n[CLOUD DEPLOY] Step 1: Exporting weights...")
-            export_weights(prod_path)
-            
-            # Step 2: Upload to Hugging Face
-            print("\n[CLOUD DEPLOY] Step 2: Uploading to Hugging Face...")
-            deploy_to_huggingface(prod_path)
+            with profile_step("deploy_model"):
+                # Load once; every export below works from this model
+                print("\n[CLOUD DEPLOY] Loading production model...")
+                with profile_stage("deploy.load_model"):
+                    import tensorflow as tf
+                    model = tf.keras.models.load_model(prod_path)
+
+                # Step 1: Export weights for cross-version compatibility
+                print("\n[CLOUD DEPLOY] Step 1: Exporting weights...")
+                with profile_stage("deploy.export_weights"):
+                    export_weights(prod_path, model)
+
+                # Step 2: Export the compiled serving signature
+                print("\n[CLOUD DEPLOY] Step 2: Exporting serving signature...")
+                with profile_stage("deploy.export_serving_signature"):
+                    export_serving_signature(prod_path, model)
+
+                # Step 3: Quantised CPU variants (needs the streaming test set spec)
+                if test_spec is not None:
+                    print("\n[CLOUD DEPLOY] Step 3: Quantizing for CPU serving...")
+                    with profile_stage("deploy.quantize"):
+                        export_quantized_variants(prod_path, metrics, test_spec, representative_dir, model=model)
+
+                # Step 4: Upload changed files to Hugging Face (or DEPLOY_REGISTRY_DIR)
+                print("\n[CLOUD DEPLOY] Step 4: Uploading to Hugging Face...")
+                with profile_stage("deploy.upload"):
+                    deploy_to_huggingface(prod_path)
             
         except Exception as e:
             print(f"[WARNING] Cloud deployment failed: {e}")
             print("Local deployment succeeded, but cloud deployment failed.")
 
     return result
+
+
+@step
+def deploy_model_if_better(metrics: dict, candidate_model_path: str,
+                           test_spec: dict = None, representative_dir: str = None) -> str:
+    return deploy_if_better(metrics, candidate_model_path, test_spec, representative_dir)
+
+
+@step
+def deploy_best_from_leaderboard(leaderboard_path: str, representative_dir: str = None) -> str:
+    """
+    Deploy the top trial of a sweep leaderboard (see sweep_runner) if it
+    beats production. Only trials trained with the serving apps' ELA
+    quality and input size are eligible, since serving preprocesses with
+    those. The trial's own ELA test set is used for quantisation checks,
+    and its ELA training set as the int8 representative data.
+    """
+    leaderboard = Leaderboard.load(Path(leaderboard_path))
+    best = leaderboard.best({"ela_quality": ELA_QUALITY, "img_size": list(INPUT_SIZE)})
+    if best is None:
+        print(f"[SWEEP] No finished trial with ela_quality={ELA_QUALITY}, img_size={list(INPUT_SIZE)}")
+        return "NO_ELIGIBLE_TRIAL"
+
+    print(f"[SWEEP] Best trial {best['trial_id']}: {best['params']}")
+    metrics = {**best["metrics"], "sweep_trial": best["trial_id"], "params": best["params"]}
+    return deploy_if_better(metrics, best["model_path"], best["test_spec"],
+                            representative_dir or best["ela_path"])
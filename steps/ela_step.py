@@ -1,17 +1,21 @@
 from zenml import step
 from pathlib import Path
 from src.preprocessing.ela_processor import ELAProcessor
+from src.profiling.profiler import profile_step
 
 
 @step
-def generate_ela(clean_dataset_path: str, ela_dataset_path: str) -> str:
+def generate_ela(clean_dataset_path: str, ela_dataset_path: str, workers: int = 1) -> str:
     """
     Converts clean images into ELA images.
+    workers > 1 runs ELA in a process pool (0 = one per CPU core).
     """
     input_dir = Path(clean_dataset_path)
     output_dir = Path(ela_dataset_path)
 
-    ela = ELAProcessor(input_dir, output_dir)
-    ela_path = ela.process()
+    with profile_step("generate_ela") as profile:
+        ela = ELAProcessor(input_dir, output_dir, workers=workers)
+        ela_path = ela.process()
+        profile.add(ela.throughput["items"])
 
     return str(ela_path)
@@ -1,16 +1,41 @@
 from zenml import step
-import mlflow
 from src.evaluation.evaluator import Evaluator
+from src.profiling.profiler import profile_step
 
 @step
 def evaluate_model(model_path: str, X_test, y_test) -> dict:
     print(f"🔍 Loading model from: {model_path}")
 
     evaluator = Evaluator()
-    metrics = evaluator.evaluate(model_path, X_test, y_test)
+    with profile_step("evaluate_model", items=len(y_test)):
+        metrics = evaluator.evaluate(model_path, X_test, y_test)
 
     print(f"📊 Evaluation metrics: {metrics}")
 
+    import mlflow
+    mlflow.log_metric("test_accuracy", metrics["accuracy"])
+    mlflow.log_metric("test_f1", metrics["f1"])
+
+    return metrics
+
+
+@step
+def evaluate_model_streaming(model_path: str, test_spec: dict) -> dict:
+    print(f"🔍 Loading model from: {model_path}")
+    print(f"📂 Streaming test data from: {test_spec['path']}")
+
+    evaluator = Evaluator()
+    with profile_step("evaluate_model_streaming"):
+        metrics = evaluator.evaluate_streaming(
+            model_path,
+            test_spec["path"],
+            image_size=test_spec["image_size"],
+            batch_size=test_spec["batch_size"]
+        )
+
+    print(f"📊 Evaluation metrics: {metrics}")
+
+    import mlflow
     mlflow.log_metric("test_accuracy", metrics["accuracy"])
     mlflow.log_metric("test_f1", metrics["f1"])
 
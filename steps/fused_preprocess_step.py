@@ -0,0 +1,34 @@
+from zenml import step
+from pathlib import Path
+from src.data_ingestion.data_ingestor import ZipStreamIngestor, is_archive_spec
+from src.preprocessing.fused_preprocessor import FusedPreprocessor
+from src.profiling.profiler import profile_step
+
+
+@step
+def clean_and_generate_ela(raw_dataset_path: str, dataset_root_folder: str, ela_dataset_path: str,
+                           clean_dataset_path: str = None, workers: int = 1) -> str:
+    """
+    Cleans images and generates their ELA in a single stage (one decode
+    per source image instead of clean_images followed by generate_ela).
+    The cleaned copies are only written when clean_dataset_path is given.
+    raw_dataset_path is the extracted data dir or, in streaming mode, the
+    comma-separated list of zip archives to read from.
+    """
+    ela_dir = Path(ela_dataset_path)
+    clean_dir = Path(clean_dataset_path) if clean_dataset_path else None
+
+    with profile_step("clean_and_generate_ela") as profile:
+        if is_archive_spec(raw_dataset_path):
+            ingestor = ZipStreamIngestor(raw_dataset_path, dataset_root_folder)
+            fused = FusedPreprocessor(None, ela_dir, clean_dir, workers=workers)
+            ela_path = fused.process_stream(ingestor.members())
+            ingestor.meter.report()
+        else:
+            actual_data = Path(raw_dataset_path) / dataset_root_folder
+
+            fused = FusedPreprocessor(actual_data, ela_dir, clean_dir, workers=workers)
+            ela_path = fused.process()
+        profile.add(fused.throughput["items"])
+
+    return str(ela_path)
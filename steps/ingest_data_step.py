@@ -1,18 +1,25 @@
 from zenml import step
 from pathlib import Path
-from src.data_ingestion.data_ingestor import DataIngestorFactory
+from src.data_ingestion.data_ingestor import DataIngestorFactory, ZipStreamIngestor
+from src.profiling.profiler import profile_step
 
 
 @step
-def ingest_data(zip_file_path: str, extract_dir: str) -> str:
+def ingest_data(zip_file_path: str, extract_dir: str, streaming: bool = False) -> str:
     """
     ZenML step that ingests (unzips if needed) the dataset
     and returns the path to the extracted data.
+
+    zip_file_path may list several archives separated by commas.
+    With streaming=True nothing is extracted: the archive list is returned
+    and the cleaning step reads members directly from the archives.
     """
-    zip_path = Path(zip_file_path)
     output_dir = Path(extract_dir)
 
-    ingestor = DataIngestorFactory.create(zip_path, output_dir)
-    dataset_path = ingestor.ingest()
+    with profile_step("ingest_data"):
+        ingestor = DataIngestorFactory.create(zip_file_path, output_dir, streaming=streaming)
+        dataset_path = ingestor.ingest()
 
+    if isinstance(ingestor, ZipStreamIngestor):
+        return ",".join(str(p) for p in ingestor.zip_paths)
     return str(dataset_path)
@@ -1,40 +1,84 @@
 from zenml import step
 from pathlib import Path
-import tensorflow as tf
 from src.preprocessing.image_cleaner import ImageCleaner
 from src.preprocessing.ela_processor import ELAProcessor
-from typing import Tuple
+from src.preprocessing.fused_preprocessor import FusedPreprocessor
+from src.preprocessing.ela_shards import ELAShardWriter
+from src.profiling.profiler import profile_step, profile_stage
+from typing import Any, Tuple
+
+
+def _build_test_ela(test_dir: str, clean_dir: str, ela_dir: str, fused: bool = False) -> Path:
+    if fused:
+        return FusedPreprocessor(Path(test_dir), Path(ela_dir), Path(clean_dir)).process()
+
+    cleaner = ImageCleaner(Path(test_dir), Path(clean_dir))
+    clean_path = cleaner.clean()
+
+    ela = ELAProcessor(clean_path, Path(ela_dir))
+    return ela.process()
+
 
 @step
 def prepare_test_data(
     test_dir: str,
     clean_dir: str,
-    ela_dir: str
-) -> Tuple[tf.Tensor, tf.Tensor]:
+    ela_dir: str,
+    fused: bool = False
+) -> Tuple[Any, Any]:
+    """
+    Materialised (X, y) tf.Tensors. The outputs are annotated Any so ZenML
+    can resolve them without importing TensorFlow at module import.
+    """
+    import tensorflow as tf
 
-    test_dir = Path(test_dir)
-    clean_dir = Path(clean_dir)
-    ela_dir = Path(ela_dir)
+    with profile_step("prepare_test_data"):
+        ela_path = _build_test_ela(test_dir, clean_dir, ela_dir, fused)
 
-    cleaner = ImageCleaner(test_dir, clean_dir)
-    clean_path = cleaner.clean()
+        with profile_stage("prepare_test_data.load") as load:
+            data = tf.keras.utils.image_dataset_from_directory(
+                ela_path,
+                image_size=(224,224),
+                batch_size=32,
+                shuffle=False
+            )
 
-    ela = ELAProcessor(clean_path, ela_dir)
-    ela_path = ela.process()
+            X, y = [], []
+            for images, labels in data:
+                X.append(images)
+                y.append(labels)
+                load.add(len(labels))
 
-    data = tf.keras.utils.image_dataset_from_directory(
-        ela_path,
-        image_size=(224,224),
-        batch_size=32,
-        shuffle=False
-    )
+            X = tf.concat(X, axis=0) / 255.0
+            y = tf.concat(y, axis=0)
 
-    X, y = [], []
-    for images, labels in data:
-        X.append(images)
-        y.append(labels)
+    return X, y
 
-    X = tf.concat(X, axis=0) / 255.0
-    y = tf.concat(y, axis=0)
 
-    return X, y
+@step
+def prepare_test_data_spec(
+    test_dir: str,
+    clean_dir: str,
+    ela_dir: str,
+    batch_size: int = 32,
+    shards: bool = False,
+    fused: bool = False
+) -> dict:
+    """
+    Streaming variant of prepare_test_data: builds the ELA test set on disk
+    and returns a small dataset spec instead of materialised tensors.
+    With shards=True the ELA images are also packed into uint8 shards and
+    the spec points at those. fused=True builds the ELA set with the
+    single-decode FusedPreprocessor.
+    """
+    with profile_step("prepare_test_data_spec"):
+        ela_path = _build_test_ela(test_dir, clean_dir, ela_dir, fused)
+        if shards:
+            ela_path = ELAShardWriter(ela_path, Path(f"{ela_dir}_shards")).write()
+
+    return {
+        "path": str(ela_path),
+        "format": "shards" if shards else "directory",
+        "image_size": [224, 224],
+        "batch_size": batch_size
+    }
@@ -0,0 +1,22 @@
+from zenml import step
+from pathlib import Path
+from src.preprocessing.ela_shards import ELAShardWriter
+from src.profiling.profiler import profile_step
+
+
+@step
+def pack_ela_shards(ela_dataset_path: str, shard_dataset_path: str,
+                    shard_size: int = 1024, workers: int = 1) -> str:
+    """
+    Packs ELA images into fixed-size uint8 shards with an index.
+    """
+    with profile_step("pack_ela_shards"):
+        writer = ELAShardWriter(
+            Path(ela_dataset_path),
+            Path(shard_dataset_path),
+            shard_size=shard_size,
+            workers=workers
+        )
+        shard_path = writer.write()
+
+    return str(shard_path)
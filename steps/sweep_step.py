@@ -0,0 +1,41 @@
+from zenml import step
+from pathlib import Path
+from src.profiling.profiler import profile_step
+from src.sweep.sweep_runner import SweepRunner, grid_trials, random_trials
+
+@step(enable_cache=False)
+def run_sweep(clean_data_path: str, test_clean_path: str, base_model_path: str,
+              space: dict = None, search: str = "grid", n_trials: int = 8, seed: int = 0,
+              workers: int = 0, epochs: int = 4, sweep_dir: str = "sweeps/default",
+              input_mode: str = "fast", validation_split: float = 0.0,
+              training_config: dict = None) -> str:
+    """
+    space: {parameter: [values]} over ela_quality, img_size, lr,
+    trainable_layers and batch_size; missing parameters keep today's value.
+    search: "grid" (every combination) or "random" (n_trials of them).
+    workers: concurrent trials (0 = one per core); the cores are split
+    between them. Returns the leaderboard path.
+    """
+    if search == "grid":
+        trials = grid_trials(space)
+    elif search == "random":
+        trials = random_trials(space, n_trials, seed)
+    else:
+        raise ValueError(f"Unknown search: {search} (expected 'grid' or 'random')")
+
+    runner = SweepRunner(
+        Path(base_model_path),
+        Path(clean_data_path),
+        Path(test_clean_path),
+        sweep_dir=Path(sweep_dir),
+        workers=workers or None,
+        epochs=epochs,
+        input_mode=input_mode,
+        validation_split=validation_split,
+        training_config=training_config
+    )
+
+    with profile_step("run_sweep", items=len(trials)):
+        runner.run(trials)
+
+    return str(Path(sweep_dir) / "leaderboard.json")
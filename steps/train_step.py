@@ -1,15 +1,43 @@
 from zenml import step
 from pathlib import Path
-from src.training.model_trainer import ModelTrainer
-import mlflow
+from src.profiling.profiler import profile_step
 
 @step(enable_cache=False)
-def train_model(ela_data_path: str, base_model_path: str) -> str:
-    trainer = ModelTrainer(Path(base_model_path))
+def train_model(ela_data_path: str, base_model_path: str, input_mode: str = "legacy",
+                cache: str = None, validation_split: float = 0.0, batch_size: int = 16,
+                epochs: int = 32, training_config: dict = None) -> str:
+    """
+    input_mode: "legacy" (default, the original loader), "fast" (opt-in:
+    parallel, prefetched, optionally cached), "shards", or "features"
+    (train only the unfrozen tail on cached frozen-layer activations).
+    cache: None, "memory" or a directory for an on-disk decoded-image cache;
+    with input_mode="features", the feature cache root.
+    training_config: TrainingConfig arguments, or {"preset": "performance"}
+    for XLA + bfloat16 (where supported) + early stopping + checkpoint
+    resume; None trains as before. Early stopping needs a validation
+    split, so 0.1 is used when none is given.
+    """
+    import mlflow
+    from src.training.model_trainer import ModelTrainer
+    from src.training.training_config import TrainingConfig
+
+    config = TrainingConfig.from_options(training_config)
+    if config is not None and config.early_stopping_patience and not validation_split:
+        validation_split = 0.1
+
+    trainer = ModelTrainer(
+        Path(base_model_path),
+        batch_size=batch_size,
+        input_mode=input_mode,
+        cache=cache,
+        validation_split=validation_split,
+        config=config
+    )
 
     mlflow.tensorflow.autolog()
 
-    model_path = trainer.train_and_save(Path(ela_data_path))
+    with profile_step("train_model"):
+        model_path = trainer.train_and_save(Path(ela_data_path), epochs=epochs)
 
     mlflow.log_param("model_path", model_path)
 
@@ -0,0 +1,88 @@
+import asyncio
+import io
+import json
+import time
+import zipfile
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from src.serving import batch_predict
+from src.serving.batch_predict import expand_uploads, predict_stream
+from src.serving.inference_engine import BatchingInferenceEngine
+
+
+def _jpeg(seed: int, size=(48, 48)) -> bytes:
+    pixels = np.random.default_rng(seed).integers(0, 256, (*size, 3), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, "JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def _zip(members) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, data in members:
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+def test_expand_uploads_flattens_archives():
+    items = expand_uploads([("a.jpg", b"a"), ("set.zip", _zip([("x.jpg", b"x"), ("y.jpg", b"y")]))])
+    assert items == [("a.jpg", b"a"), ("set.zip/x.jpg", b"x"), ("set.zip/y.jpg", b"y")]
+
+
+def test_expand_uploads_rejects_too_many_members_before_reading(monkeypatch):
+    monkeypatch.setattr(batch_predict, "MAX_BATCH_FILES", 3)
+    read = []
+    original_read = zipfile.ZipFile.read
+    monkeypatch.setattr(zipfile.ZipFile, "read", lambda self, m: read.append(m) or original_read(self, m))
+
+    archive = _zip([(f"{i}.jpg", b"x") for i in range(10)])
+    with pytest.raises(ValueError, match="Too many images"):
+        expand_uploads([("set.zip", archive)])
+    assert len(read) == 3
+
+
+def test_expand_uploads_rejects_oversized_archive_before_decompressing(monkeypatch):
+    monkeypatch.setattr(batch_predict, "MAX_ARCHIVE_BYTES", 1024 * 1024)
+    # ~8 MB of zeros compresses to a few KB
+    bomb = _zip([("a.jpg", bytes(4 * 1024 * 1024)), ("b.jpg", bytes(4 * 1024 * 1024))])
+    assert len(bomb) < 64 * 1024
+    read = []
+    monkeypatch.setattr(zipfile.ZipFile, "read", lambda self, m: read.append(m))
+    with pytest.raises(ValueError, match="too large"):
+        expand_uploads([("bomb.zip", bomb)])
+    assert read == []
+
+
+def test_stream_cancelled_midway_leaves_the_engine_serving():
+    def predict(batch):
+        time.sleep(0.02)
+        return np.full((len(batch), 1), 0.25)
+
+    engine = BatchingInferenceEngine(predict, max_batch_size=2, max_wait_ms=1).start()
+    items = [(f"{i}.jpg", _jpeg(i)) for i in range(12)]
+
+    async def scenario():
+        stream = predict_stream(items, engine, lambda pred: {"score": float(np.asarray(pred).reshape(-1)[0])})
+        first = json.loads(await stream.__anext__())
+        # The client disconnects: the rest of the stream is cancelled
+        await stream.aclose()
+        await asyncio.sleep(0.2)
+
+        async def collect():
+            return [json.loads(line) async for line in predict_stream(items[:2], engine, lambda p: {"ok": True})]
+
+        # A dead engine thread would leave these requests hanging
+        return first, await asyncio.wait_for(collect(), timeout=5)
+
+    try:
+        first, again = asyncio.run(scenario())
+        assert first["score"] == 0.25
+        assert engine._thread.is_alive()
+        assert sorted(line["index"] for line in again) == [0, 1]
+        assert all(line.get("ok") for line in again)
+    finally:
+        engine.stop()
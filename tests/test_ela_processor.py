@@ -0,0 +1,51 @@
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+from src.preprocessing.ela_processor import ELAProcessor
+from src.preprocessing.manifest import StageManifest
+
+
+def _dataset(root: Path, count: int = 2) -> Path:
+    for label in ("original", "forged"):
+        (root / label).mkdir(parents=True)
+        for i in range(count):
+            Image.new("RGB", (32, 32), (40 * i, 80, 120)).save(root / label / f"{i}.jpg", "JPEG")
+    return root
+
+
+def test_failed_images_fail_the_run_after_the_report(tmp_path):
+    raw = _dataset(tmp_path / "raw")
+    (raw / "forged" / "broken.jpg").write_bytes(b"not an image")
+    ela_dir = tmp_path / "ela"
+
+    processor = ELAProcessor(raw, ela_dir)
+    with pytest.raises(RuntimeError, match="1 images"):
+        processor.process()
+    assert [path.name for path, _ in processor.errors] == ["broken.jpg"]
+    # Good images were written and recorded, so a rerun only retries the failure
+    assert len(list(ela_dir.glob("*/*.jpg"))) == 4
+    assert "forged/0.jpg" in StageManifest(ela_dir, {"stage": "ela", "quality": 90}).entries
+
+    lenient = ELAProcessor(raw, ela_dir, strict=False)
+    assert lenient.process() == ela_dir
+    assert len(lenient.errors) == 1
+
+
+def test_rerun_skips_unchanged_images_and_prunes_removed_ones(tmp_path, capsys):
+    raw = _dataset(tmp_path / "raw")
+    ela_dir = tmp_path / "ela"
+    ELAProcessor(raw, ela_dir).process()
+    before = (ela_dir / "original" / "0.jpg").stat().st_mtime_ns
+
+    (raw / "forged" / "1.jpg").unlink()
+    capsys.readouterr()
+    ELAProcessor(raw, ela_dir).process()
+    out = capsys.readouterr().out
+
+    assert "--Generated ELA images: 0" in out
+    assert "--Skipped unchanged: 3" in out
+    assert "--Deleted stale outputs: 1" in out
+    assert not (ela_dir / "forged" / "1.jpg").exists()
+    assert (ela_dir / "original" / "0.jpg").stat().st_mtime_ns == before
@@ -0,0 +1,83 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from src.preprocessing.ela_shards import ELAShardWriter, is_shard_dir, iter_shards, load_shard_index, resize_bilinear
+
+
+def _ela_dataset(root: Path, count: int = 3) -> Path:
+    for label in ("forged", "original"):
+        (root / label).mkdir(parents=True)
+        for i in range(count):
+            Image.new("RGB", (40, 30), (10 * i, 60, 200)).save(root / label / f"{i}.png")
+    return root
+
+
+def test_unreadable_image_fails_before_the_index_is_written(tmp_path):
+    ela_dir = _ela_dataset(tmp_path / "ela")
+    (ela_dir / "forged" / "broken.png").write_bytes(b"not an image")
+
+    writer = ELAShardWriter(ela_dir, tmp_path / "shards", shard_size=4, image_size=(16, 16))
+    with pytest.raises(RuntimeError, match="1 images"):
+        writer.write()
+    assert not is_shard_dir(tmp_path / "shards")
+
+    lenient = ELAShardWriter(ela_dir, tmp_path / "shards", shard_size=4, image_size=(16, 16), strict=False)
+    lenient.write()
+    assert is_shard_dir(tmp_path / "shards")
+    assert len(lenient.errors) == 1
+
+
+
+def test_resize_matches_tf_bilinear():
+    tf = pytest.importorskip("tensorflow")
+    image = np.random.default_rng(0).integers(0, 256, (77, 103, 3), dtype=np.uint8)
+    for width, height in [(32, 24), (224, 224), (150, 90)]:
+        expected = tf.image.resize(image, (height, width), method="bilinear").numpy()
+        np.testing.assert_allclose(resize_bilinear(image, (width, height)), expected, atol=0.05)
+
+
+def test_shard_pixels_match_the_directory_loader(tmp_path):
+    tf = pytest.importorskip("tensorflow")
+    ela_dir = tmp_path / "ela"
+    rng = np.random.default_rng(1)
+    for label in ("forged", "original"):
+        (ela_dir / label).mkdir(parents=True)
+        for i in range(2):
+            noise = rng.integers(0, 256, (96, 128, 3), dtype=np.uint8)
+            Image.fromarray(noise, "RGB").save(ela_dir / label / f"{i}.png")
+
+    shard_dir = ELAShardWriter(ela_dir, tmp_path / "shards", image_size=(40, 30)).write()
+    packed = {}
+    for images, _, sources in iter_shards(shard_dir):
+        packed.update(zip(sources, images))
+
+    data = tf.keras.utils.image_dataset_from_directory(ela_dir, image_size=(30, 40), batch_size=None,
+                                                       shuffle=False)
+    for path, (image, _) in zip(data.file_paths, data):
+        source = Path(path).relative_to(ela_dir).as_posix()
+        assert np.abs(packed[source].astype(np.float32) - image.numpy()).max() <= 0.51
+
+
+def test_shards_round_trip_images_labels_and_sources(tmp_path):
+    ela_dir = _ela_dataset(tmp_path / "ela")
+    shard_dir = ELAShardWriter(ela_dir, tmp_path / "shards", shard_size=4, image_size=(16, 12)).write()
+
+    index = load_shard_index(shard_dir)
+    assert index["class_names"] == ["forged", "original"]
+    assert index["image_size"] == [12, 16]
+    assert [shard["count"] for shard in index["shards"]] == [4, 2]
+
+    seen = {}
+    for images, labels, sources in iter_shards(shard_dir):
+        assert images.dtype == np.uint8 and images.shape[1:] == (12, 16, 3)
+        for image, label, source in zip(images, labels, sources):
+            seen[source] = (image, label)
+
+    assert sorted(seen) == sorted(p.relative_to(ela_dir).as_posix() for p in ela_dir.glob("*/*.png"))
+    for source, (image, label) in seen.items():
+        expected = resize_bilinear(np.asarray(Image.open(ela_dir / source).convert("RGB")), (16, 12))
+        assert label == index["class_names"].index(source.split("/")[0])
+        np.testing.assert_array_equal(image, np.rint(expected).astype(np.uint8))
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+keras = pytest.importorskip("keras")
+
+from src.training.feature_cache import split_model
+
+
+def _residual_model():
+    inputs = keras.Input(shape=(8, 8, 3))
+    x = keras.layers.Conv2D(4, 3, padding="same", activation="relu", name="stem")(inputs)
+    y = keras.layers.Conv2D(4, 3, padding="same", name="branch")(x)
+    x = keras.layers.Add(name="residual")([x, y])
+    x = keras.layers.GlobalAveragePooling2D(name="pool")(x)
+    outputs = keras.layers.Dense(1, activation="sigmoid", name="out")(x)
+    return keras.Model(inputs, outputs)
+
+
+@pytest.mark.parametrize("trainable_layers", [1, 2, 3, 4])
+def test_head_of_backbone_matches_the_model(trainable_layers):
+    model = _residual_model()
+    x = np.random.default_rng(0).random((5, 8, 8, 3), dtype=np.float32)
+
+    backbone, head = split_model(model, trainable_layers)
+    features = backbone.predict(x, verbose=0)
+
+    np.testing.assert_allclose(head.predict(features, verbose=0), model.predict(x, verbose=0), atol=1e-6)
+    # The head reuses the model's layer objects
+    assert {id(layer) for layer in head.layers if layer.weights} <= {id(layer) for layer in model.layers}
+
+
+def test_cut_through_the_residual_feeds_both_branches():
+    # Last 3 layers start at "residual", which reads two frozen tensors
+    backbone, head = split_model(_residual_model(), 3)
+    assert len(backbone.outputs) == 2
+    assert len(head.inputs) == 2
+
+
+@pytest.mark.parametrize("trainable_layers", [0, 6])
+def test_rejects_cuts_outside_the_model(trainable_layers):
+    with pytest.raises(ValueError):
+        split_model(_residual_model(), trainable_layers)
@@ -0,0 +1,29 @@
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+from benchmarks.bench_import_time import HEAVY_PACKAGES, LIGHT_MODULES, import_profile
+
+# steps/ and pipelines/ need ZenML itself to import
+NEEDS_ZENML = ("steps.", "pipelines.")
+
+
+@pytest.fixture(autouse=True)
+def repo_root(monkeypatch):
+    # import_profile runs a fresh interpreter, which resolves modules from its cwd
+    monkeypatch.chdir(Path(__file__).resolve().parents[1])
+
+
+@pytest.mark.parametrize("module", LIGHT_MODULES)
+def test_light_modules_do_not_import_heavy_frameworks(module):
+    if module.startswith(NEEDS_ZENML) and importlib.util.find_spec("zenml") is None:
+        pytest.skip("zenml is not installed")
+    _, imported = import_profile(module)
+    assert not [package for package in HEAVY_PACKAGES if package in imported]
+
+
+def test_prepare_test_data_does_not_import_tensorflow():
+    pytest.importorskip("zenml")
+    _, imported = import_profile("steps.prepare_test_data")
+    assert "tensorflow" not in imported
@@ -0,0 +1,88 @@
+import asyncio
+import threading
+import time
+
+import numpy as np
+
+from src.serving.inference_engine import BatchingInferenceEngine
+
+
+def _slow_predict(batch):
+    time.sleep(0.05)
+    return batch.reshape(len(batch), -1)[:, :1]
+
+
+def test_batches_requests_and_resolves_in_order():
+    engine = BatchingInferenceEngine(lambda batch: batch[:, 0, 0, :1], max_batch_size=4, max_wait_ms=20).start()
+    try:
+        futures = [engine.submit(np.full((2, 2, 3), i, dtype=np.float32)) for i in range(4)]
+        assert [float(f.result(timeout=2)[0]) for f in futures] == [0.0, 1.0, 2.0, 3.0]
+    finally:
+        engine.stop()
+
+
+def test_cancelled_requests_do_not_stop_the_engine():
+    engine = BatchingInferenceEngine(_slow_predict, max_wait_ms=1).start()
+
+    async def scenario():
+        # One cancelled while the model runs on it, one while still queued
+        running = asyncio.ensure_future(engine.predict(np.ones((2, 2, 3))))
+        await asyncio.sleep(0.01)
+        running.cancel()
+        queued = asyncio.ensure_future(engine.predict(np.ones((2, 2, 3))))
+        await asyncio.sleep(0)
+        queued.cancel()
+        await asyncio.sleep(0.2)
+        return await asyncio.wait_for(engine.predict(np.ones((2, 2, 3))), timeout=2)
+
+    try:
+        assert float(asyncio.run(scenario())[0]) == 1.0
+        assert engine._thread.is_alive()
+    finally:
+        engine.stop()
+
+
+def test_cancelled_future_is_skipped_before_the_model_runs():
+    seen = []
+    release = threading.Event()
+
+    def predict(batch):
+        release.wait(2)
+        seen.append(len(batch))
+        return np.zeros((len(batch), 1))
+
+    engine = BatchingInferenceEngine(predict, max_batch_size=8, max_wait_ms=1).start()
+    try:
+        first = engine.submit(np.ones((2, 2, 3)))
+        time.sleep(0.05)  # first batch is now in predict
+        cancelled = engine.submit(np.ones((2, 2, 3)))
+        kept = engine.submit(np.ones((2, 2, 3)))
+        assert cancelled.cancel()
+        release.set()
+        first.result(timeout=2)
+        kept.result(timeout=2)
+        assert seen == [1, 1]
+    finally:
+        engine.stop()
+
+
+def test_model_errors_are_delivered_and_engine_keeps_running():
+    calls = []
+
+    def predict(batch):
+        calls.append(len(batch))
+        if len(calls) == 1:
+            raise ValueError("boom")
+        return np.zeros((len(batch), 1))
+
+    engine = BatchingInferenceEngine(predict, max_wait_ms=1).start()
+    try:
+        failed = engine.submit(np.ones((2, 2, 3)))
+        try:
+            failed.result(timeout=2)
+            raise AssertionError("expected the model error")
+        except ValueError:
+            pass
+        assert engine.submit(np.ones((2, 2, 3))).result(timeout=2).shape == (1,)
+    finally:
+        engine.stop()
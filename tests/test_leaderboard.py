@@ -0,0 +1,39 @@
+from src.sweep.leaderboard import Leaderboard
+
+
+def _entry(trial_id, f1, accuracy=0.9, train_seconds=10.0, status="ok", **params):
+    return {"trial_id": trial_id, "status": status, "params": params, "train_seconds": train_seconds,
+            "metrics": {"f1": f1, "accuracy": accuracy} if status == "ok" else None}
+
+
+def _board():
+    return Leaderboard([
+        _entry("slow", 0.9, train_seconds=50.0, quality=90, lr=1e-3),
+        _entry("broken", 0.0, status="failed", quality=80, lr=1e-3),
+        _entry("fast", 0.9, train_seconds=5.0, quality=90, lr=1e-4),
+        _entry("q80", 0.8, quality=80, lr=1e-4),
+        _entry("top", 0.95, accuracy=0.8, quality=75, lr=1e-3),
+    ])
+
+
+def test_entries_rank_by_f1_then_accuracy_then_time_with_failures_last():
+    assert [e["trial_id"] for e in _board().entries] == ["top", "fast", "slow", "q80", "broken"]
+
+
+def test_best_filters_on_params_and_skips_failed_trials():
+    board = _board()
+    assert board.best()["trial_id"] == "top"
+    assert board.best({"quality": 90})["trial_id"] == "fast"
+    assert board.best({"quality": 90, "lr": 1e-3})["trial_id"] == "slow"
+    assert board.best({"quality": 80})["trial_id"] == "q80"
+    assert board.best({"quality": 80, "lr": 1e-3}) is None
+    assert board.best({"quality": 60}) is None
+
+
+def test_save_and_load_round_trip(tmp_path):
+    path = _board().save(tmp_path)
+    assert path == tmp_path / Leaderboard.FILENAME
+
+    loaded = Leaderboard.load(tmp_path)
+    assert [e["trial_id"] for e in loaded.entries] == [e["trial_id"] for e in _board().entries]
+    assert loaded.best({"quality": 90})["trial_id"] == "fast"
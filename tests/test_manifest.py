@@ -0,0 +1,66 @@
+import os
+from pathlib import Path
+
+from src.preprocessing.manifest import StageManifest
+
+PARAMS = {"stage": "ela", "quality": 90}
+
+
+def _record(manifest: StageManifest, source: Path, name: str) -> Path:
+    output = manifest.output_dir / name
+    output.write_bytes(b"out-" + source.read_bytes())
+    manifest.record(source.name, source, output)
+    return output
+
+
+def test_unchanged_and_touched_sources_are_current(tmp_path):
+    out = tmp_path / "out"
+    out.mkdir()
+    source = tmp_path / "a.jpg"
+    source.write_bytes(b"aaaa")
+    manifest = StageManifest(out, PARAMS)
+    _record(manifest, source, "a.jpg")
+    manifest.save()
+
+    reloaded = StageManifest(out, PARAMS)
+    assert reloaded.is_current("a.jpg", source)
+
+    # Touched with the same content: the hash keeps it current
+    stat = source.stat()
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert reloaded.is_current("a.jpg", source)
+
+    source.write_bytes(b"bbbb")
+    assert not reloaded.is_current("a.jpg", source)
+
+
+def test_missing_output_or_new_params_invalidate(tmp_path):
+    out = tmp_path / "out"
+    out.mkdir()
+    source = tmp_path / "a.jpg"
+    source.write_bytes(b"aaaa")
+    manifest = StageManifest(out, PARAMS)
+    output = _record(manifest, source, "a.jpg")
+    manifest.save()
+
+    assert not StageManifest(out, {**PARAMS, "quality": 80}).is_current("a.jpg", source)
+    output.unlink()
+    assert not StageManifest(out, PARAMS).is_current("a.jpg", source)
+
+
+def test_prune_deletes_outputs_of_vanished_sources(tmp_path):
+    out, mirror = tmp_path / "out", tmp_path / "mirror"
+    out.mkdir()
+    mirror.mkdir()
+    manifest = StageManifest(out, PARAMS, mirror_dirs=[mirror])
+    outputs = {}
+    for name in ("keep.jpg", "gone.jpg"):
+        source = tmp_path / name
+        source.write_bytes(name.encode())
+        outputs[name] = _record(manifest, source, name)
+        (mirror / name).write_bytes(b"clean")
+
+    assert manifest.prune({"keep.jpg"}) == 1
+    assert set(manifest.entries) == {"keep.jpg"}
+    assert outputs["keep.jpg"].exists() and (mirror / "keep.jpg").exists()
+    assert not outputs["gone.jpg"].exists() and not (mirror / "gone.jpg").exists()
@@ -0,0 +1,29 @@
+from pathlib import Path
+
+from PIL import Image
+
+from src.preprocessing.ela_processor import ELAProcessor
+from src.training.model_trainer import ModelTrainer
+
+
+def _raw_dataset(root: Path) -> Path:
+    for label in ("original", "forged"):
+        (root / label).mkdir(parents=True)
+        for i in range(2):
+            Image.new("RGB", (32, 32), (40 * i, 80, 120)).save(root / label / f"{i}.jpg", "JPEG")
+    return root
+
+
+def test_fingerprint_survives_a_no_op_ela_rerun(tmp_path):
+    raw = _raw_dataset(tmp_path / "raw")
+    ela_dir = tmp_path / "ela"
+    trainer = ModelTrainer(Path("unused.keras"))
+
+    ELAProcessor(raw, ela_dir).process()
+    first = trainer._fingerprint(ela_dir)
+    ELAProcessor(raw, ela_dir).process()  # rewrites .manifest.json only
+    assert trainer._fingerprint(ela_dir) == first
+
+    Image.new("RGB", (32, 32)).save(raw / "forged" / "new.jpg", "JPEG")
+    ELAProcessor(raw, ela_dir).process()
+    assert trainer._fingerprint(ela_dir) != first
@@ -0,0 +1,60 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.serving.preprocess_pool import Overloaded, PreprocessPool
+
+
+def _wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_cancelled_request_keeps_its_slot_until_the_job_finishes():
+    pool = PreprocessPool(workers=1, max_pending=1)
+    started, release = threading.Event(), threading.Event()
+
+    def job():
+        started.set()
+        release.wait(5)
+        return "done"
+
+    async def scenario():
+        request = asyncio.ensure_future(pool.run(job))
+        await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+        request.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await request
+
+        # The worker is still busy, so the slot is still taken
+        assert pool.pending == 1
+        with pytest.raises(Overloaded):
+            await pool.run(job)
+
+    try:
+        asyncio.run(scenario())
+        release.set()
+        _wait_until(lambda: pool.pending == 0)
+        assert pool.rejected == 1
+    finally:
+        release.set()
+        pool.shutdown()
+
+
+def test_results_and_errors_release_their_slot():
+    pool = PreprocessPool(workers=2, max_pending=2)
+
+    async def scenario():
+        assert await pool.run(sum, [1, 2, 3]) == 6
+        with pytest.raises(ZeroDivisionError):
+            await pool.run(divmod, 1, 0)
+
+    try:
+        asyncio.run(scenario())
+        _wait_until(lambda: pool.pending == 0)
+    finally:
+        pool.shutdown()
@@ -0,0 +1,27 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from src.profiling.profiler import PROFILER, pool_map, profile_function
+
+
+@profile_function("square")
+def _square(x):
+    return x * x
+
+
+def test_pool_map_merges_worker_function_stats(monkeypatch):
+    monkeypatch.setattr(PROFILER, "enabled", True)
+    PROFILER.reset()
+    try:
+        _square(1)  # recorded in the parent before the workers fork
+        with ProcessPoolExecutor(max_workers=2) as pool:
+            assert list(pool_map(pool, _square, range(10), chunksize=3)) == [x * x for x in range(10)]
+        assert PROFILER.report()["functions"]["square"]["calls"] == 11
+    finally:
+        PROFILER.reset()
+
+
+def test_pool_map_is_plain_map_when_disabled(monkeypatch):
+    monkeypatch.setattr(PROFILER, "enabled", False)
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        assert list(pool_map(pool, _square, range(4))) == [0, 1, 4, 9]
+    assert "square" not in PROFILER.report()["functions"]
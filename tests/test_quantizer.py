@@ -0,0 +1,31 @@
+
+import numpy as np
+from PIL import Image
+
+from src.deployment.quantizer import representative_images
+from src.preprocessing.ela import resize_ela
+from src.serving.batch_predict import prepare_input
+
+def _images(root, size=(60, 45)):
+    rng = np.random.default_rng(0)
+    for label in ("forged", "original"):
+        (root / label).mkdir(parents=True)
+        Image.fromarray(rng.integers(0, 256, (size[1], size[0], 3), dtype=np.uint8)).save(root / label / "0.png")
+    return sorted(root.rglob("*.png"))
+
+def test_calibration_samples_use_the_serving_preprocessing(tmp_path):
+    files = _images(tmp_path / "ela")
+    samples = [batch[0] for batch in representative_images(tmp_path / "ela", image_size=(32, 32))()]
+    expected = [np.float32(resize_ela(np.asarray(Image.open(path).convert("RGB")), (32, 32)) / 255.0)
+                for path in files]
+    assert len(samples) == len(files)
+    for sample in samples:
+        assert sample.shape == (1, 32, 32, 3) and sample.dtype == np.float32
+        assert any(np.array_equal(sample[0], e) for e in expected)
+
+def test_raw_calibration_samples_go_through_prepare_input(tmp_path):
+    files = _images(tmp_path / "raw")
+    samples = [batch[0][0] for batch in representative_images(tmp_path / "raw", image_size=(32, 32), raw=True)()]
+    expected = [prepare_input(path.read_bytes(), size=(32, 32)).astype(np.float32) for path in files]
+    for sample in samples:
+        assert any(np.array_equal(sample, e) for e in expected)
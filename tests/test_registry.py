@@ -0,0 +1,29 @@
+from src.deployment.registry import FilesystemRegistry, publish
+
+
+def test_publish_uploads_changes_and_deletes_stale_managed_files(tmp_path):
+    local = tmp_path / "local"
+    local.mkdir()
+    (local / "app.py").write_text("v1")
+    (local / "production_model_int8.tflite").write_bytes(b"old")
+    registry = FilesystemRegistry(tmp_path / "registry")
+    managed = ("production_model_*.tflite",)
+
+    first = publish(registry, [(local / "app.py", "app.py"),
+                               (local / "production_model_int8.tflite", "production_model_int8.tflite")],
+                    "first", managed=managed)
+    assert first["uploaded"] == ["app.py", "production_model_int8.tflite"]
+
+    # The new model's int8 variant was rejected: only app.py is published now
+    (local / "app.py").write_text("v2")
+    (registry.root / "notes.txt").write_text("not managed")
+    second = publish(registry, [(local / "app.py", "app.py")], "second", managed=managed)
+
+    assert second["uploaded"] == ["app.py"]
+    assert second["deleted"] == ["production_model_int8.tflite"]
+    assert registry.paths() == ["app.py", "notes.txt"]
+    assert registry.commits()[-1]["deleted"] == ["production_model_int8.tflite"]
+
+    third = publish(registry, [(local / "app.py", "app.py")], "third", managed=managed)
+    assert third["uploaded"] == [] and third["deleted"] == []
+    assert len(registry.commits()) == 2
@@ -0,0 +1,72 @@
+import os
+import time
+
+from src.serving import result_cache
+from src.serving.result_cache import ResultCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_evicts_least_recently_used():
+    cache = ResultCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["size"] == 2
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(result_cache.time, "time", clock)
+    cache = ResultCache(ttl_seconds=10)
+    cache.put("a", 1)
+    clock.now += 9
+    assert cache.get("a") == 1
+    clock.now += 2
+    assert cache.get("a") is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_model_version_change_drops_memory_entries():
+    cache = ResultCache(model_version="v1")
+    key = cache.key(b"image")
+    cache.put(key, 0.5)
+    cache.set_model_version("v2")
+    assert cache.get(key) is None
+    assert cache.key(b"image") != key
+
+
+def test_disk_tier_is_shared_and_bounded(tmp_path):
+    writer = ResultCache(max_entries=100, disk_dir=tmp_path, disk_max_entries=5)
+    keys = [f"{i:02d}" + "0" * 62 for i in range(20)]
+    for i, key in enumerate(keys):
+        writer.put(key, i)
+        path = writer._disk_path(key)
+        os.utime(path, (time.time() - 100 + i, time.time() - 100 + i))
+
+    on_disk = sorted(p.stem for p in tmp_path.glob("*/*.json"))
+    assert on_disk == keys[-5:]
+
+    # Another worker (empty memory tier) reads the surviving entries from disk
+    reader = ResultCache(max_entries=100, disk_dir=tmp_path, disk_max_entries=5)
+    assert reader.get(keys[-1]) == 19
+    assert reader.get(keys[0]) is None
+
+
+def test_disk_prune_drops_expired_files(tmp_path):
+    cache = ResultCache(ttl_seconds=60, disk_dir=tmp_path, disk_max_entries=100)
+    cache.put("aa" + "0" * 62, 1)
+    cache.put("bb" + "0" * 62, 2)
+    old = cache._disk_path("aa" + "0" * 62)
+    os.utime(old, (time.time() - 120, time.time() - 120))
+    assert cache.prune_disk() == 1
+    assert not old.exists()
@@ -0,0 +1,21 @@
+import pytest
+
+from src.training.training_config import TrainingConfig
+
+
+def test_from_options_accepts_arguments_and_presets():
+    assert TrainingConfig.from_options(None) is None
+    assert TrainingConfig.from_options({}) is None
+
+    config = TrainingConfig.from_options({"lr_scaling": "sqrt", "base_batch_size": 32})
+    assert (config.lr_scaling, config.base_batch_size, config.jit_compile) == ("sqrt", 32, False)
+
+    options = {"preset": "performance", "checkpoint_dir": "ckpt"}
+    config = TrainingConfig.from_options(options)
+    assert config.as_dict() == TrainingConfig.performance(checkpoint_dir="ckpt").as_dict()
+    assert options == {"preset": "performance", "checkpoint_dir": "ckpt"}
+
+
+def test_from_options_rejects_unknown_presets():
+    with pytest.raises(ValueError, match="preset"):
+        TrainingConfig.from_options({"preset": "turbo"})